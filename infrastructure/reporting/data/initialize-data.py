@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 
+import os
+import sys
 import sqlite3
 
-connection = sqlite3.connect('reporting.db')
-c = connection.cursor()
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-c.execute('CREATE TABLE IF NOT EXISTS reports ([record] jsonb)')
+from schema import init_db  # noqa: E402
 
-connection.commit()
+connection = sqlite3.connect('reporting.db')
+init_db(connection)
+connection.close()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Load test of the Reporting API Server.
+
+Replays synthetic telemetry reports, as sent by the lab command,
+and prints the requests and reports per second that the server handles.
+
+    ./load_test.py --url http://localhost:5000 --requests 2000 --batch-size 50
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from labs.telemetry.data import TelemetryReport
+
+SKUS = ["do180", "do280", "do288", "do374", "rh124", "rh134", "rh294"]
+ACTIONS = ["start", "grade", "finish"]
+PYTHON_VERSIONS = ["3.6.8", "3.8.12", "3.9.7"]
+
+_local = threading.local()
+
+
+def synthetic_report() -> dict:
+    started_at = datetime.now() - timedelta(seconds=random.randint(0, 3600))
+    finished_at = started_at + timedelta(seconds=random.uniform(0.5, 120))
+    report = TelemetryReport(
+        random.choice(SKUS),
+        random.choice(ACTIONS),
+        started_at,
+        finished_at,
+        {
+            "platform": {
+                "system": "Linux",
+                "release": "4.18.0-305.el8.x86_64",
+                "architecture": "x86_64",
+                "hostname": f"workstation-{random.randint(1, 500)}",
+            },
+            "python": {
+                "version": random.choice(PYTHON_VERSIONS),
+                "compiler": "GCC 8.4.1",
+            },
+        },
+    )
+    return report.to_dict()
+
+
+def get_session() -> requests.Session:
+    # Each worker reuses its connection, as a real client would
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def send(url: str, batch_size: int) -> int:
+    """
+    Send one request. Returns the HTTP status code.
+    """
+    if batch_size > 1:
+        url = f"{url}/v1/reports:batch"
+        body = {"reports": [synthetic_report() for _ in range(batch_size)]}
+    else:
+        url = f"{url}/v1/report"
+        body = synthetic_report()
+
+    response = get_session().post(
+        url,
+        data=json.dumps(body, default=str),
+        headers={"Content-Type": "application/json"},
+        timeout=30,
+    )
+    return response.status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Reports per request. 1 uses /v1/report")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    url = args.url.rstrip("/")
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        statuses = list(executor.map(
+            lambda _: send(url, args.batch_size), range(args.requests)
+        ))
+    elapsed = time.monotonic() - started
+
+    errors = sum(1 for status in statuses if status != 201)
+    reports = (args.requests - errors) * args.batch_size
+    print(f"Requests:     {args.requests} ({errors} failed)")
+    print(f"Elapsed:      {elapsed:.2f}s")
+    print(f"Requests/s:   {args.requests / elapsed:.1f}")
+    print(f"Reports/s:    {reports / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
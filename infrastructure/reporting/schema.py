@@ -0,0 +1,49 @@
+"""
+Schema of the reporting database.
+
+Shared by the server and the data initialization script,
+which does not require Flask.
+"""
+
+# Report fields projected into typed columns, so that queries use indexes
+# instead of decoding the JSON of every report.
+# Generated columns require SQLite >= 3.31
+GENERATED_COLUMNS = {
+    'sku': "TEXT AS (json_extract(record, '$.sku'))",
+    'action': "TEXT AS (json_extract(record, '$.action'))",
+    'started_at': "TEXT AS (datetime(json_extract(record, '$.started_at')))",
+    'duration': "REAL AS (json_extract(record, '$.duration'))",
+    'python_version':
+        "TEXT AS (json_extract(record, '$.sysinfo.python.version'))",
+}
+
+INDEXES = {
+    'reports_started_at': '(started_at)',
+    'reports_sku_action_started_at': '(sku, action, started_at)',
+    'reports_sku_action_duration': '(sku, action, duration)',
+    'reports_python_version': '(python_version, started_at)',
+}
+
+
+def init_db(connection):
+    """
+    Create the reports table, its generated columns and indexes.
+    Existing tables get the missing columns.
+    """
+    with connection:
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS reports ([record] jsonb)'
+        )
+        columns = {
+            row[1] for row in
+            connection.execute('PRAGMA table_xinfo(reports)')
+        }
+        for name, definition in GENERATED_COLUMNS.items():
+            if name not in columns:
+                connection.execute(
+                    f'ALTER TABLE reports ADD COLUMN {name} {definition}'
+                )
+        for name, indexed in INDEXES.items():
+            connection.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON reports {indexed}'
+            )
@@ -1,41 +1,227 @@
 import json
+import queue
 import sqlite3
+import threading
 from flask import abort, Flask, g, make_response, request
 
+from schema import init_db
+
 app = Flask(__name__)
 
 DATABASE = './data/reporting.db'
 
+# Max reports accepted in a single batch request
+MAX_BATCH_SIZE = 1000
+
+# Columns that the aggregate endpoints can group by
+GROUP_BY_COLUMNS = ('sku', 'action', 'python_version')
+
+# strftime formats of the histogram buckets
+BUCKETS = {
+    'hour': '%Y-%m-%d %H:00:00',
+    'day': '%Y-%m-%d',
+    'week': '%Y-%W',
+    'month': '%Y-%m',
+}
+
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+# Max open connections. Requests borrow a connection from the pool,
+# and wait up to POOL_TIMEOUT seconds if all of them are in use
+POOL_SIZE = 8
+POOL_TIMEOUT = 10
+
+_pool = queue.Queue(maxsize=POOL_SIZE)
+_pool_lock = threading.Lock()
+_pool_opened = 0
+
 
 def connect_db():
-    return sqlite3.connect(DATABASE)
+    # Pooled connections are used by many request threads, one at a time
+    connection = sqlite3.connect(DATABASE, check_same_thread=False)
+    # WAL lets readers work while a writer commits,
+    # and NORMAL sync is safe in WAL mode
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.execute('PRAGMA busy_timeout=5000')
+    return connection
+
+
+@app.before_first_request
+def create_tables():
+    connection = sqlite3.connect(DATABASE)
+    init_db(connection)
+    connection.close()
+
+
+def acquire_connection():
+    """
+    Borrow a connection from the pool.
+    Connections are opened on demand, up to POOL_SIZE.
+    """
+    global _pool_opened
+
+    try:
+        return _pool.get_nowait()
+    except queue.Empty:
+        pass
+
+    with _pool_lock:
+        if _pool_opened < POOL_SIZE:
+            _pool_opened += 1
+            open_connection = True
+        else:
+            open_connection = False
+
+    if open_connection:
+        try:
+            return connect_db()
+        except sqlite3.Error:
+            with _pool_lock:
+                _pool_opened -= 1
+            raise
+
+    try:
+        return _pool.get(timeout=POOL_TIMEOUT)
+    except queue.Empty:
+        abort(503)
 
 
 def get_connection():
     db = getattr(g, '_database', None)
     if db is None:
-        db = g._database = sqlite3.connect(DATABASE)
+        db = g._database = acquire_connection()
 
     return db
 
 
+@app.teardown_appcontext
+def release_connection(exception):
+    db = g.pop('_database', None)
+    if db is not None:
+        if db.in_transaction:
+            db.rollback()
+        _pool.put_nowait(db)
+
+
 def query_db(query, args=(), one=False):
-    cur = g.db.execute(query, args)
+    cur = get_connection().execute(query, args)
     rv = [dict((cur.description[idx][0], value)
                for idx, value in enumerate(row)) for row in cur.fetchall()]
     return (rv[0] if rv else None) if one else rv
 
 
-@app.before_request
-def open_db_connection():
-    g.db = connect_db()
+def insert_reports(reports):
+    """
+    Insert the reports in a single transaction
+    """
+    connection = get_connection()
+    with connection:
+        connection.executemany(
+            'INSERT INTO reports VALUES (?)',
+            [[json.dumps(report)] for report in reports]
+        )
 
 
-@app.teardown_appcontext
-def close_db_connection(exception):
-    db = getattr(g, '_database', None)
-    if db is not None:
-        db.close()
+def parse_batch():
+    """
+    Return the reports of a batch request.
+
+    The body is a JSON array of reports, a JSON object with a "reports"
+    array, or JSON lines (one report per line).
+    """
+    if request.is_json:
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            body = body.get('reports')
+        if not isinstance(body, list):
+            abort(400)
+        reports = body
+    else:
+        try:
+            reports = [
+                json.loads(line)
+                for line in request.get_data(as_text=True).splitlines()
+                if line.strip()
+            ]
+        except ValueError:
+            abort(400)
+
+    if not all(isinstance(report, dict) for report in reports):
+        abort(400)
+
+    if len(reports) > MAX_BATCH_SIZE:
+        abort(413)
+
+    return reports
+
+
+def parse_filters():
+    """
+    Return the WHERE clause and its parameters
+    for the sku, action, python_version, since and until query params
+    """
+    conditions, params = [], []
+
+    for column in GROUP_BY_COLUMNS:
+        value = request.args.get(column)
+        if value is not None:
+            conditions.append(f'{column} = ?')
+            params.append(value)
+
+    for arg, operator in (('since', '>='), ('until', '<')):
+        value = request.args.get(arg)
+        if value is None:
+            continue
+        timestamp = query_db('SELECT datetime(?) AS t', [value], one=True)
+        if timestamp['t'] is None:
+            abort(400)
+        conditions.append(f'started_at {operator} ?')
+        params.append(timestamp['t'])
+
+    where = ' AND '.join(conditions) if conditions else '1'
+    return where, params
+
+
+def parse_group_by():
+    group_by = [
+        column for column in request.args.get('group_by', '').split(',')
+        if column
+    ]
+    if any(column not in GROUP_BY_COLUMNS for column in group_by):
+        abort(400)
+    return group_by
+
+
+def get_percentiles(where, params, group_by, percentiles):
+    """
+    Return the nearest-rank percentiles of the duration of each group,
+    in a single query.
+    Reports without duration are counted in their group, but not ranked.
+    """
+    partition = f'PARTITION BY {", ".join(group_by)}' if group_by else ''
+    columns = ''.join(f'{column}, ' for column in group_by)
+    group = f'GROUP BY {", ".join(group_by)}' if group_by else ''
+    order = f'ORDER BY {", ".join(group_by)}' if group_by else ''
+    # The nearest rank of the percentile p is ceil(p * n / 100)
+    selected = ''.join(
+        f', MAX(CASE WHEN rank = (n * {p} + 99) / 100 THEN duration END) '
+        f'AS p{p}'
+        for p in percentiles
+    )
+
+    return query_db(
+        'WITH ranked AS ('
+        f'SELECT {columns}duration, '
+        f'ROW_NUMBER() OVER ({partition} '
+        'ORDER BY duration IS NULL, duration) AS rank, '
+        f'COUNT(duration) OVER ({partition}) AS n '
+        f'FROM reports WHERE {where}'
+        ') '
+        f'SELECT {columns}COALESCE(MAX(n), 0) AS count{selected} '
+        f'FROM ranked {group} {order}',
+        params
+    )
 
 
 @app.route('/v1/healthz', methods=['GET'])
@@ -49,12 +235,10 @@ def post_log():
         abort(400)
 
     connection = get_connection()
-    c = connection.cursor()
-
-    c.execute('INSERT INTO reports VALUES (?)', [json.dumps(request.json)])
-
-    connection.commit()
-    connection.close()
+    with connection:
+        c = connection.execute(
+            'INSERT INTO reports VALUES (?)', [json.dumps(request.json)]
+        )
 
     response = make_response('')
     response.headers['Location'] = '/v1/report/{}'.format(c.lastrowid)
@@ -62,6 +246,15 @@ def post_log():
     return response, 201
 
 
+@app.route('/v1/reports:batch', methods=['POST'])
+def post_logs():
+    reports = parse_batch()
+
+    insert_reports(reports)
+
+    return {'count': len(reports)}, 201
+
+
 @app.route('/v1/report/<int:id>', methods=['GET'])
 def get_log(id):
 
@@ -73,5 +266,70 @@ def get_log(id):
     return json.loads(log.get('record'))
 
 
+@app.route('/v1/stats/count', methods=['GET'])
+def get_count():
+    """
+    Number of reports, optionally grouped by sku, action or python_version
+    """
+    where, params = parse_filters()
+    group_by = parse_group_by()
+    columns = ''.join(f'{column}, ' for column in group_by)
+    group = f'GROUP BY {", ".join(group_by)}' if group_by else ''
+
+    rows = query_db(
+        f'SELECT {columns}COUNT(*) AS count FROM reports '
+        f'WHERE {where} {group} ORDER BY count DESC',
+        params
+    )
+
+    return {'results': rows}
+
+
+@app.route('/v1/stats/duration', methods=['GET'])
+def get_duration():
+    """
+    Percentiles of the duration of the reports,
+    optionally grouped by sku, action or python_version
+    """
+    where, params = parse_filters()
+    group_by = parse_group_by()
+
+    try:
+        percentiles = [
+            int(p) for p in request.args.get('percentiles', '').split(',')
+            if p
+        ] or list(DEFAULT_PERCENTILES)
+    except ValueError:
+        abort(400)
+    if any(not 0 < p <= 100 for p in percentiles):
+        abort(400)
+
+    return {'results': get_percentiles(where, params, group_by, percentiles)}
+
+
+@app.route('/v1/stats/histogram', methods=['GET'])
+def get_histogram():
+    """
+    Number of reports and average duration per time bucket,
+    optionally grouped by sku, action or python_version
+    """
+    where, params = parse_filters()
+    group_by = parse_group_by()
+    bucket = BUCKETS.get(request.args.get('bucket', 'day'))
+    if bucket is None:
+        abort(400)
+    columns = ''.join(f', {column}' for column in group_by)
+
+    rows = query_db(
+        f"SELECT strftime('{bucket}', started_at) AS bucket{columns}, "
+        'COUNT(*) AS count, AVG(duration) AS avg_duration '
+        f'FROM reports WHERE {where} '
+        f'GROUP BY bucket{columns} ORDER BY bucket{columns}',
+        params
+    )
+
+    return {'results': rows}
+
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0')
@@ -0,0 +1,25 @@
+"""
+Entry point of the ``lab`` command.
+
+Shell completion requests for lab script names are answered by
+:mod:`labs.completion`, without loading the click commands of
+:mod:`labs.lab`. Everything else is handled by :func:`labs.lab.main`.
+"""
+
+import os
+import sys
+
+from labs import completion
+
+
+def main():
+    if os.environ.get(completion.COMPLETE_VAR) and completion.main():
+        sys.exit(0)
+
+    from labs.lab import main as lab_main
+
+    lab_main()
+
+
+if __name__ == "__main__":
+    main()
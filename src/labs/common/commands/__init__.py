@@ -6,11 +6,20 @@ A wrapper over the `subprocess` module to
 execute commands and verify the result.
 """
 
-import logging
+import os
+import shlex
 import subprocess
 from typing import List, Optional, Tuple
 
 from labs.ui import Step
+from labs.common.commands import ssh
+from labs.common.commands.stream import run_streaming
+
+# Max bytes of stdout and stderr kept in memory by command steps
+DEFAULT_MAX_OUTPUT = 1024 * 1024
+
+# Private key used by remote commands, if it exists
+DEFAULT_SSH_KEY = "/home/student/.ssh/lab_rsa"
 
 
 def run_command_step(
@@ -21,7 +30,9 @@ def run_command_step(
     prints: Optional[str] = None,
     returns: Optional[int] = None,
     grading=False,
-    fatal=False
+    fatal=False,
+    stop_on_match=False,
+    max_output: Optional[int] = DEFAULT_MAX_OUTPUT,
 ) -> Tuple[subprocess.CompletedProcess, Step]:
     """A UI Step to run a command.
 
@@ -41,13 +52,25 @@ def run_command_step(
             at the output of the command
         grading: Flag to use a grading step
         fatal: Flag to use a fatal step
+        stop_on_match: Flag to stop the command as soon as
+            the `prints` text is found. Do not combine with `returns`,
+            because the stopped command does not exit normally.
+        max_output: Max bytes of stdout and stderr to keep in the
+            returned process. The `prints` text is searched in the
+            whole output.
 
     Returns:
         The step
     """
 
     with Step(message, grading=grading, fatal=fatal) as step:
-        process = run_command(command, options, shell)
+        process = _run_command_and_log(
+            [command] + options,
+            shell,
+            prints=prints,
+            stop_on_match=stop_on_match,
+            max_output=max_output,
+        )
 
         verify_command_result(step, process, prints, returns)
 
@@ -86,10 +109,12 @@ def verify_command_result(
         True if the verification is successful, False otherwise
     """
     if prints is not None:
-        expected_stdout = prints.lower()
-        actual_stdout = process.stdout.decode().lower()
+        # Streamed processes search the text while the command runs
+        matched = getattr(process, "matched", None)
+        if matched is None:
+            matched = prints.lower() in process.stdout.decode().lower()
 
-        if expected_stdout not in actual_stdout:
+        if not matched:
             step.add_errors([
                 f"'{process.args}' did not print the expected message",
                 f"'{prints}' not found in command output"
@@ -111,18 +136,24 @@ def verify_command_result(
 def run_command(
     command: str,
     options: List[str] = [],
-    shell=False
+    shell=False,
+    max_output: Optional[int] = None,
 ):
     """
     Run a command on localhost.
     Returns a CompletedProcess object.
 
+    The output is streamed to the log while the command runs.
+
     Args:
         command: A string with the command to be run.
             If `shell=True`,
             this string can be used to add options or pipes.
         options: List of additional command options
         shell: set to True to pass the entire command as a single string
+        max_output: Max bytes of stdout and stderr to keep in memory.
+            Only the end of the output is kept.
+            By default, the whole output is kept.
 
     Returns:
         The completed process
@@ -130,27 +161,54 @@ def run_command(
 
     full_command = [command] + options
 
-    process = _run_command_and_log(full_command, shell)
+    process = _run_command_and_log(full_command, shell, max_output=max_output)
 
     return process
 
 
-def _run_command_and_log(command: List[str], shell=False):
-    command_str = " ".join(command)
-    logging.info(f"\n\nCOMMAND: \n\n{command_str}")
+def run_remote(
+    host: str,
+    argv: List[str],
+    sshkey: Optional[str] = None,
+):
+    """
+    Run a command on a remote host through SSH.
+    Returns a CompletedProcess object.
 
-    process = subprocess.run(
-        command,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        shell=shell
+    Commands to the same host reuse a master SSH connection,
+    which is closed when the lab command finishes.
+
+    Args:
+        host: The remote host. Use "user@host" to connect as another user.
+        argv: The command and its arguments. The arguments are quoted,
+            so the remote shell does not interpret them.
+        sshkey: Path of the private key.
+            By default, DEFAULT_SSH_KEY, if the file exists.
+
+    Returns:
+        The completed process
+    """
+    if sshkey is None and os.path.isfile(DEFAULT_SSH_KEY):
+        sshkey = DEFAULT_SSH_KEY
+
+    full_command = (
+        ssh.ssh_command(host, sshkey) + [shlex.quote(arg) for arg in argv]
     )
 
-    # Log to the configured stdout file
-    stdout = process.stdout.decode()
-    logging.info(f"\n\nSTDOUT: \n\n{stdout}")
+    return _run_command_and_log(full_command)
 
-    stderr = process.stderr.decode()
-    logging.error(f"\n\nSTDERR: \n\n{stderr}")
 
-    return process
+def _run_command_and_log(
+    command: List[str],
+    shell=False,
+    prints: Optional[str] = None,
+    stop_on_match=False,
+    max_output: Optional[int] = None,
+):
+    return run_streaming(
+        command,
+        shell,
+        prints=prints,
+        stop_on_match=stop_on_match,
+        max_output=max_output,
+    )
@@ -0,0 +1,212 @@
+"""
+Reusable SSH connections.
+
+SSH commands share one master connection per (user, host, key) through
+OpenSSH ControlMaster sockets, so only the first command to a host pays
+for the SSH handshake.
+
+The pool starts each master connection explicitly, before the first
+command to a host, as a background ``ssh -M -N -f`` process that does not
+hold the pipes of any command. Commands never start masters themselves
+(``ControlMaster=no``): if a command started the master, the master would
+inherit the stdout and stderr pipes of the command, and reading the
+output of the command would hang until the master exits.
+If the master cannot be started, commands connect directly.
+
+The sockets live in a temporary directory of the lab session.
+The master connections are closed when the session ends
+(see :py:func:`close_connections`).
+"""
+
+import os
+import atexit
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+import subprocess
+from typing import Dict, List, Optional, Set, Tuple
+
+# Seconds that an idle master connection stays open.
+# Masters are closed at the end of the session,
+# so this only matters if the lab command is killed
+CONTROL_PERSIST = 60
+
+# Max seconds to wait for a master connection to be established
+MASTER_TIMEOUT = 30
+
+# Master connections are identified by user, host and key
+ConnectionKey = Tuple[Optional[str], str, Optional[str]]
+
+
+class SSHConnectionPool:
+    """
+    Master SSH connections of a lab session
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._control_dir: Optional[str] = None
+        self._masters: Dict[ConnectionKey, str] = {}
+        self._master_locks: Dict[ConnectionKey, threading.Lock] = {}
+        self._started: Set[ConnectionKey] = set()
+
+    def get_control_path(
+        self, user: Optional[str], host: str, sshkey: Optional[str] = None
+    ) -> str:
+        """
+        Return the socket of the master connection of a user, host and key
+        """
+        key = (user, host, sshkey)
+        with self._lock:
+            if key not in self._masters:
+                if self._control_dir is None:
+                    # Keep the path short.
+                    # Socket paths are limited to 108 characters
+                    self._control_dir = tempfile.mkdtemp(prefix="lab-ssh-")
+
+                digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+                self._masters[key] = os.path.join(self._control_dir, digest)
+
+            return self._masters[key]
+
+    def start_master(
+        self, user: Optional[str], host: str, sshkey: Optional[str] = None
+    ) -> str:
+        """
+        Start the master connection of a user, host and key,
+        unless it has already been started.
+        Returns the socket of the master connection.
+
+        Concurrent calls for the same connection start a single master.
+        Masters are only started once: if a master fails to start,
+        commands connect directly.
+        """
+        key = (user, host, sshkey)
+        control_path = self.get_control_path(user, host, sshkey)
+        with self._lock:
+            lock = self._master_locks.setdefault(key, threading.Lock())
+
+        with lock:
+            if key in self._started:
+                return control_path
+            self._started.add(key)
+
+            command = ["ssh"]
+            if sshkey:
+                command += ["-i", sshkey]
+            command += [
+                "-M", "-N", "-f",
+                "-o", f"ControlPersist={CONTROL_PERSIST}",
+                "-S", control_path,
+                _destination(user, host),
+            ]
+            try:
+                # -f forks the master into the background once connected.
+                # The master must not inherit any pipe of the lab command
+                subprocess.run(
+                    command,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    timeout=MASTER_TIMEOUT,
+                )
+            except (OSError, subprocess.TimeoutExpired):
+                logging.debug(
+                    "Cannot start the SSH master of "
+                    f"{_destination(user, host)}",
+                    exc_info=True
+                )
+
+        return control_path
+
+    def ssh_command(
+        self, user: Optional[str], host: str, sshkey: Optional[str] = None
+    ) -> List[str]:
+        """
+        Return the ssh command to run a remote command in a host,
+        through its master connection, which is started if needed.
+        The remote command must be appended to the returned list.
+        If user is None, then ssh uses the local user name.
+        """
+        command = ["ssh"]
+        if sshkey:
+            command += ["-i", sshkey]
+
+        control_path = self.start_master(user, host, sshkey)
+        return command + [
+            "-o", "ControlMaster=no",
+            "-S", control_path,
+            _destination(user, host),
+        ]
+
+    def close(self):
+        """
+        Close the master connections and remove the sockets directory
+        """
+        with self._lock:
+            control_dir, self._control_dir = self._control_dir, None
+            masters, self._masters = self._masters, {}
+            self._master_locks = {}
+            self._started = set()
+
+        for (user, host, _), control_path in masters.items():
+            if not os.path.exists(control_path):
+                continue
+            try:
+                subprocess.run(
+                    ["ssh", "-S", control_path,
+                     "-O", "exit", _destination(user, host)],
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    timeout=5,
+                )
+            except (OSError, subprocess.TimeoutExpired):
+                logging.debug(
+                    "Cannot close the SSH master of "
+                    f"{_destination(user, host)}",
+                    exc_info=True
+                )
+
+        if control_dir:
+            shutil.rmtree(control_dir, ignore_errors=True)
+
+
+def _destination(user: Optional[str], host: str) -> str:
+    return f"{user}@{host}" if user else host
+
+
+_pool = SSHConnectionPool()
+
+
+def get_pool() -> SSHConnectionPool:
+    """
+    Return the SSH connection pool of the lab session
+    """
+    return _pool
+
+
+def ssh_command(destination: str, sshkey: Optional[str] = None) -> List[str]:
+    """
+    Return the ssh command to run a remote command in the destination,
+    through the master connection of the session.
+    The remote command must be appended to the returned list.
+
+    :param destination: Remote host, such as ``root@servera``
+    :param sshkey: Path of the private key
+    """
+    user, _, host = destination.rpartition("@")
+    return _pool.ssh_command(user or None, host, sshkey)
+
+
+def close_connections():
+    """
+    Close the master connections of the session
+    """
+    _pool.close()
+
+
+# Masters must not outlive the process, even if the session does not end
+atexit.register(close_connections)
@@ -0,0 +1,257 @@
+"""
+Streaming execution of commands.
+
+Commands are run with their stdout and stderr read incrementally through
+:py:mod:`selectors`, instead of buffering the whole output in memory:
+
+* Output is written to the log in blocks of :data:`LOG_BLOCK_SIZE` bytes,
+  instead of one log record for the whole output.
+* Only the last ``max_output`` bytes of each stream are kept in memory.
+* The expected ``prints`` text is searched as the output arrives,
+  so the command can be stopped as soon as the text is found.
+"""
+
+import os
+import time
+import codecs
+import logging
+import selectors
+import subprocess
+from typing import List, Optional
+
+from labs import profiler
+
+# Bytes read from the command pipes at once
+CHUNK_SIZE = 64 * 1024
+
+# Max bytes of output in a single log record
+LOG_BLOCK_SIZE = 256 * 1024
+
+# Seconds to wait for a command to exit after it is stopped
+TERMINATE_TIMEOUT = 5
+
+# Max characters of a command in the profiler spans
+PROFILE_NAME_LENGTH = 80
+
+
+class StreamedProcess(subprocess.CompletedProcess):
+    """
+    A completed process whose output might be truncated.
+
+    Besides the CompletedProcess attributes, it includes:
+
+    * ``matched``: Whether the stdout contains the expected text.
+      None if no text was expected.
+    * ``stopped``: Whether the process was stopped after the text was found.
+    * ``truncated``: Whether stdout or stderr only contain the tail
+      of the output.
+    """
+
+    def __init__(self, args, returncode, stdout, stderr,
+                 matched=None, stopped=False, truncated=False):
+        super().__init__(args, returncode, stdout, stderr)
+        self.matched = matched
+        self.stopped = stopped
+        self.truncated = truncated
+
+
+class TailBuffer:
+    """
+    Keeps the last max_size bytes written to it.
+    If max_size is None, it keeps everything.
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size
+        self.truncated = False
+        self._data = bytearray()
+
+    def write(self, chunk: bytes):
+        self._data += chunk
+        if self.max_size is not None and len(self._data) > self.max_size:
+            del self._data[:len(self._data) - self.max_size]
+            self.truncated = True
+
+    def getvalue(self) -> bytes:
+        return bytes(self._data)
+
+
+class LogWriter:
+    """
+    Writes a stream of output to the log, in blocks of up to block_size bytes
+    """
+
+    def __init__(self, title: str, level: int, block_size=LOG_BLOCK_SIZE):
+        self.title = title
+        self.level = level
+        self.block_size = block_size
+        self._buffer = bytearray()
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self._records = 0
+
+    def write(self, chunk: bytes):
+        self._buffer += chunk
+        while len(self._buffer) >= self.block_size:
+            # Prefer to split blocks at line breaks
+            end = self._buffer.rfind(b"\n", 0, self.block_size) + 1
+            self._emit(self._buffer[:end or self.block_size])
+            del self._buffer[:end or self.block_size]
+
+    def close(self):
+        if self._buffer:
+            self._emit(self._buffer, final=True)
+            self._buffer = bytearray()
+
+    def _emit(self, data: bytes, final=False):
+        text = self._decoder.decode(bytes(data), final)
+        title = self.title if not self._records else f"{self.title} (cont.)"
+        logging.log(self.level, f"\n\n{title}: \n\n{text}")
+        self._records += 1
+
+
+class TextMatcher:
+    """
+    Searches a case-insensitive text in a stream of bytes
+    """
+
+    def __init__(self, text: str):
+        self.text = text.lower()
+        self.matched = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self._tail = ""
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Search the text in a new chunk of the stream.
+        Returns whether the text has been found.
+        """
+        if not self.matched:
+            window = self._tail + self._decoder.decode(chunk).lower()
+            self.matched = self.text in window
+            # Keep enough characters to find matches across chunks
+            keep = max(len(self.text) - 1, 0)
+            self._tail = window[len(window) - keep:]
+        return self.matched
+
+
+def run_streaming(
+    command: List[str],
+    shell=False,
+    prints: Optional[str] = None,
+    stop_on_match=False,
+    max_output: Optional[int] = None,
+) -> StreamedProcess:
+    """
+    Run a command, streaming its output to the log.
+
+    Args:
+        command: The command and its arguments
+        shell: set to True to run the command through the shell
+        prints: text to search in the stdout (case-insensitive)
+        stop_on_match: set to True to stop the command as soon as
+            the prints text is found
+        max_output: max bytes of stdout and stderr to keep in memory.
+            Only the end of the output is kept. None to keep everything.
+
+    Returns:
+        The process, including the tail of its output
+    """
+    logging.info(f"\n\nCOMMAND: \n\n{' '.join(command)}")
+
+    started = time.monotonic()
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        shell=shell
+    )
+
+    stdout, stderr = TailBuffer(max_output), TailBuffer(max_output)
+    stdout_log = LogWriter("STDOUT", logging.INFO)
+    stderr_log = LogWriter("STDERR", logging.ERROR)
+    matcher = TextMatcher(prints) if prints is not None else None
+    handlers = [
+        _StreamHandler(process.stdout, stdout, stdout_log, matcher),
+        _StreamHandler(process.stderr, stderr, stderr_log, None),
+    ]
+
+    try:
+        stopped = _select_streams(handlers, stop_on_match)
+    except BaseException:
+        # Do not leave the command running, e.g. on KeyboardInterrupt
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        process.stdout.close()
+        process.stderr.close()
+
+    if stopped:
+        _stop(process)
+    returncode = process.wait()
+    stdout_log.close()
+    stderr_log.close()
+    profiler.record(
+        " ".join(command)[:PROFILE_NAME_LENGTH], "subprocess", started
+    )
+
+    return StreamedProcess(
+        process.args,
+        returncode,
+        stdout.getvalue(),
+        stderr.getvalue(),
+        matched=matcher.matched if matcher else None,
+        stopped=stopped,
+        truncated=stdout.truncated or stderr.truncated,
+    )
+
+
+class _StreamHandler:
+    """
+    Handles the chunks read from a stream of the command
+    """
+
+    def __init__(self, stream, buffer: TailBuffer, log: LogWriter,
+                 matcher: Optional[TextMatcher]):
+        self.stream = stream
+        self.buffer = buffer
+        self.log = log
+        self.matcher = matcher
+
+    def handle(self, chunk: bytes) -> bool:
+        """
+        Returns whether the expected text has been found
+        """
+        self.buffer.write(chunk)
+        self.log.write(chunk)
+        return bool(self.matcher and self.matcher.feed(chunk))
+
+
+def _select_streams(handlers: List[_StreamHandler], stop_on_match: bool):
+    """
+    Read the streams as data arrives, until they are closed,
+    or until the expected text is found if stop_on_match is True.
+    Returns whether the command must be stopped.
+    """
+    with selectors.DefaultSelector() as selector:
+        for handler in handlers:
+            selector.register(handler.stream, selectors.EVENT_READ, handler)
+
+        while selector.get_map():
+            for key, _ in selector.select():
+                chunk = os.read(key.fd, CHUNK_SIZE)
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                elif key.data.handle(chunk) and stop_on_match:
+                    logging.info("Expected output found. Stopping command")
+                    return True
+
+    return False
+
+
+def _stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(TERMINATE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        process.kill()
@@ -10,6 +10,7 @@ from urllib3.exceptions import InsecureRequestWarning
 
 import requests
 from labs.common.commands import verify_command_succeeds
+from labs.common.http import get_session, DEFAULT_TIMEOUT
 
 from labs.ui import Step
 from labs.common.containers import podman
@@ -44,7 +45,9 @@ def check_registry_step(
 
     with Step(message, fatal=fatal) as step:
         try:
-            response = requests.get(url, verify=tls_verify)
+            response = get_session(url).get(
+                url, verify=tls_verify, timeout=DEFAULT_TIMEOUT
+            )
         except requests.exceptions.ConnectionError:
             logging.exception(f"Connection error to {url}")
             step.add_error(
@@ -1,11 +1,43 @@
 """
 HTTP utilities
+
+Requests reuse pooled connections: the process keeps one
+:py:class:`requests.Session` per host (see :py:class:`SessionPool`),
+so only the first request to a host opens the TCP and TLS connection.
+Sessions do not keep cookies, so requests do not share any state.
+
+Requests time out after :data:`DEFAULT_TIMEOUT` seconds, and idempotent
+requests, such as GET requests, are retried with backoff when they cannot
+connect.
 """
+import atexit
 import logging
-from typing import Optional
+import http.cookiejar
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from labs import profiler
 from labs.ui import Step
 
+# Connect and read timeouts, in seconds
+DEFAULT_TIMEOUT = (5, 30)
+
+# Retries of idempotent requests after connection errors
+DEFAULT_RETRIES = 2
+
+# Backoff factor between retries (see urllib3.util.retry.Retry)
+DEFAULT_BACKOFF = 0.5
+
+# Max connections kept alive per host
+DEFAULT_POOL_SIZE = 10
+
+# Max requests that check_http_responses_step sends at the same time
+DEFAULT_MAX_WORKERS = 8
+
 
 def check_http_response_step(
     url: str,
@@ -59,21 +91,101 @@ def check_http_response_step(
         return step
 
 
-def make_request(url: str, method="get", verify_tls=False):
+def check_http_responses_step(
+    urls: List[str],
+    method="get",
+    response_code_is=200,
+    message: Optional[str] = None,
+    verify_tls=False,
+    grading=True,
+    fatal=True,
+    max_workers=DEFAULT_MAX_WORKERS,
+):
+    """
+    UI Step to verify the responses of several HTTP requests.
+    The requests are sent concurrently, and the step reports
+    all the URLs that fail.
+
+    :param urls: The request URLs
+    :param method: The request method. "get" by default
+    :param response_code_is: The expected response code. Default is 200
+    :param message: An optional step message
+    :param verify_tls: Whether the requests must verify the TLS certificates.
+                        Default is False
+    :param grading: Whether the step is a grading step. Default is True
+    :param fatal: Whether the step is a fatal step. Default is True
+    :param max_workers: Max number of requests sent at the same time
+    """
+    message = message or f"Verifying responses from {len(urls)} URLs"
+
+    with Step(message, grading, fatal) as step:
+        responses = make_requests(urls, method, verify_tls, max_workers)
+
+        for url, response in responses.items():
+            if isinstance(response, HttpRequestError):
+                step.add_error(str(response))
+            elif response.status_code != response_code_is:
+                step.add_error(
+                    f"{url} returned {response.status_code} status code. "
+                    f"Expected {response_code_is} "
+                )
+
+        return step
+
+
+def make_requests(
+    urls: List[str],
+    method="get",
+    verify_tls=False,
+    max_workers=DEFAULT_MAX_WORKERS,
+) -> Dict[str, Union[requests.Response, "HttpRequestError"]]:
+    """
+    Make requests to several URLs concurrently.
+
+    Returns the response of each URL, in the same order as the URLs,
+    or the HttpRequestError exception if the request failed.
+    """
+    def request(url):
+        try:
+            return make_request(url, method, verify_tls)
+        except HttpRequestError as error:
+            return error
+
+    if not urls:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as pool:
+        return dict(zip(urls, pool.map(request, urls)))
+
+
+def make_request(
+    url: str,
+    method="get",
+    verify_tls=False,
+    timeout: Union[float, Tuple[float, float], None] = DEFAULT_TIMEOUT,
+    **kwargs
+):
     """
     Make a request to a URL and return a response
 
     The returned object is an instance of `requests.Response`
     (https://requests.readthedocs.io/en/latest/api/#requests.Response)
 
+    The request reuses the pooled connections to the host
+    (see :py:func:`get_session`).
+    Additional keyword arguments are passed to
+    :py:meth:`requests.Session.request`.
+
     If an error occurs, the exception is logged and
     the HttpRequestError exception is raised
     """
     response: Optional[requests.Response] = None
     try:
-        response = requests.request(
-            method=method, url=url, verify=verify_tls
-        )
+        with profiler.span(f"{method.upper()} {url}", "http"):
+            response = get_session(url).request(
+                method=method, url=url, verify=verify_tls, timeout=timeout,
+                **kwargs
+            )
     except requests.exceptions.ConnectionError:
         _log_and_raise_error(f"Error connecting to {url}")
     except requests.exceptions.Timeout:
@@ -91,6 +203,114 @@ def make_request(url: str, method="get", verify_tls=False):
         return response
 
 
+class SessionPool:
+    """
+    HTTP sessions of the process, one per host.
+
+    Each session keeps up to pool_size connections alive to its host,
+    and retries idempotent requests that fail to connect.
+
+    :param pool_size: Max connections kept alive per host
+    :param retries: Retries of idempotent requests
+    :param backoff: Backoff factor between retries
+    """
+
+    def __init__(
+        self,
+        pool_size=DEFAULT_POOL_SIZE,
+        retries=DEFAULT_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+    ):
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._sessions: Dict[Tuple[str, str], requests.Session] = {}
+
+    def get_session(self, url: str) -> requests.Session:
+        """
+        Return the session of the host of a URL
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        with self._lock:
+            if key not in self._sessions:
+                self._sessions[key] = self._create_session()
+            return self._sessions[key]
+
+    def close(self):
+        """
+        Close the connections of all the sessions
+        """
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+    def _create_session(self) -> requests.Session:
+        # By default, Retry only retries idempotent methods.
+        # Read errors are not retried, so that a slow server does not
+        # multiply the read timeout.
+        # Responses are not retried, whatever their status code
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=False,
+            status=0,
+            backoff_factor=self.backoff,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        # Only the connections are shared. Cookies set by a response
+        # must not be sent in later, unrelated requests
+        session.cookies.set_policy(
+            http.cookiejar.DefaultCookiePolicy(allowed_domains=[])
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+
+_pool = SessionPool()
+
+
+def get_pool() -> SessionPool:
+    """
+    Return the HTTP session pool of the process
+    """
+    return _pool
+
+
+def configure_pool(
+    pool_size=DEFAULT_POOL_SIZE,
+    retries=DEFAULT_RETRIES,
+    backoff=DEFAULT_BACKOFF,
+):
+    """
+    Replace the HTTP session pool of the process.
+    The connections of the previous pool are closed.
+    """
+    global _pool
+
+    previous, _pool = _pool, SessionPool(pool_size, retries, backoff)
+    previous.close()
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    Return the pooled session of the host of a URL
+    """
+    return _pool.get_session(url)
+
+
+atexit.register(lambda: _pool.close())
+
+
 def _log_and_raise_error(error):
     logging.exception(error)
     raise HttpRequestError(error)
@@ -8,47 +8,153 @@
 """Lab grading script function library."""
 
 import os
+import sys
 import shutil
-import socket
 import subprocess
 import logging
-import pkg_resources
 
 from labs.laberrors import LabError
 from labs import labconfig
 
-SKU = labconfig.get_course_sku().upper()
 
+def get_sku():
+    """
+    Return the upper-case SKU of the active course
+    """
+    return labconfig.get_course_sku().upper()
+
+
+def __getattr__(name):
+    # The SKU module attribute is computed on access,
+    # so that importing this module does not read the config file
+    if name == "SKU":
+        return get_sku()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if sys.version_info < (3, 7):
+    # Module __getattr__ is not supported before Python 3.7
+    SKU = get_sku()
+
+
+def probe_hosts(hosts, ports=("22",), timeout=10, deadline=None):
+    """Open TCP connections to the given ports of each host, concurrently.
+
+    Connections are opened with asyncio, so the global socket timeout
+    of the process is not modified.
 
-def host_reachable(hosts_to_check, port="22"):
+    :param hosts: List of hosts to check (hostnames or IP addresses)
+    :type hosts: list
+    :param ports: List of ports to check on each host
+    :type ports: list
+    :param timeout: Seconds to wait for each connection,
+                    including the host name resolution
+    :type timeout: float
+    :param deadline: Max seconds for the whole check.
+                     Connections that are still pending are unreachable.
+    :type deadline: float
+
+    :returns: A dict that maps each (host, port) tuple to the connection
+              latency in seconds, or to None if the port is unreachable.
+    """
+    # Imported here so that lab scripts do not pay for it on import
+    import asyncio
+
+    targets = [(host, port) for host in hosts for port in ports]
+
+    async def probe(host, port):
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, int(port)), timeout
+            )
+        except Exception as e:
+            logging.debug(f"{host}:{port} is unreachable: {e!r}")
+            return None
+
+        latency = loop.time() - start
+        await _close_writer(writer)
+        return latency
+
+    async def probe_all():
+        tasks = [asyncio.ensure_future(probe(*target)) for target in targets]
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        if pending:
+            logging.debug("Host check deadline exceeded")
+            for task in pending:
+                task.cancel()
+            await asyncio.wait(pending)
+
+        return {
+            target: task.result() if task in done else None
+            for target, task in zip(targets, tasks)
+        }
+
+    if not targets:
+        return {}
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(probe_all())
+    finally:
+        loop.close()
+
+
+async def _close_writer(writer):
+    """
+    Close a stream writer, and wait until its transport is closed,
+    so that the transport does not outlive the event loop
+    """
+    writer.close()
+    # Python 3.6 does not have wait_closed
+    if hasattr(writer, "wait_closed"):
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+
+def host_reachable(
+    hosts_to_check, port="22", ports=None, timeout=10, deadline=None
+):
     """Test SSH connection with the given host.
 
+    All the hosts are checked concurrently (see :py:func:`probe_hosts`).
+
     :param hosts_to_check: List of host to check (hostnames or IP addresses)
     :type hosts_to_check: list
+    :param ports: List of ports to check. Overrides the ``port`` parameter.
+    :type ports: list
+    :param timeout: Seconds to wait for each connection
+    :type timeout: float
+    :param deadline: Max seconds for the whole check
+    :type deadline: float
 
     :returns: The list of unreachable hosts or an empty list if all the hosts
               are up.
     """
-    unreachable_hosts = []
-    for host in hosts_to_check:
-        try:
-            socket.setdefaulttimeout(10)
-            s = socket.create_connection((host, port))
-            s.shutdown(socket.SHUT_RDWR)
-            s.close()
-        except Exception:
-            unreachable_hosts.append((host, port))
+    latencies = probe_hosts(
+        hosts_to_check, ports or [port], timeout=timeout, deadline=deadline
+    )
 
-    return unreachable_hosts
+    return [
+        target for target, latency in latencies.items() if latency is None
+    ]
 
 
 def check_host_reachable(item):
     """Test SSH connection with the given host.
 
-    This function is a wrapper around :py:func:`host_reachable` and is intended
+    This function is a wrapper around :py:func:`probe_hosts` and is intended
     to be used by the lab modules through the
     :py:func:`common.labtools.run_items` function.
 
+    Besides "hosts", the item can define "ports", "timeout" and "deadline"
+    (see :py:func:`probe_hosts`). The latency of each reachable host,
+    in seconds, is stored in item["latency"]. For hosts checked on several
+    ports, this is the latency of the slowest port.
+
     :para item:
     :type item: dict
 
@@ -58,7 +164,23 @@ def check_host_reachable(item):
     if "hosts" not in item:
         item["failed"] = False
         return 0
-    failed_hosts = host_reachable(item["hosts"])
+
+    latencies = probe_hosts(
+        item["hosts"],
+        item.get("ports", ["22"]),
+        timeout=item.get("timeout", 10),
+        deadline=item.get("deadline"),
+    )
+    failed_hosts = [
+        target for target, latency in latencies.items() if latency is None
+    ]
+
+    unreachable = {host for host, _ in failed_hosts}
+    item["latency"] = {}
+    for (host, _), latency in latencies.items():
+        if host not in unreachable:
+            item["latency"][host] = max(latency, item["latency"].get(host, 0))
+
     if not failed_hosts:
         item["failed"] = False
         return 0
@@ -75,7 +197,7 @@ def get_sku_path(path=""):
     """
     Get a path relative to ${HOME}/SKU
     """
-    return os.path.join(os.path.expanduser("~"), SKU, path)
+    return os.path.join(os.path.expanduser("~"), get_sku(), path)
 
 
 def mkdir(path):
@@ -281,7 +403,7 @@ def delete_workdir(item):
     try:
         for dir in ["labs", "solutions"]:
             lab_dir = os.path.join(
-                os.path.expanduser("~"), SKU, dir, item["lab_name"]
+                os.path.expanduser("~"), get_sku(), dir, item["lab_name"]
             )
             logging.info("Delete directory: {}".format(lab_dir))
             if not rmdir(lab_dir, recursive=True):
@@ -304,7 +426,9 @@ def copy_lab_files(item):
     """
     Copy files into ~/SKU/labs/exercise and ~/SKU/solutions/exercise
     """
-    lab_full_name = "{}.{}".format(SKU.lower(), item['lab_name'])
+    import pkg_resources
+
+    lab_full_name = "{}.{}".format(get_sku().lower(), item['lab_name'])
     try:
         for lab_dir in ["labs", "solutions"]:
             src = os.path.join("materials", lab_dir,
@@ -5,16 +5,35 @@
 # No warranty, explicit or implied, provided.
 #
 
-"""Run Ansible Playbooks."""
+"""Run Ansible Playbooks.
+
+Playbooks run through a :class:`RunnerManager`, which is shared by the
+playbooks of a lab command (see :func:`get_manager`).
+"""
 
 import os
-import tempfile
-import ansible_runner
-import importlib
+import json
+import uuid
+import fcntl
+import shutil
 import logging
-import pkg_resources
+import importlib
+import threading
+import configparser
+from typing import Dict, List, Optional, Tuple
+
+import ansible_runner
 
+from labs import course
 from labs import labconfig
+from labs import profiler
+
+# Directories of the latest playbook runs that are kept
+MAX_RUNS = 10
+
+ROLES_PATH_FILENAME = "roles_path.json"
+
+PROJECTS_FILENAME = "projects.json"
 
 
 class Runner:
@@ -38,91 +57,374 @@ class Runner:
     def run(self, vars={}, inventory=None):
         """Run the Ansible Playbook.
 
+        The playbook runs in the parent directory of the playbook directory.
+        The current directory of the process does not change,
+        so playbooks can run concurrently in several threads.
+
         :param vars: A dictionary of variables to use during playbook
                      execution.
         :type vars: dict, optional
 
         :param inventory: An inventory location (file or directory) to use, if
                           the default inventory should not be used.
+                          Relative paths are relative to the parent directory
+                          of the playbook directory.
         :type inventory: str, optional
 
-        :raises OSError: Cannot change directory to the playbook directory or
-                         missing playbook.
+        :raises OSError: Missing playbook.
 
         :returns: If some task fails, the list of error messages. Otherwise,
                   when the playbook completes successfully, an empty list.
         """
         kwargs = {}
         if inventory:
-            kwargs['inventory'] = inventory
+            kwargs['inventory'] = self._resolve_path(inventory)
 
         if not os.path.isfile(self.playbook_path):
             raise FileNotFoundError(2, "No such file or directory",
                                     self.playbook_path)
 
-        save_cwd = os.getcwd()
-        os.chdir(self.playbook_parent_dir)
+        manager = get_manager()
+        r = manager.run(
+            self.playbook_dir_file,
+            self.playbook_parent_dir,
+            extravars=vars,
+            roles_path=manager.get_roles_path(),
+            **kwargs,
+        )
 
-        roles_path = self.discover_roles_path()
         ret_messages = []
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            r = ansible_runner.run(
-                project_dir=self.playbook_parent_dir,
-                playbook=self.playbook_dir_file,
-                private_data_dir=tmp_dir,
-                settings={"suppress_ansible_output": True},
-                extravars=vars,
-                roles_path=roles_path,
-                **kwargs,
-            )
-            if r.rc != 0:
-                for event in r.events:
-                    if event["event"] == "runner_on_failed":
-                        host = event["event_data"]["host"]
-                        task = event["event_data"]["task"]
-                        msg = event["event_data"]["res"]["msg"]
-                        ret_messages.append(f"{host}: {task}: {msg}")
-                        # TODO: Complete output of the ansible run.
-                        # That file should probably be copied in the log
-                        # file or directory.
-                        os.path.join(
-                            tmp_dir, "artifacts",
-                            event["runner_ident"], "stdout"
-                        )
-                    if "stdout" in event:
-                        logging.error(event["stdout"])
-                if not ret_messages:
-                    ret_messages.append("Failed to run the playbook.")
-
-        os.chdir(save_cwd)
+        if r.rc != 0:
+            for event in r.events:
+                if event["event"] == "runner_on_failed":
+                    host = event["event_data"]["host"]
+                    task = event["event_data"]["task"]
+                    msg = event["event_data"]["res"]["msg"]
+                    ret_messages.append(f"{host}: {task}: {msg}")
+                if "stdout" in event:
+                    logging.error(event["stdout"])
+            logging.error("Complete output of the playbook: %s",
+                          os.path.join(r.config.artifact_dir, "stdout"))
+            if not ret_messages:
+                ret_messages.append("Failed to run the playbook.")
+
         return ret_messages
 
     def discover_roles_path(self):
-        roles_path = []
-        sku = labconfig.get_course_sku()
-        sku_role_path = self._locate_ansible_path(sku)
-        if sku_role_path:
-            roles_path.append(sku_role_path)
-
-        _package = pkg_resources.working_set.by_key["rht-labs-" + sku.lower()]
-        for dependency in _package.requires():
-            if "rht-labs-" in dependency.name:
-                logging.debug("Processing package %s to find Ansible roles"
-                              % dependency.name)
-                mod_path =\
-                    self._locate_ansible_path(dependency.name.split('-')[-1])
-                if mod_path:
-                    roles_path.append(mod_path)
-
-        logging.debug("Ansible roles path is %s" % roles_path)
+        return get_manager().get_roles_path()
+
+    def _resolve_path(self, path):
+        """
+        Resolve a path relative to the parent directory of the playbook
+        directory. Other values, such as host lists, are not changed.
+        """
+        resolved = os.path.join(self.playbook_parent_dir, path)
+        return resolved if os.path.exists(resolved) else path
+
+
+class RunnerManager:
+    """Run Ansible Playbooks with ansible-runner, reusing their setup.
+
+    Per version of the course package, the manager keeps:
+
+    * The Ansible roles path of the course, which is expensive to compute
+      because it imports the course packages. The roles path is also saved
+      in the data directory, for later lab commands.
+    * The ``ansible.cfg`` file and the inventory of each project directory
+      of the course (see :func:`discover_project`), which are passed
+      to Ansible explicitly. They are also saved in the data directory.
+    * A data directory, under the DynoLabs cache directory.
+      Each run gets its own ansible-runner private data directory in it,
+      because ansible-runner saves the variables of the run there.
+      Only the directories of the latest :data:`MAX_RUNS` runs are
+      kept, so the artifacts of recent runs are available for
+      troubleshooting. Runs lock their directory while in progress,
+      so other lab commands do not remove it.
+
+    Playbooks run in their project directory, instead of changing the
+    current directory of the process, so several playbooks can run
+    concurrently in different threads.
+
+    :param max_runs: Number of run directories to keep.
+    :type max_runs: int
+    """
+
+    def __init__(self, max_runs=MAX_RUNS):
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        # (sku, version) -> roles path
+        self._roles_paths: Dict[Tuple[str, Optional[str]], List[str]] = {}
+        # (sku, version) -> project dir -> ansible.cfg and inventory
+        self._projects: Dict[Tuple[str, Optional[str]], Dict[str, Dict]] = {}
+        # sku -> installed version of the course package
+        self._versions: Dict[str, Optional[str]] = {}
+
+    def run(self, playbook, project_dir, **kwargs):
+        """Run a playbook.
+
+        :param playbook: Path of the playbook, relative to the project dir.
+        :param project_dir: Directory where the playbook runs.
+        :param kwargs: Additional arguments of :func:`ansible_runner.run`.
+
+        :returns: The ansible-runner Runner object.
+        """
+        project = self.get_project(project_dir)
+        if project["config"]:
+            kwargs["envvars"] = {
+                "ANSIBLE_CONFIG": project["config"],
+                **kwargs.get("envvars", {}),
+            }
+        if project["inventory"] and "inventory" not in kwargs:
+            kwargs["inventory"] = project["inventory"]
+
+        runs_dir = os.path.join(self.get_data_dir(), "runs")
+        ident = uuid.uuid4().hex
+        private_data_dir = os.path.join(runs_dir, ident)
+
+        with self._lock:
+            self._prune_runs(runs_dir)
+            os.makedirs(private_data_dir, mode=0o700)
+            # The lock is released when the directory is closed
+            run_lock = os.open(private_data_dir, os.O_RDONLY)
+            fcntl.flock(run_lock, fcntl.LOCK_EX)
+
+        try:
+            with profiler.span(playbook, "ansible"):
+                return ansible_runner.run(
+                    private_data_dir=private_data_dir,
+                    project_dir=project_dir,
+                    playbook=playbook,
+                    ident=ident,
+                    settings={"suppress_ansible_output": True},
+                    **kwargs,
+                )
+        finally:
+            os.close(run_lock)
+
+    def get_course(self) -> Tuple[str, Optional[str]]:
+        """Return the SKU and the package version of the active course.
+
+        The version is only read from the package metadata once per SKU.
+        """
+        sku = labconfig.get_course_sku().lower()
+        if sku not in self._versions:
+            self._versions[sku] = course.get_package_version(sku)
+        return sku, self._versions[sku]
+
+    def get_data_dir(self) -> str:
+        sku, version = self.get_course()
+        return os.path.join(
+            labconfig.get_cache_dir(), "ansible", f"{sku}-{version or 'dev'}"
+        )
+
+    def get_roles_path(self) -> List[str]:
+        """Return the Ansible roles path of the active course."""
+        key = self.get_course()
+        with self._lock:
+            if key not in self._roles_paths:
+                self._roles_paths[key] = self._load_roles_path(*key)
+            return self._roles_paths[key]
+
+    def get_project(self, project_dir) -> Dict:
+        """Return the ansible.cfg file and the inventory of a project dir.
+
+        :returns: A dict with the ``config`` and ``inventory`` paths.
+                  The values are None if they are not found.
+        """
+        key = self.get_course()
+        with self._lock:
+            if key not in self._projects:
+                self._projects[key] = self._load_projects(*key)
+            projects = self._projects[key]
+
+            if project_dir not in projects:
+                projects[project_dir] = discover_project(project_dir)
+                # Without a version, the saved projects cannot be invalidated
+                if key[1] is not None:
+                    _write_json(
+                        os.path.join(self.get_data_dir(), PROJECTS_FILENAME),
+                        projects
+                    )
+
+            return projects[project_dir]
+
+    def _load_projects(self, sku, version) -> Dict[str, Dict]:
+        if version is None:
+            return {}
+
+        path = os.path.join(self.get_data_dir(), PROJECTS_FILENAME)
+        return _read_projects(path)
+
+    def _load_roles_path(self, sku, version) -> List[str]:
+        # Without a version, the cached path cannot be invalidated
+        if version is None:
+            return discover_roles_path(sku)
+
+        path = os.path.join(self.get_data_dir(), ROLES_PATH_FILENAME)
+        roles_path = _read_roles_path(path)
+        if roles_path is None:
+            roles_path = discover_roles_path(sku)
+            _write_json(path, roles_path)
+
         return roles_path
 
-    def _locate_ansible_path(self, module_name):
-        path = None
+    def _prune_runs(self, runs_dir):
+        """
+        Remove the directories of the oldest runs,
+        except the ones of the runs in progress, in any lab command
+        """
         try:
-            module = importlib.import_module(module_name)
-            if "__ANSIBLE_ROLES_PATH__" in module.__dict__:
-                path = module.__dict__["__ANSIBLE_ROLES_PATH__"]
-        except ModuleNotFoundError:
-            pass
-        return path
+            with os.scandir(runs_dir) as entries:
+                runs = [
+                    (entry.stat().st_mtime, entry.path) for entry in entries
+                    if entry.is_dir()
+                ]
+        except OSError:
+            return
+
+        # Leave room for the next run
+        keep = max(self.max_runs - 1, 0)
+        for _, path in sorted(runs, reverse=True)[keep:]:
+            _remove_finished_run(path)
+
+
+def _remove_finished_run(path):
+    """
+    Remove the directory of a run, unless the run is in progress
+    """
+    try:
+        run_lock = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+
+    try:
+        fcntl.flock(run_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        # Locked by a run in progress
+        os.close(run_lock)
+        return
+
+    try:
+        shutil.rmtree(path, ignore_errors=True)
+    finally:
+        os.close(run_lock)
+
+
+_manager = RunnerManager()
+
+
+def get_manager() -> RunnerManager:
+    return _manager
+
+
+def discover_roles_path(sku) -> List[str]:
+    """
+    Return the Ansible roles paths of a course package,
+    and of the course packages that it requires
+    """
+    # pkg_resources is slow to import, so only import it when needed
+    import pkg_resources
+
+    roles_path = []
+    sku_role_path = _locate_ansible_path(sku)
+    if sku_role_path:
+        roles_path.append(sku_role_path)
+
+    _package = pkg_resources.working_set.by_key["rht-labs-" + sku.lower()]
+    for dependency in _package.requires():
+        if "rht-labs-" in dependency.name:
+            logging.debug("Processing package %s to find Ansible roles"
+                          % dependency.name)
+            mod_path = _locate_ansible_path(dependency.name.split('-')[-1])
+            if mod_path:
+                roles_path.append(mod_path)
+
+    logging.debug("Ansible roles path is %s" % roles_path)
+    return roles_path
+
+
+def discover_project(project_dir) -> Dict:
+    """
+    Return the ansible.cfg file of a project directory,
+    and the inventory that it configures
+    """
+    config = os.path.join(project_dir, "ansible.cfg")
+    if not os.path.isfile(config):
+        return {"config": None, "inventory": None}
+
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        parser.read(config)
+        sources = parser.get("defaults", "inventory", fallback="")
+    except configparser.Error:
+        logging.debug("Cannot read %s", config, exc_info=True)
+        sources = ""
+
+    # Relative inventory paths are relative to the ansible.cfg file
+    inventory = [
+        os.path.normpath(os.path.join(
+            project_dir, os.path.expanduser(source.strip())
+        ))
+        for source in sources.split(",") if source.strip()
+    ]
+    # Otherwise, leave the inventory to Ansible
+    if not all(os.path.exists(source) for source in inventory):
+        inventory = []
+
+    return {"config": config, "inventory": inventory or None}
+
+
+def _locate_ansible_path(module_name):
+    path = None
+    try:
+        module = importlib.import_module(module_name)
+        if "__ANSIBLE_ROLES_PATH__" in module.__dict__:
+            path = module.__dict__["__ANSIBLE_ROLES_PATH__"]
+    except ModuleNotFoundError:
+        pass
+    return path
+
+
+def _read_roles_path(path) -> Optional[List[str]]:
+    try:
+        with open(path) as f:
+            roles_path = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(roles_path, list) or \
+            not all(os.path.isdir(p) for p in roles_path):
+        return None
+
+    return roles_path
+
+
+def _read_projects(path) -> Dict[str, Dict]:
+    try:
+        with open(path) as f:
+            projects = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(projects, dict):
+        return {}
+
+    # Projects whose files do not exist anymore are discovered again
+    return {
+        project_dir: project for project_dir, project in projects.items()
+        if isinstance(project, dict)
+        and (project.get("config") is None
+             or os.path.isfile(project["config"]))
+        and all(os.path.exists(p) for p in project.get("inventory") or [])
+    }
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        logging.debug("Cannot save %s", path, exc_info=True)
@@ -5,9 +5,11 @@ from pathlib import Path
 import shlex
 import warnings
 import subprocess
-from typing import Dict, Iterable, Tuple, Callable, Any, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple, Callable, Any, Union
 from . import labtools
 from . import labcommand
+from .commands import ssh
 from .workspace import Workspace
 try:
     from .git import config as gitconfig
@@ -284,6 +286,13 @@ def run_command(item: Dict):
     * (optional) ``shell`` allows to set the subprocess shell option to true,
       executing the command through the shell. Then, the command, options,
       pipes, etc. can be given through the command option.
+
+    The command runs in all the hosts concurrently. SSH connections to each
+    host are reused during the lab session (see labs.common.commands.ssh).
+    The connection pool starts the master connection of each host before
+    the command runs, so the master never holds the pipes of the command.
+    The result of each host is checked, and the error messages of failed
+    hosts are added to the item messages.
     """
 
     warnings.warn(
@@ -324,37 +333,70 @@ def run_command(item: Dict):
 
     args = [command] + options
 
-    output = []
-    item["failed"] = False
-
-    for target in host_list:
+    def run_target(target):
         target_args = args
         target_shell_opt = shell_opt
         # If running in remote server use ssh
         if (target != "localhost") and (target != "workstation"):
             user = item["username"]
             target_shell_opt = False
-            if shell_opt:
-                target_args = ["ssh", f"{user}@{target}", "-i", sshkey] + args
-            else:
-                quoted_args = list(map(shlex.quote, args))
-                target_args = (
-                    ["ssh", f"{user}@{target}", "-i", sshkey] +
-                    quoted_args
-                )
-
-        output = labcommand.run_log(target_args,
-                                    stdout=subprocess.PIPE,
-                                    stderr=subprocess.PIPE,
-                                    shell=target_shell_opt)
-
-        if "returns" in item:
-            labcommand.check_retcode(item, output)
-        if "prints" in item:
-            labcommand.check_prints(item, output)
-
-        if item["failed"] is True:
-            labcommand.log_errormsg(item["msgs"])
+            if not shell_opt:
+                target_args = list(map(shlex.quote, args))
+            # Blocks until the master connection of the host is started,
+            # and connects through it (ControlMaster=no)
+            target_args = (
+                ssh.ssh_command(f"{user}@{target}", sshkey) + target_args
+            )
+
+        return labcommand.run_log(target_args,
+                                  stdout=subprocess.PIPE,
+                                  stderr=subprocess.PIPE,
+                                  shell=target_shell_opt)
+
+    # Run the command in all the hosts at the same time
+    with ThreadPoolExecutor(max_workers=max(len(host_list), 1)) as executor:
+        outputs = list(executor.map(run_target, host_list))
+
+    # Check the result of each host
+    item["failed"] = False
+    failed_msgs = []
+    for target, output in zip(host_list, outputs):
+        target_msgs = _check_command_output(item, output)
+        if target_msgs:
+            item["failed"] = True
+            if len(host_list) > 1:
+                target_msgs = [
+                    {"text": f"{target}: {msg['text']}"}
+                    for msg in target_msgs
+                ]
+            failed_msgs += target_msgs
+
+    if item["failed"] is True:
+        if "msgs" not in item:
+            msgs = []
+            labcommand.student_message(item.get("student_msg"), msgs)
+            item["msgs"] = msgs
+        item["msgs"] = item["msgs"] + failed_msgs
+        labcommand.log_errormsg(item["msgs"])
+
+
+def _check_command_output(item: Dict, output) -> List[Dict]:
+    """
+    Check the output of a command run by run_command.
+    Returns the error messages, or an empty list if the checks pass.
+    """
+    target_item = {
+        "returns": item.get("returns"),
+        "prints": item.get("prints"),
+        "student_msg": item.get("student_msg", ""),
+        "msgs": [],
+    }
+    if "returns" in item:
+        labcommand.check_retcode(target_item, output)
+    if "prints" in item:
+        labcommand.check_prints(target_item, output)
+
+    return target_item["msgs"]
 
 
 @labs.core.task.task
@@ -8,15 +8,22 @@
 """Display progress and status of the lab module executions."""
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, List, Optional, Union, Dict
 
 from halo import Halo
 from click import echo, secho, style
 
 from labs import labconfig
+from labs import profiler
 from labs.core.step import LabStep, ensure_labsteps
 from labs.core.task.runner import run_task
-from labs.watch import watch
+from labs.core.task.scheduler import (
+    StepScheduler,
+    check_dependencies,
+    is_parallel,
+)
+from labs.watch import watch, DEFAULT_STEP_TIMEOUT
 from labs.watch.watchstep import LabWatchStep
 from labs.laberrors import LabError
 
@@ -33,6 +40,11 @@ class Console:
     :param spinner_delay: Seconds to wait for the execution of each task.
                           1 second by default
     :type  spinner_delay: int
+    :param max_workers: Max number of steps that run concurrently.
+                        Only steps that declare a "parallel_group" or
+                        "depends_on" run concurrently.
+                        By default, the ThreadPoolExecutor default.
+    :type max_workers: int
     """
 
     def __init__(
@@ -42,11 +54,13 @@ class Console:
         bullet=" - ",
         status_length=7,
         spinner_delay=None,
+        max_workers=None,
     ):
         """Initialize the object."""
         self.bullet = bullet
         self.status_length = status_length
         self.spinner_delay = spinner_delay
+        self.max_workers = max_workers
         self.items = ensure_labsteps(items)
         self.watch_items = watch_items or []
 
@@ -72,13 +86,43 @@ class Console:
         "grading": Boolean flag to indicate if the executed item is for grading
                 purposes. If defined and True, then a 'PASS' string is echoed
                 in blue. In other cases, a 'SUCCESS' string is echoed in green.
+        "parallel_group": Name of a group of independent items. Consecutive
+                items of the same group run concurrently in a thread pool.
+        "depends_on": List of labels of previous items. The item runs as
+                soon as those items finish, concurrently with other items.
+
+        Results are always printed in the order of the list. When a fatal
+        item fails, the items declared after it are not started.
 
         :param action: The lab action that the function is peforming.
                        This action is printed to stdout
         :type action: str
         """
         secho("\n%s lab.\n" % action, bold=True)
-        for item in self.items:
+        check_dependencies(self.items)
+
+        with profiler.span(f"{action} lab", "lab"):
+            self._run_items(action)
+        echo("")
+
+        return self
+
+    def _run_items(self, action: str):
+        index = 0
+        while index < len(self.items):
+            item = self.items[index]
+
+            if self._is_parallel(item):
+                end = index
+                while end < len(self.items) and \
+                        self._is_parallel(self.items[end]):
+                    end += 1
+                self._run_parallel_items(self.items[index:end], action)
+                index = end
+                continue
+
+            index += 1
+
             if not item.condition():
                 logging.debug(f"{item} was skipped due to false condition")
                 continue
@@ -87,40 +131,64 @@ class Console:
                 echo_header(item)
                 continue
 
-            with Halo(
-                text=item.label,
-                spinner=get_spinner(),
-                interval=self.spinner_delay or -1,
-                enabled=not labconfig.is_dev_mode(),
-            ) as spinner:
+            with self._spinner(item) as spinner:
 
                 if item.has_task():
                     ret_code = run_task(item)
                 else:
                     ret_code = 0
 
-                # TODO: fix ret_code condition
-                # What is a failure?
-                #
-                #   integer, greater-than-zero ret_codes?
-                #
-                # Right now the condition fails if the ret_code is truthy,
-                # which means non-empty lists/strings, True... or any
-                # other expression that evaluates to True is considered a FAIL
-                failed = item.failed or ret_code
-
-                self.echo_item_result(item, failed, spinner)
-
-                self.echo_secondary_messages(item)
-
-                if failed and item.fatal:
-                    self.echo_fatal(action)
-                    msg = f"The '{item.label}' fatal step has failed"
-                    logging.error(msg)
-                    raise LabError(msg)
-        echo("")
+                self._finish_item(item, ret_code, spinner, action)
 
-        return self
+    def _run_parallel_items(self, items: List[LabStep], action: str):
+        """
+        Run steps concurrently, but show their results in declared order
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            scheduler = StepScheduler(items, executor)
+
+            for index, item in enumerate(items):
+                with self._spinner(item) as spinner:
+                    skipped, ret_code = scheduler.wait_for(index)
+
+                    if skipped:
+                        spinner.stop()
+                        continue
+
+                    self._finish_item(item, ret_code, spinner, action)
+
+    def _finish_item(self, item: LabStep, ret_code, spinner, action: str):
+        # TODO: fix ret_code condition
+        # What is a failure?
+        #
+        #   integer, greater-than-zero ret_codes?
+        #
+        # Right now the condition fails if the ret_code is truthy,
+        # which means non-empty lists/strings, True... or any
+        # other expression that evaluates to True is considered a FAIL
+        failed = item.failed or ret_code
+
+        self.echo_item_result(item, failed, spinner)
+
+        self.echo_secondary_messages(item)
+
+        if failed and item.fatal:
+            self.echo_fatal(action)
+            msg = f"The '{item.label}' fatal step has failed"
+            logging.error(msg)
+            raise LabError(msg)
+
+    def _spinner(self, item: LabStep):
+        return Halo(
+            text=item.label,
+            spinner=get_spinner(),
+            interval=self.spinner_delay or -1,
+            enabled=not labconfig.is_dev_mode(),
+        )
+
+    @staticmethod
+    def _is_parallel(item: LabStep):
+        return not item.is_header() and is_parallel(item)
 
     def report_grade(self):
         status = style("PASS", fg='green')
@@ -136,7 +204,8 @@ class Console:
         self,
         action="Tracking lab progress...",
         sleep_seconds=1,
-        finish: Callable = None
+        finish: Callable = None,
+        step_timeout: float = DEFAULT_STEP_TIMEOUT,
     ):
         """
         Watches lab progress by continously
@@ -154,12 +223,18 @@ class Console:
         :param on_finish: lab finish function to invoke
                           after all the checkpoints pass
         :type on_finish: Callable
+
+        :param step_timeout: Seconds that a watch step can run before it is
+                             reported as failing.
+                             The watch steps of a round run concurrently
+        :type step_timeout: float
         """
         watch(
             self.watch_items,
             action,
             sleep_seconds,
-            finish
+            finish,
+            step_timeout=step_timeout,
         )
 
     def echo_header(self, item):
@@ -0,0 +1,288 @@
+"""
+Fast shell completion of lab script names.
+
+Shells run the ``lab`` command on every <TAB> keypress, so completion must
+answer quickly. This module answers the completion requests of lab script
+arguments, such as ``lab start <TAB>``, from cache files. It does not import
+click, the lab commands, or the course package. Other completion requests
+fall back to the click shell completion.
+
+Two cache files are stored in the DynoLabs cache directory
+(see :func:`labs.labconfig.get_cache_dir`):
+
+* ``completion.json`` contains the lab scripts of the active course.
+  The cache is valid while the config file and the files of the course
+  package do not change.
+* ``bash-scripts.json`` contains the traditional (bash) lab scripts of the
+  classroom. When the cache is older than :data:`BASH_SCRIPTS_TTL` seconds,
+  completion answers from the old cache and refreshes it in the background.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+from typing import List, Optional, Tuple
+
+from labs import labconfig
+
+COMPLETE_VAR = "_LAB_COMPLETE"
+
+# Commands that accept a lab script as their only argument
+SCRIPT_COMMANDS = {"start", "finish", "grade", "fix", "logs"}
+
+# Seconds before the list of bash lab scripts must be refreshed
+BASH_SCRIPTS_TTL = 3600
+
+# Seconds before a background refresh of the bash lab scripts is retried
+REFRESH_LOCK_TTL = 60
+
+# The presence of this file indicates that bash lab scripts are installed
+BASH_COMPLETION_PATH = "/usr/share/bash-completion/completions/lab"
+RHT_PATH = "/etc/rht"
+
+# Output format of each completion item, per shell (see click.shell_completion)
+_FORMATS = {
+    "bash": "plain,{}",
+    "zsh": "plain\n{}\n_",
+    "fish": "plain,{}",
+}
+
+
+def main() -> bool:
+    """
+    Answer a shell completion request for lab script names.
+
+    Returns False if the request is not a lab script completion,
+    or if it cannot be answered without the click commands.
+    """
+    shell, _, instruction = os.environ.get(COMPLETE_VAR, "").partition("_")
+    if instruction != "complete" or shell not in _FORMATS:
+        return False
+
+    request = _get_completion_args(shell)
+    if request is None:
+        return False
+
+    args, incomplete = request
+    if len(args) != 1 or args[0] not in SCRIPT_COMMANDS:
+        return False
+
+    try:
+        scripts = get_lab_scripts() + get_bash_scripts()
+    except Exception:
+        logging.debug("Fast completion failed", exc_info=True)
+        return False
+
+    for script in sorted(set(scripts)):
+        if matches(script, incomplete):
+            print(_FORMATS[shell].format(script))
+
+    return True
+
+
+def matches(script: str, incomplete: Optional[str]) -> bool:
+    """
+    Whether a script name completes the incomplete word.
+    Both the fast path and the click commands use this predicate.
+    """
+    return not incomplete or incomplete in script
+
+
+def _get_completion_args(shell: str) -> Optional[Tuple[List[str], str]]:
+    """
+    Return the arguments and the incomplete word being completed,
+    or None if the command line needs a full shell-like parsing.
+    """
+    words = os.environ.get("COMP_WORDS", "")
+    if any(char in words for char in "'\"\\"):
+        return None
+
+    words = words.split()
+    if shell == "fish":
+        args = words[1:]
+        incomplete = os.environ.get("COMP_CWORD", "")
+        if incomplete and args and args[-1] == incomplete:
+            args.pop()
+        return args, incomplete
+
+    try:
+        cword = int(os.environ["COMP_CWORD"])
+    except (KeyError, ValueError):
+        return None
+
+    incomplete = words[cword] if cword < len(words) else ""
+    return words[1:cword], incomplete
+
+
+def get_lab_scripts() -> List[str]:
+    """
+    Return the lab scripts of the active course.
+    The scripts are read from cache, if it is up to date.
+    """
+    cache = _read_json(_get_cache_path("completion.json"))
+
+    if (
+        cache
+        and cache.get("config") == _stat(labconfig._get_config_path(None))
+        and cache.get("package")
+        and all(_stat(entry[0]) == entry for entry in cache["package"])
+    ):
+        return cache["scripts"]
+
+    return _update_lab_scripts()
+
+
+def _update_lab_scripts() -> List[str]:
+    """
+    Load the lab scripts of the active course and save them to cache
+    """
+    from labs import labload
+
+    config_stat = _stat(labconfig._get_config_path(None))
+    try:
+        sku = labconfig.get_course_sku()
+    except labconfig.ConfigError:
+        return []
+
+    scripts = sorted(labload.loadcache())
+    locations = labload.get_package_locations(sku)
+    if locations:
+        _write_json(_get_cache_path("completion.json"), {
+            "config": config_stat,
+            "package": labload.get_package_stats(locations),
+            "scripts": scripts,
+        })
+
+    return scripts
+
+
+def get_bash_scripts(background=True) -> List[str]:
+    """
+    Return the traditional (bash) lab scripts of the classroom.
+
+    If the cached list is outdated and ``background`` is True, then the
+    outdated list is returned and a background process refreshes it.
+    Otherwise, the list is refreshed before returning.
+    """
+    if not os.path.exists(BASH_COMPLETION_PATH):
+        return []
+
+    cache = _read_json(_get_cache_path("bash-scripts.json"))
+    is_same_course = bool(cache) and cache.get("rht") == _stat(RHT_PATH)
+    if (
+        is_same_course
+        and time.time() - cache.get("fetched_at", 0) < BASH_SCRIPTS_TTL
+    ):
+        return cache["scripts"]
+
+    if not background:
+        return refresh_bash_scripts()
+
+    _refresh_bash_scripts_in_background()
+    return cache["scripts"] if is_same_course else []
+
+
+def refresh_bash_scripts() -> List[str]:
+    """
+    Fetch the traditional (bash) lab scripts of the classroom
+    and save them to cache
+    """
+    from labs import labload
+
+    path = _get_cache_path("bash-scripts.json")
+    try:
+        scripts = labload.fetch_bash_scripts()
+    except Exception:
+        # Keep the previous list, and do not retry before the TTL expires
+        logging.exception("Cannot fetch the list of bash lab scripts")
+        cache = _read_json(path) or {}
+        scripts = cache.get("scripts", [])
+
+    _write_json(path, {
+        "rht": _stat(RHT_PATH),
+        "fetched_at": time.time(),
+        "scripts": scripts,
+    })
+
+    return scripts
+
+
+def _refresh_bash_scripts_in_background():
+    lock_path = _get_cache_path("bash-scripts.lock")
+    try:
+        if time.time() - os.stat(lock_path).st_mtime < REFRESH_LOCK_TTL:
+            # Another process is refreshing the list
+            return
+    except OSError:
+        pass
+
+    try:
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        with open(lock_path, "w"):
+            pass
+    except OSError:
+        return
+
+    import subprocess
+
+    subprocess.Popen(
+        [sys.executable, "-m", "labs.completion", "--refresh-bash-scripts"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        close_fds=True,
+    )
+
+
+def _get_cache_path(filename: str) -> str:
+    return os.path.join(labconfig.get_cache_dir(), filename)
+
+
+def _stat(path: str):
+    """
+    Return the path, modification time and size of a file,
+    or None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [path, stat.st_mtime_ns, stat.st_size]
+
+
+def _read_json(path: str):
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _write_json(path: str, data: dict):
+    """
+    Atomically write a cache file.
+    Failing to write the cache is not an error.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        logging.debug("Cannot write the cache file %s" % path, exc_info=True)
+
+
+if __name__ == "__main__":
+    if "--refresh-bash-scripts" in sys.argv[1:]:
+        try:
+            refresh_bash_scripts()
+        finally:
+            try:
+                os.remove(_get_cache_path("bash-scripts.lock"))
+            except OSError:
+                pass
@@ -22,6 +22,12 @@ class LabStep(MutableMapping):
     Also optionally indicate whether the step is fatal, a grading step,
     or only a header.
 
+    Steps run one after the other, unless they declare a parallel group
+    or dependencies (see labs.core.task.scheduler).
+    Steps of the same parallel group run concurrently.
+    A step with dependencies runs after the steps whose labels are listed
+    in depends_on.
+
     You can add any other additional property to a lab step
     by passing it as a keyword parameter (**additional_props).
 
@@ -40,6 +46,8 @@ class LabStep(MutableMapping):
     failed: bool
     header: Union[str, None]
     msgs: List[LabStepMessage]
+    parallel_group: Union[str, None]
+    depends_on: List[str]
 
     def __init__(
         self,
@@ -51,6 +59,8 @@ class LabStep(MutableMapping):
         failed=False,
         header: Union[str, None] = None,
         msgs: List[LabStepMessage] = None,
+        parallel_group: Union[str, None] = None,
+        depends_on: List[str] = None,
         **additional_props
     ):
         if not (header or label):
@@ -66,6 +76,8 @@ class LabStep(MutableMapping):
         self.failed = failed
         self.header = header
         self.msgs = msgs or []
+        self.parallel_group = parallel_group
+        self.depends_on = depends_on or []
 
         # Add all the other "additional_props" as object attributes.
         # The way to do this is by adding them to
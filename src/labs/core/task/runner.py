@@ -1,5 +1,6 @@
 import logging
 
+from labs import profiler
 from labs.core.step import LabStep
 
 
@@ -12,7 +13,8 @@ def run_task(step: LabStep):
     logging.info(f"[Task running] Item: {step}")
 
     try:
-        ret_code = step.task(step)
+        with profiler.span(str(step.label), "task"):
+            ret_code = step.task(step)
     except Exception as e:
         logging.exception("Unexpected error")
         step.fail()
@@ -0,0 +1,155 @@
+"""
+Concurrent execution of independent lab steps.
+
+By default, lab steps run one after the other.
+A step that declares a ``parallel_group`` or ``depends_on`` can run
+concurrently with other steps:
+
+* A step in a parallel group waits for the previous steps
+  that are not in the same group.
+* A step with dependencies waits for the steps whose labels are listed
+  in ``depends_on``.
+* Steps that declare neither run alone, after all the previous steps,
+  and before all the following steps.
+"""
+import logging
+from concurrent.futures import Executor, Future, FIRST_COMPLETED, wait
+from typing import Any, Dict, List, Set, Tuple
+
+from labs.core.step import LabStep
+from labs.core.task.runner import run_task
+from labs.laberrors import LabError
+
+
+def is_parallel(step: LabStep) -> bool:
+    """
+    Whether a step can run concurrently with other steps
+    """
+    return bool(step.parallel_group or step.depends_on)
+
+
+def check_dependencies(steps: List[LabStep]):
+    """
+    Verify that steps only depend on the labels of previous steps
+    """
+    labels = set()
+    for step in steps:
+        for dependency in step.depends_on:
+            if dependency not in labels:
+                raise LabError(
+                    f"The '{step.label}' step depends on '{dependency}', "
+                    "which is not a previous step"
+                )
+        labels.add(step.label)
+
+
+def get_prerequisites(steps: List[LabStep]) -> List[Set[int]]:
+    """
+    Return the indexes of the steps that each step must wait for.
+    The steps must be parallel steps (see is_parallel).
+    Dependencies on steps that are not in the list are ignored.
+    """
+    prerequisites = []
+    last_index = {}
+
+    for index, step in enumerate(steps):
+        required = {
+            last_index[label] for label in step.depends_on
+            if label in last_index
+        }
+        if step.parallel_group:
+            required.update(
+                i for i, previous in enumerate(steps[:index])
+                if previous.parallel_group != step.parallel_group
+            )
+        prerequisites.append(required)
+        last_index[step.label] = index
+
+    return prerequisites
+
+
+class StepScheduler:
+    """
+    Runs the tasks of parallel lab steps in an executor,
+    as soon as their prerequisites have finished.
+
+    Steps are started lazily, while the caller waits for their results
+    in declared order (see wait_for).
+    After a fatal step fails, steps declared after it are not started.
+
+    :param steps: Parallel lab steps
+    :param executor: Executor that runs the step tasks
+    """
+
+    def __init__(self, steps: List[LabStep], executor: Executor):
+        self.steps = steps
+        self.prerequisites = get_prerequisites(steps)
+        self._executor = executor
+        self._running: Dict[Future, int] = {}
+        # Index -> task return code, or None if the step was skipped
+        self._results: Dict[int, Any] = {}
+        self._started: Set[int] = set()
+        # Steps at or after this index are not started
+        self._limit = len(steps)
+
+    def wait_for(self, index: int) -> Tuple[bool, Any]:
+        """
+        Wait until a step finishes.
+        Returns whether the step was skipped, and the task return code.
+        """
+        while index not in self._results:
+            self._schedule()
+            if index in self._results:
+                break
+
+            if not self._running:
+                raise LabError(
+                    f"The '{self.steps[index].label}' step cannot be started"
+                )
+
+            finished, _ = wait(self._running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                self._collect(future)
+
+        ret_code = self._results[index]
+        return index not in self._started, ret_code
+
+    def _schedule(self):
+        """
+        Start the steps whose prerequisites have finished
+        """
+        changed = True
+        while changed:
+            changed = False
+            for index in range(self._limit):
+                if index in self._started or index in self._results:
+                    continue
+                if not self.prerequisites[index] <= self._results.keys():
+                    continue
+
+                step = self.steps[index]
+                if step.condition():
+                    future = self._executor.submit(self._run, step)
+                    self._running[future] = index
+                    self._started.add(index)
+                else:
+                    logging.debug(f"{step} was skipped due to false condition")
+                    self._results[index] = None
+                    changed = True
+
+    def _collect(self, future: Future):
+        index = self._running.pop(future)
+        step = self.steps[index]
+        ret_code = future.result()
+        self._results[index] = ret_code
+
+        if (step.failed or ret_code) and step.fatal:
+            logging.debug(
+                f"Not starting steps after the '{step.label}' fatal step"
+            )
+            self._limit = min(self._limit, index + 1)
+
+    def _run(self, step: LabStep):
+        if step.has_task():
+            return run_task(step)
+        return 0
@@ -1,4 +1,8 @@
-import pkg_resources
+try:
+    from importlib import metadata
+except ImportError:
+    # Python < 3.8
+    import importlib_metadata as metadata
 
 
 def get_package_name(sku: str):
@@ -16,11 +20,6 @@ def get_package_version(sku: str):
     package_name = get_package_name(sku)
 
     try:
-        dependencies = pkg_resources.require(package_name)
-    except pkg_resources.ResolutionError:
+        return metadata.version(package_name)
+    except metadata.PackageNotFoundError:
         return None
-
-    if not dependencies:
-        return None
-
-    return dependencies[0].version
@@ -1,4 +1,3 @@
-import pkg_resources
 import os
 import logging
 from labs.common import userinterface
@@ -84,6 +83,9 @@ class Default:
         """
         Find the playbook in a standard location.
         """
+        # pkg_resources is slow to import, so only import it when needed
+        import pkg_resources
+
         if fixed:
             class_module = self.__module__.split(".")[1]
             playbook = "ansible/" + class_module + "/" + playbook
@@ -12,8 +12,10 @@ from typing import Optional
 import click
 import labs.version as ver
 
-from labs.ui.step import StepFatalError
-from labs import labconfig, labload, lablog, system, course, telemetry
+# Subcommands import the modules they use, so that commands such as
+# "lab --version" or "lab logs" do not pay for the import of the
+# course package, ansible, requests, psutil and the telemetry
+from labs import labconfig
 from labs.environment import get_pypi_url
 from labs.laberrors import LabError
 
@@ -23,6 +25,8 @@ def setup_for_command_execution():
     Loads the config before command execution.
     Ensures that telemetry is setup.
     """
+    from labs import telemetry
+
     try:
         config = labconfig.loadcfg()
         telemetry.consent.ensure(config)
@@ -53,6 +57,8 @@ def print_versions_and_exit():
     """
     Print the versions of the installed core and course libraries
     """
+    from labs import course
+
     click.echo(f"Lab framework version: {ver.__version__}")
 
     try:
@@ -93,6 +99,8 @@ def _execute_pip_install(sku, version, env, upgrade=False):
     Returns:
         str: The name of the installed/upgraded package
     """
+    from labs import course
+
     index_url = get_pypi_url(env)
     lock_version = labconfig.get_version_lock()
     if version is None and lock_version is None:
@@ -134,6 +142,8 @@ def select(sku, force):
 
     SKU is the course code, such as gl006
     """
+    from labs import labload
+
     if force or labload.is_course_installed(sku):
         labconfig.setsku(sku)
     else:
@@ -157,6 +167,7 @@ def install(sku, version, uninstall, env):
 
     SKU is the course code, such as gl006
     """
+    from labs import course
 
     # Uninstall library with pip
     if uninstall:
@@ -199,6 +210,19 @@ def upgrade(sku, version, env):
         print("Could not install course library %s as requested." % package)
 
 
+profile_option = click.option(
+    "--profile", is_flag=True,
+    help="Print the time spent in each step of the lab script, "
+    "and save the timings as a Chrome trace."
+)
+
+
+def _complete_lab_scripts(ctx, args, incomplete):
+    from labs import labload
+
+    return labload.get_all_lab_scripts(ctx, args, incomplete)
+
+
 @click.group(name='lab', invoke_without_command=True)
 @click.pass_context
 @click.option('--version', '-v', is_flag=True,
@@ -217,8 +241,9 @@ def main(ctx: click.Context, version):
 @click.command()
 @click.pass_context
 @click.argument('script', type=click.STRING,
-                autocompletion=labload.get_all_lab_scripts)
-def start(ctx, script):
+                autocompletion=_complete_lab_scripts)
+@profile_option
+def start(ctx, script, profile):
     """
     Start the lab session.
 
@@ -227,20 +252,14 @@ def start(ctx, script):
     """
 
     _invoke_existing_bash(script, ctx, "start")
-
-    try:
-        config = setup_for_command_execution()
-        with telemetry.session(config, "start", sys.argv):
-            grading = labload.import_grading_library(config, script)
-            grading.start()
-    except (LabError, StepFatalError) as le:
-        log_error_and_exit(le)
+    _run_lab_script(script, "start", profile)
 
 
 @click.command()
 @click.argument('script', type=click.STRING,
-                autocompletion=labload.get_all_lab_scripts)
-def finish(script):
+                autocompletion=_complete_lab_scripts)
+@profile_option
+def finish(script, profile):
     """
     Finish the lab session.
 
@@ -249,20 +268,14 @@ def finish(script):
     """
 
     _invoke_existing_bash(script, None, "finish")
-
-    try:
-        config = setup_for_command_execution()
-        with telemetry.session(config, "finish", sys.argv):
-            grading = labload.import_grading_library(config, script)
-            grading.finish()
-    except (LabError, StepFatalError) as le:
-        log_error_and_exit(le)
+    _run_lab_script(script, "finish", profile)
 
 
 @click.command()
 @click.argument('script', type=click.STRING,
-                autocompletion=labload.get_all_lab_scripts)
-def grade(script):
+                autocompletion=_complete_lab_scripts)
+@profile_option
+def grade(script, profile):
     """
     Grade the lab.
 
@@ -271,20 +284,14 @@ def grade(script):
     """
 
     _invoke_existing_bash(script, None, "grade")
-
-    try:
-        config = setup_for_command_execution()
-        with telemetry.session(config, "grade", sys.argv):
-            grading = labload.import_grading_library(config, script)
-            grading.grade()
-    except (LabError, StepFatalError) as le:
-        log_error_and_exit(le)
+    _run_lab_script(script, "grade", profile)
 
 
 @click.command()
 @click.argument("script", type=click.STRING,
-                autocompletion=labload.get_all_lab_scripts)
-def fix(script):
+                autocompletion=_complete_lab_scripts)
+@profile_option
+def fix(script, profile):
     """
     Fix/solve the lab.
 
@@ -293,17 +300,57 @@ def fix(script):
     """
 
     _invoke_existing_bash(script, None, "fix")
+    _run_lab_script(script, "fix", profile)
+
+
+def _run_lab_script(script, verb, profile=False):
+    """
+    Run the start/finish/grade/fix action of a lab script
+    """
+    from labs import labload, profiler, telemetry
+    from labs.ui.step import StepFatalError
+
+    if profile:
+        profiler.enable()
 
     try:
         config = setup_for_command_execution()
-        with telemetry.session(config, "fix", sys.argv):
-            grading = labload.import_grading_library(config, script)
-            grading.fix()
+        with telemetry.session(config, verb, sys.argv):
+            with profiler.span(f"lab {verb} {script}", "lab"):
+                grading = labload.import_grading_library(config, script)
+                getattr(grading, verb)()
     except (LabError, StepFatalError) as le:
         log_error_and_exit(le)
+    finally:
+        if profile:
+            _report_profile(script, verb)
+
+
+def _report_profile(script, verb):
+    """
+    Print the summary of the profiled spans, and save the Chrome trace
+    """
+    import time
+    from labs import profiler
+
+    spans = profiler.get_spans()
+    path = os.path.join(
+        labconfig.get_cache_dir(), "profiles",
+        f"{script}-{verb}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+
+    click.echo("", err=True)
+    click.echo(profiler.format_table(spans), err=True)
+    try:
+        profiler.write_chrome_trace(path, spans)
+        click.echo(f"\nChrome trace saved to {path}", err=True)
+    except OSError as error:
+        click.echo(f"\nCannot save the Chrome trace: {error}", err=True)
 
 
 def _invoke_existing_bash(script, ctx, verb):
+    from labs import labload
+
     has_existing_bash = (script not in labload.get_classes(ctx, None, None)
                          and script in labload.get_bash_scripts())
     if has_existing_bash:
@@ -339,11 +386,29 @@ def completion(shell):
 
 
 @click.command(name='system-info')
-def system_info():
+@click.option(
+    "--fields",
+    help="Comma-separated fields to include in the report: "
+    "cpu, memory, platform, python. All the fields by default."
+)
+def system_info(fields):
     """
     Generate a system report of the current environment.
     """
-    system.report.generate("json")
+    from labs.system import info, report
+
+    if fields is None:
+        selected = info.FIELDS
+    else:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in selected if f not in info.FIELDS]
+        if unknown or not selected:
+            raise click.BadParameter(
+                f"Valid fields are: {', '.join(info.FIELDS)}",
+                param_hint="--fields"
+            )
+
+    report.generate("json", selected)
 
 
 @click.command(
@@ -359,23 +424,52 @@ def system_info():
     "script",
     required=False,
     type=click.STRING,
-    autocompletion=labload.get_all_lab_scripts,
+    autocompletion=_complete_lab_scripts,
 )
 @click.option(
     "--lines", "-n",
     default=10,
     help="By default, display the 10 most recent lines"
 )
-def logs(script: Optional[str], lines: int):
+@click.option(
+    "--follow", "-f",
+    is_flag=True,
+    help="Keep printing new log lines as they are written"
+)
+@click.option(
+    "--since",
+    help="Only display the logs written since a time, "
+    "e.g. '2021-06-01 10:30', or a relative time, e.g. '10m', '2h'"
+)
+@click.option(
+    "--script", "script_filter",
+    help="Only display the logs of a lab script. "
+    "Useful if all the scripts log to a single file"
+)
+def logs(
+    script: Optional[str],
+    lines: int,
+    follow: bool,
+    since: Optional[str],
+    script_filter: Optional[str],
+):
     """
     Print the logs of lab script
     """
+    from labs import lablog
+
+    log_filter = _get_log_filter(script_filter, since)
+
     config = labconfig.loadcfg()
     logging_config = config["rhtlab"]["logging"]
+    log_path = lablog.get_logging_path(logging_config, script)
 
     output = []
     try:
-        output = lablog.read_log_lines(logging_config, script)
+        end = os.path.getsize(log_path)
+        output = lablog.read_log_lines(
+            logging_config, script, lines, log_filter, end
+        )
     except FileNotFoundError as error:
         if script:
             click.secho(
@@ -413,12 +507,50 @@ def logs(script: Optional[str], lines: int):
                 fg="yellow"
             )
             for filename in os.listdir(error.filename):
-                click.secho(f"\tlab logs {filename}", fg="yellow")
+                if _is_log_file(filename):
+                    click.secho(f"\tlab logs {filename}", fg="yellow")
 
         sys.exit(1)
 
-    tail = output[-lines:]
-    click.echo("".join(tail))
+    click.echo("".join(output))
+
+    if follow:
+        _follow_log(log_path, end, log_filter)
+
+
+def _is_log_file(filename: str) -> bool:
+    """
+    Whether a file of the log directory is the log file of a lab script,
+    and not a rotated log file or a lock file
+    """
+    from labs import logreader
+
+    return not filename.startswith(".") and not logreader.is_segment(filename)
+
+
+def _get_log_filter(script: Optional[str], since: Optional[str]):
+    from labs import logreader
+
+    try:
+        return logreader.LogFilter(
+            script,
+            logreader.parse_since(since) if since else None,
+        )
+    except ValueError as error:
+        raise click.BadParameter(str(error), param_hint="'--since'")
+
+
+def _follow_log(log_path, offset: int, log_filter):
+    """
+    Print the new lines of the log file, until the user presses Ctrl+C
+    """
+    from labs import logreader
+
+    try:
+        for line in logreader.follow_lines(log_path, offset, log_filter):
+            click.echo(line, nl=False)
+    except KeyboardInterrupt:
+        pass
 
 
 main.add_command(finish)
@@ -4,8 +4,8 @@
 # (C)opyright 2020 : Red Hat, Inc. - see LICENSE
 #
 
-import yaml
 import os
+import copy
 import tempfile
 
 
@@ -40,27 +40,75 @@ def _get_config_path(filename):
     return os.path.expanduser(filename)
 
 
-def loadcfg(filename=None):
+def get_cache_dir():
+    """
+    Return the directory where DynoLabs stores its caches.
+    The RHT_LABS_CACHE_DIR env variable overrides the default location.
     """
-    Load configuration data from a YAML file
+    return os.path.expanduser(
+        os.environ.get("RHT_LABS_CACHE_DIR", "~/.grading/cache")
+    )
+
+
+# Parsed config files, per path: path -> (mtime_ns, size, config)
+_config_cache = {}
+
+
+def loadcfg(filename=None):
     """
+    Load configuration data from a YAML file.
 
+    The parsed file is cached for the whole process, and parsed again
+    only if its modification time or size changes.
+    Callers get a copy, so they can modify it and pass it to savecfg.
+    """
     filename = _get_config_path(filename)
-    if os.path.exists(filename):
-        # Open the config file and parse Yaml
-        try:
-            with open(filename) as f:
-                cfgdata = yaml.load(f, Loader=yaml.FullLoader)
-                if cfgdata and list(cfgdata)[0] == 'rhtlab':
-                    return cfgdata
-                else:
-                    raise ConfigError(
-                        "Invalid configuration file %s, invalid format"
-                        % filename)
-        except yaml.YAMLError as err:
-            raise ConfigError("Invalid configuration file %s" % filename, err)
-    else:
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        raise ConfigError("Configuration file %s not found" % filename)
+
+    cached = _config_cache.get(filename)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return copy.deepcopy(cached[2])
+
+    cfgdata = _parsecfg(filename)
+    _config_cache[filename] = (stat.st_mtime_ns, stat.st_size, cfgdata)
+    return copy.deepcopy(cfgdata)
+
+
+def _parsecfg(filename):
+    # Imported here so that shell completion does not pay for it
+    import yaml
+
+    # The libyaml loader is much faster, but it might not be available
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+    # Open the config file and parse Yaml
+    try:
+        with open(filename) as f:
+            cfgdata = yaml.load(f, Loader=loader)
+    except OSError:
         raise ConfigError("Configuration file %s not found" % filename)
+    except yaml.YAMLError as err:
+        raise ConfigError("Invalid configuration file %s" % filename, err)
+
+    if isinstance(cfgdata, dict) and cfgdata \
+            and list(cfgdata)[0] == 'rhtlab':
+        return cfgdata
+
+    raise ConfigError(
+        "Invalid configuration file %s, invalid format" % filename)
+
+
+def invalidate_cache(filename=None):
+    """
+    Forget the parsed config file, or all of them if no filename is given
+    """
+    if filename is None:
+        _config_cache.clear()
+    else:
+        _config_cache.pop(_get_config_path(filename), None)
 
 
 def savecfg(cfgdata, filename=None):
@@ -69,10 +117,13 @@ def savecfg(cfgdata, filename=None):
     'cfgdata' should be passed in as a Python dictionary
     'filename' should be pre-validated through the passing function
     """
+    import yaml
+
     filename = _get_config_path(filename)
     dir = os.path.split(filename)[0]
     if not os.path.exists(dir):
         os.mkdir(dir)
+    invalidate_cache(filename)
     with open(filename, "w") as cfgfile:
         yaml.dump(cfgdata, cfgfile)
         cfgfile.close()
@@ -6,28 +6,112 @@
 import logging
 import traceback
 import os
+import json
+import hashlib
 import pathlib
 import pkgutil
 import inspect
+import tempfile
 import importlib
+import importlib.util
 
-import requests
-
-from labs.grading import Default
 from labs.laberrors import LabError
-from labs.lablog import lablog_init
-from labs import labconfig
+from labs.course import get_package_version
+from labs import labconfig, labscan, completion
+
+# Seconds to wait for the listing of traditional lab scripts
+BASH_SCRIPTS_TIMEOUT = 5
 
 
 def loadcache():
+    """
+    Return the lab scripts of the active course, as a dict
+    that maps each script name to its module and class.
+
+    The result is stored in an on-disk index (see :func:`get_index_path`),
+    so the course package is only scanned when it changes.
+    """
     course = labconfig.get_course_sku()
+    locations = get_package_locations(course)
+    if not locations:
+        print("Could not find modules for course %s" % course)
+        logging.critical("Course package %s not found" % course)
+        return {}
+
+    fingerprint = _get_course_fingerprint(course, locations)
+    index_path = get_index_path(course)
+    cache = _read_index(index_path, fingerprint)
+    if cache is not None:
+        return cache
+
+    cache = _discover_course_scripts(course, locations)
+    if cache is None:
+        return {}
+
+    _write_index(index_path, fingerprint, cache)
+    return cache
+
+
+def get_index_path(course):
+    """
+    Return the path of the lab script index of a course
+    """
+    return os.path.join(labconfig.get_cache_dir(), f"scripts-{course}.json")
+
+
+def get_discovery_mode():
+    """
+    Return how lab scripts are discovered:
+
+    * ``static`` (default): parse the course sources, and only import
+      the modules that cannot be resolved statically.
+    * ``import``: import every module of the course package.
+
+    The RHT_LABS_DISCOVERY env variable sets the discovery mode.
+    """
+    mode = os.environ.get("RHT_LABS_DISCOVERY", "static").lower()
+    return mode if mode in ("static", "import") else "static"
+
+
+def _discover_course_scripts(course, locations):
+    """
+    Collect the lab scripts of the course package.
+    Returns None if the course or one of its modules cannot be found.
+    """
+    if get_discovery_mode() == "import":
+        return _import_course_scripts(course, locations)
+
+    result = labscan.scan(course, locations)
+    if result.dynamic:
+        logging.debug("Importing modules that cannot be scanned statically: "
+                      "%s" % result.dynamic)
+
     cache = {}
+    for m in result.modules:
+        if m in result.dynamic:
+            scripts = _import_course_scripts(course, locations, [m])
+        else:
+            scripts = result.scripts[m]
+
+        if scripts is None:
+            return None
+        cache.update(scripts)
+
+    return cache
+
+
+def _import_course_scripts(course, locations, modules=None):
+    """
+    Import modules of the course package and collect the lab scripts.
+    If no modules are specified, then all the modules are imported.
+    Returns None if the course or one of its modules cannot be found.
+    """
+    from labs.grading import Default
+
+    cache = {}
+    if modules is None:
+        modules = [name for _, name, _ in pkgutil.iter_modules(locations)]
     try:
-        module = importlib.import_module(course)
-        modules = [name for _, name, _
-                   in pkgutil.iter_modules([os.path.dirname(module.__file__)])]
-        if len(modules) == 0:
-            return cache
         for m in modules:
             s = importlib.import_module(course + '.' + m)
             c = [obj for _, obj in inspect.getmembers(s, inspect.isclass)]
@@ -50,23 +134,124 @@ def loadcache():
             print("Could not find modules for course %s" % course)
 
         logging.critical(traceback.format_exc())
-        return {}
+        return None
     return cache
 
 
+def get_package_locations(course):
+    """
+    Return the directories of the course package, without importing it.
+    Returns an empty list if the course package is not installed.
+    """
+    try:
+        spec = importlib.util.find_spec(course)
+    except (ImportError, ValueError):
+        return []
+
+    if spec is None or not spec.submodule_search_locations:
+        return []
+
+    return list(spec.submodule_search_locations)
+
+
+def get_package_stats(locations):
+    """
+    Return the path, modification time and size of the course package
+    directories, including subpackages, and of the Python files they contain
+    """
+    stats = []
+    for location in locations:
+        for root, dirs, files in os.walk(location):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+            stats.append(_stat_entry(root))
+            for name in sorted(files):
+                if name.endswith(".py"):
+                    stats.append(_stat_entry(os.path.join(root, name)))
+    return stats
+
+
+def _get_course_fingerprint(course, locations):
+    """
+    Compute a digest of the installed course package.
+    The digest changes when the package version changes,
+    when directories are added or removed in the package tree,
+    or when Python files are added, removed or modified in the package tree.
+    """
+    stats = [get_package_version(course), get_discovery_mode()]
+    stats += get_package_stats(locations)
+
+    digest = hashlib.sha256(json.dumps(stats).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _stat_entry(path):
+    stat = os.stat(path)
+    return [path, stat.st_mtime_ns, stat.st_size]
+
+
+def _read_index(index_path, fingerprint):
+    """
+    Read the lab script index.
+    Returns None if the index does not exist, is corrupt or is outdated.
+    """
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(index, dict) or index.get("fingerprint") != fingerprint:
+        return None
+
+    return index.get("scripts")
+
+
+def _write_index(index_path, fingerprint, cache):
+    """
+    Atomically write the lab script index.
+    Failing to write the index is not an error, only a missed optimization.
+    """
+    index = {"fingerprint": fingerprint, "scripts": cache}
+    try:
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w",
+            dir=os.path.dirname(index_path),
+            prefix=".scripts-",
+            delete=False
+        ) as f:
+            json.dump(index, f)
+        os.replace(f.name, index_path)
+    except OSError:
+        logging.debug("Cannot write the lab script index %s" % index_path,
+                      exc_info=True)
+
+
 def get_all_lab_scripts(ctx, args, incomplete):
-    return sorted(get_classes(ctx, args, incomplete) + get_bash_scripts())
+    return sorted(get_classes(ctx, args, incomplete)
+                  + [script for script in completion.get_bash_scripts()
+                     if completion.matches(script, incomplete)])
 
 
 def get_classes(ctx, args, incomplete):
     cache = loadcache()
     classes = [script
                for script in cache.keys()
-               if not incomplete or incomplete in script]
+               if completion.matches(script, incomplete)]
     return classes
 
 
 def get_bash_scripts():
+    """
+    Return the traditional lab scripts installed in the environment.
+    The list is cached for completion.BASH_SCRIPTS_TTL seconds.
+    """
+    return completion.get_bash_scripts(background=False)
+
+
+def fetch_bash_scripts():
+    import requests
+
     # This emulates /usr/share/bash-completion/completions/lab.
     #
     # First, we check if that path is present. The lab completion existence is
@@ -101,7 +286,10 @@ def get_bash_scripts():
         "/grading-scripts/"
     )
 
-    html_listing = requests.get(grading_scripts_url).text
+    html_listing = requests.get(
+        grading_scripts_url,
+        timeout=BASH_SCRIPTS_TIMEOUT
+    ).text
     html_lines = html_listing.split("\n")
     file_lines = [line for line in html_lines if '[TXT]' in line]
     file_texts = [line.split('"')[7] for line in file_lines]
@@ -120,21 +308,26 @@ def is_course_installed(sku):
 
 def import_grading_library(config, name):
     """
-    Imports the grading library. Takes a single parameter
+    Imports the grading library. Takes a single parameter.
+    Only the course module that defines the script is imported.
     :param name:
     :return:
     """
+    from labs.lablog import lablog_init
+
     cache = loadcache()
     course = labconfig.get_course_sku()
     if name not in cache.keys():
         raise LabError("Script %s not in course library %s" % (name, course))
     cache_entry = cache[name]
+    lablog_init(config, cache_entry["module"])
     try:
-        lablog_init(config, cache_entry["module"])
         module = importlib.import_module(course + "." + cache_entry["module"])
         class_ = getattr(module, cache_entry["class"])
-        return class_()
-    except ModuleNotFoundError:
+    except (ModuleNotFoundError, AttributeError):
         raise LabError("Script %s in course library %s or one of its "
                        "components was not found."
                        % (name, course))
+
+    # Errors of the lab script itself are not hidden
+    return class_()
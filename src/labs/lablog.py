@@ -22,28 +22,65 @@ default Python framework within their code. For example::
 
 DynoLabs developers can create a sub non-root logger if they want to.
 
-The module provides two functions:
+The module provides the following functions:
 
 * :func:`lablog_init` which is used to initialize the framework. This function
   should be called once, at the beginning of the program.
 * :func:`run_capture` which calls :func:`subprocess.run` but duplicates the
   stdout and stderr stream in the log file. Developers may use this function
   instead of :func:`subprocess.run` when they want that stream captured.
+* :func:`flush` which waits until the log file contains all the messages.
+  A background thread writes the log file, so messages might take up to
+  :data:`FLUSH_INTERVAL` seconds to reach the file.
 
 .. seealso:: `Logging HOWTO <https://docs.python.org/3/howto/logging.html>`_
 """
 
 import os
 import sys
+import time
+import queue
+import shutil
+import atexit
+import codecs
+import locale
 import logging
+import logging.handlers
 import pathlib
+import threading
 import tempfile
 import datetime
+import selectors
 import subprocess
 from typing import Dict, Optional
 
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows. Log files are written without locks
+    fcntl = None
+
+# Bytes read from the output of commands at once (see run_capture)
+CHUNK_SIZE = 64 * 1024
+# Max seconds between flushes of the log file
+FLUSH_INTERVAL = 0.5
+# Buffered characters that trigger a flush of the log file
+FLUSH_SIZE = 64 * 1024
+# Max seconds to wait for the log writer to flush the log file
+FLUSH_TIMEOUT = 5
+# Rotated log files that are kept, if not configured
+DEFAULT_BACKUP_COUNT = 5
+# Units of the max_bytes logging parameter
+_SIZE_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
 # File stream of the log file
 _log_file = None
+# Queue of the records and output to write to the log file
+_log_queue = None
+# Background thread that writes to the log file
+_log_listener = None
+# Stream that duplicates stdout and stderr to the log file
+_log_stream = None
 # Are stdout and stderr captured in the log file?
 _log_capture = False
 # Backup stdout and stderr
@@ -55,6 +92,8 @@ class _DupToLog:
     """
     Duplicate an output stream to a file.
 
+    Writes to the log stream are buffered (see :class:`_QueueStream`).
+
     :param log_stream: :term:`File object <file object>` where the output must
                        be duplicated.
     :type log_stream: File object
@@ -80,9 +119,15 @@ class _DupToLog:
         :rtype: int
         """
         self.log_stream.write(data)
-        self.log_stream.flush()
         return self.f.write(data)
 
+    def flush(self):
+        """
+        Flush both the output stream and the file.
+        """
+        self.log_stream.flush()
+        self.f.flush()
+
     def __getattr__(self, name):
         """
         Call unknown methods from the file object (flush, close, ...).
@@ -90,6 +135,300 @@ class _DupToLog:
         return getattr(self.f, name)
 
 
+class _BufferedFile:
+    """
+    Buffers the writes to a file.
+
+    The buffer is written to the file when it contains :data:`FLUSH_SIZE`
+    characters, or when :meth:`flush` is called and the last write to the
+    file is older than :data:`FLUSH_INTERVAL` seconds.
+    Only the log writer thread uses this object.
+    """
+
+    def __init__(self, file_obj):
+        self.file = file_obj
+        self._parts = []
+        self._size = 0
+        self._last_sync = time.monotonic()
+
+    def write(self, data):
+        self._parts.append(data)
+        self._size += len(data)
+        if self._size >= FLUSH_SIZE:
+            self.sync()
+
+    def flush(self):
+        if time.monotonic() - self._last_sync >= FLUSH_INTERVAL:
+            self.sync()
+
+    def sync(self):
+        """
+        Write the buffer to the file
+        """
+        if self._parts:
+            self.file.write("".join(self._parts))
+            self._parts = []
+            self._size = 0
+        self.file.flush()
+        self._last_sync = time.monotonic()
+
+
+class _RotatingFile:
+    """
+    Log file that is rotated when it grows over ``max_bytes``,
+    or when it was last written on a previous day (if ``daily`` is True).
+
+    On rotation, the ``path`` file is renamed to ``path.1``, ``path.1`` is
+    renamed to ``path.2``, and so on, up to ``backup_count`` files.
+    If ``compress`` is True, then rotated files are compressed with gzip
+    (``path.1.gz``).
+
+    Several lab processes can append to the same log file. Writes and
+    rotations hold an exclusive lock on a hidden ``.<name>.lock`` file in
+    the same directory, and each process reopens the log file before writing
+    if another process has rotated it. The lock file stays open, and it is
+    only reopened after the log file is reopened.
+    Without :mod:`fcntl` (on Windows), files are not locked.
+    """
+
+    def __init__(self, path, max_bytes: Optional[int], backup_count: int,
+                 compress=False, daily=False):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self.daily = daily
+        directory, filename = os.path.split(self.path)
+        self._lock_path = os.path.join(directory, f".{filename}.lock")
+        self._lock_file = None
+        self.file = open(self.path, "a")
+
+    @property
+    def name(self):
+        return self.path
+
+    def write(self, data):
+        if fcntl is None:
+            self._write(data)
+            return
+
+        lock = self._open_lock()
+        if lock is None:
+            # The log directory has been removed.
+            # Keep writing to the open file
+            self.file.write(data)
+            self.file.flush()
+            return
+
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            reopened = self._write(data)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+        if reopened:
+            # The log directory might have been recreated,
+            # with a new lock file
+            self._close_lock()
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self._close_lock()
+        self.file.close()
+
+    def _write(self, data) -> bool:
+        """
+        Write to the log file, rotating it if needed.
+        Returns whether the log file was reopened.
+        """
+        reopened = self._reopen_if_rotated()
+        if self._must_rotate(len(data)):
+            self._rotate()
+        self.file.write(data)
+        self.file.flush()
+        return reopened
+
+    def _open_lock(self):
+        if self._lock_file is None:
+            try:
+                self._lock_file = open(self._lock_path, "a")
+            except OSError:
+                return None
+        return self._lock_file
+
+    def _close_lock(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _reopen_if_rotated(self) -> bool:
+        try:
+            inode = os.stat(self.path).st_ino
+            rotated = inode != os.fstat(self.file.fileno()).st_ino
+        except FileNotFoundError:
+            rotated = True
+
+        if rotated:
+            try:
+                file = open(self.path, "a")
+            except OSError:
+                # The log directory has been removed.
+                # Keep writing to the open file
+                return False
+            self.file.close()
+            self.file = file
+
+        return rotated
+
+    def _must_rotate(self, size: int) -> bool:
+        stat = os.fstat(self.file.fileno())
+        if not stat.st_size or not stat.st_nlink:
+            # Empty files are not rotated, and removed files cannot be
+            return False
+        if self.max_bytes and stat.st_size + size > self.max_bytes:
+            return True
+        return self.daily and (
+            datetime.date.fromtimestamp(stat.st_mtime)
+            != datetime.date.today()
+        )
+
+    def _rotate(self):
+        self.file.close()
+        suffix = ".gz" if self.compress else ""
+
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}{suffix}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}{suffix}")
+
+        if self.backup_count < 1:
+            os.remove(self.path)
+        elif self.compress:
+            _compress_file(self.path, f"{self.path}.1.gz")
+            os.remove(self.path)
+        else:
+            os.replace(self.path, f"{self.path}.1")
+
+        self.file = open(self.path, "a")
+
+
+def _compress_file(source: str, destination: str):
+    """
+    Atomically write a gzip copy of a file
+    """
+    import gzip
+
+    tmp_path = f"{destination}.tmp"
+    with open(source, "rb") as f, gzip.open(tmp_path, "wb") as compressed:
+        shutil.copyfileobj(f, compressed)
+    os.replace(tmp_path, destination)
+
+
+class _LogFileHandler(logging.StreamHandler):
+    """
+    Writes log records and duplicated output to a :class:`_BufferedFile`.
+
+    Besides regular records, it handles records with a ``raw_text``
+    attribute, which is written as is, and records with a ``flush_event``
+    attribute, which flush the file and set the event.
+    """
+
+    def emit(self, record):
+        raw_text = getattr(record, "raw_text", None)
+        if raw_text is not None:
+            self.stream.write(raw_text)
+            return
+
+        flush_event = getattr(record, "flush_event", None)
+        if flush_event is not None:
+            self.stream.sync()
+            flush_event.set()
+            return
+
+        super().emit(record)
+
+    def sync(self):
+        self.stream.sync()
+
+
+class _LogListener(logging.handlers.QueueListener):
+    """
+    Log writer thread.
+    Syncs the log file when no records arrive during FLUSH_INTERVAL.
+    """
+
+    running = False
+
+    def start(self):
+        super().start()
+        self.running = True
+
+    def stop(self):
+        self.running = False
+        super().stop()
+
+    def dequeue(self, block):
+        while block:
+            try:
+                return self.queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                for handler in self.handlers:
+                    handler.sync()
+        return self.queue.get(False)
+
+
+class _QueueStream:
+    """
+    File-like object that sends the text written to it to the log writer
+    """
+
+    def __init__(self, log_queue):
+        self.queue = log_queue
+
+    def write(self, data):
+        if data:
+            self.queue.put_nowait(logging.makeLogRecord({"raw_text": data}))
+        return len(data)
+
+    def flush(self):
+        # The log writer flushes the file periodically
+        pass
+
+
+def flush():
+    """
+    Wait until the log writer writes all the pending records
+    and output to the log file.
+    """
+    if _log_listener is None or not _log_listener.running:
+        return
+
+    flushed = threading.Event()
+    _log_queue.put_nowait(logging.makeLogRecord({"flush_event": flushed}))
+    if not flushed.wait(FLUSH_TIMEOUT):
+        sys.__stderr__.write("Timeout flushing the log file\n")
+
+
+def _stop_log_writer():
+    """
+    Write the pending records, and stop the log writer thread
+    """
+    global _log_listener, _log_queue, _log_stream
+
+    if _log_listener is not None:
+        # The listener handles all the queued records before stopping
+        if _log_listener.running:
+            _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.sync()
+        _log_listener = None
+
+    _log_queue = None
+    _log_stream = None
+
+
 def lablog_init(config, lab_name):
     """
     Initialize the Python logging framework.
@@ -127,6 +466,18 @@ def lablog_init(config, lab_name):
     * ``capture_output`` specifies whether stdout and stderr should be
       captured in the log file. If not set, the parameter defaults to ``False``
       unless ``level`` is ``debug``.
+    * ``max_bytes`` enables the rotation of the log file when it grows over
+      the given size. The value is a number of bytes, optionally followed by
+      the ``K``, ``M``, or ``G`` unit, such as ``10M``.
+    * ``rotate`` set to ``daily`` enables the rotation of the log file when it
+      was last written on a previous day.
+    * ``backup_count`` is the number of rotated log files to keep
+      (``path.1``, ``path.2``, ...). Defaults to
+      :data:`DEFAULT_BACKUP_COUNT`.
+    * ``compress`` set to ``gzip`` compresses the rotated log files
+      (``path.1.gz``, ``path.2.gz``, ...).
+
+      The ``lab logs`` command reads the rotated log files, too.
 
     If the configuration file has no ``logging`` section, then logging is
     completely disabled (no messages are logged).
@@ -137,10 +488,18 @@ def lablog_init(config, lab_name):
                      with the :command:`lab` command.
     :type lab_name: str
 
+    Records and captured output are written to the log file by a background
+    thread (see :class:`logging.handlers.QueueListener`). The thread buffers
+    the writes, and flushes the log file every :data:`FLUSH_INTERVAL`
+    seconds, or when :data:`FLUSH_SIZE` characters are pending.
+    Use :func:`flush` to wait for the pending writes.
+    The pending writes are flushed when the program exits.
+
     :raises OSError: When the log file or its parent directory
                      cannot be accessed or created.
+    :raises ValueError: When the rotation parameters are not valid.
     """
-    global _log_file, _log_capture
+    global _log_file, _log_capture, _log_queue, _log_listener, _log_stream
     _config = config['rhtlab']
     if "logging" not in _config:
         logging.disable()
@@ -149,6 +508,7 @@ def lablog_init(config, lab_name):
     # If the lablog_init function has already been called, then close the
     # log file.
     if _log_file is not None:
+        _stop_log_writer()
         _log_file.close()
         # The 'force' parameter of logging.basicConfig() removes the handlers.
         # However, that option is only available since Python 3.8. Therefore,
@@ -165,6 +525,7 @@ def lablog_init(config, lab_name):
 
     log_level = logging.INFO
     log_path = None
+    rotation = None
 
     # Retrieve parameters from the configuration object
     if isinstance(_config["logging"], dict):
@@ -175,32 +536,44 @@ def lablog_init(config, lab_name):
             )
         if "path" in _config["logging"]:
             log_path = configure_logging_path(_config["logging"], lab_name)
+            rotation = configure_rotation(_config["logging"])
         configure_logging_output(_config["logging"], log_level)
 
-    # Open the log file in append mode. If the "path" parameter is not given
-    # in the configuration, then, as a fallback, create a temporary file for
-    # logging.
-    if log_path:
-        _log_file = open(log_path, "a")
-    else:
-        _log_file = tempfile.NamedTemporaryFile(
-            mode="w", encoding="utf-8", prefix=lab_name, delete=False
-        )
+    _log_file = _open_log_file(log_path, rotation, lab_name)
+    file_handler = _LogFileHandler(_BufferedFile(_log_file))
+    file_handler.setFormatter(logging.Formatter(
+        f"%(asctime)s:{lab_name}:%(levelname)s:%(filename)s(%(lineno)d)\
+                %(message)s"
+    ))
+    _log_queue = queue.Queue()
+    _log_listener = _LogListener(_log_queue, file_handler)
+    _log_listener.start()
+    _log_stream = _QueueStream(_log_queue)
 
     if _log_capture:
-        sys.stdout = sys.stderr = _DupToLog(_log_file, _save_stdout)
-
-    logging.basicConfig(
-        stream=_log_file,
-        # encoding="utf-8", # Not before 3.9
-        # force=True,       # Not before 3.8
-        level=log_level,
-        format=f"%(asctime)s:{lab_name}:%(levelname)s:%(filename)s(%(lineno)d)\
-                %(message)s"
-    )
+        sys.stdout = sys.stderr = _DupToLog(_log_stream, _save_stdout)
+
+    root = logging.getLogger("")
+    root.addHandler(logging.handlers.QueueHandler(_log_queue))
+    root.setLevel(log_level)
     logging.info("#" * 20 + f" {lab_name} " + "#" * 20)
 
 
+def _open_log_file(log_path, rotation: Optional[Dict], lab_name):
+    """
+    Open the log file in append mode. If the "path" parameter is not given
+    in the configuration, then, as a fallback, create a temporary file for
+    logging.
+    """
+    if log_path and rotation:
+        return _RotatingFile(log_path, **rotation)
+    if log_path:
+        return open(log_path, "a")
+    return tempfile.NamedTemporaryFile(
+        mode="w", encoding="utf-8", prefix=lab_name, delete=False
+    )
+
+
 def configure_log_level(config_logging, log_level):
     """
     Retrieve  the log level from the configuration object
@@ -221,6 +594,55 @@ def configure_log_level(config_logging, log_level):
     return log_level
 
 
+def configure_rotation(config_logging: Dict) -> Optional[Dict]:
+    """
+    Retrieve the rotation parameters of the log file
+    from the configuration object.
+    Returns None if rotation is not enabled.
+    """
+    max_bytes = config_logging.get("max_bytes")
+    rotate = config_logging.get("rotate")
+    compress = config_logging.get("compress")
+
+    if max_bytes is None and rotate is None:
+        return None
+
+    if max_bytes is not None:
+        max_bytes = parse_size(max_bytes)
+    if rotate not in (None, "daily"):
+        raise ValueError(f"Invalid log rotation '{rotate}'. Use 'daily'")
+    if compress not in (None, False, "gzip"):
+        raise ValueError(f"Invalid log compression '{compress}'. Use 'gzip'")
+
+    return {
+        "max_bytes": max_bytes,
+        "backup_count": int(
+            config_logging.get("backup_count", DEFAULT_BACKUP_COUNT)
+        ),
+        "compress": compress == "gzip",
+        "daily": rotate == "daily",
+    }
+
+
+def parse_size(value) -> int:
+    """
+    Parse a size in bytes, such as 1048576, "512K", or "10M"
+    """
+    text = str(value).strip().upper().rstrip("B")
+    multiplier = _SIZE_UNITS.get(text[-1:], 1)
+    if text[-1:] in _SIZE_UNITS:
+        text = text[:-1]
+
+    try:
+        size = int(text) * multiplier
+    except ValueError:
+        raise ValueError(f"Invalid log size '{value}'. Use a size like '10M'")
+
+    if size <= 0:
+        raise ValueError(f"Invalid log size '{value}'. It must be positive")
+    return size
+
+
 def configure_logging_path(config_logging: Dict, lab_name: str):
     """
     Retrieve the path to the log file from the configuration object
@@ -253,16 +675,26 @@ def get_logging_path(config_logging: Dict, lab_name: Optional[str]):
     return log_path
 
 
-def read_log_lines(logging_config: Dict, lab_name: Optional[str]):
+def read_log_lines(
+    logging_config: Dict,
+    lab_name: Optional[str],
+    lines: Optional[int] = None,
+    log_filter=None,
+    end: Optional[int] = None,
+):
     """
     Read a log file line by line.
     If lab_name is passed,
-    then the function reads the logs of a specific lab
+    then the function reads the logs of a specific lab.
+
+    If lines is passed, then only the last lines are read,
+    reading the file backwards from the end.
+    Rotated log files are read too (see :func:`labs.logreader.tail_log`).
     """
-    log_file_path = get_logging_path(logging_config, lab_name)
+    from labs import logreader
 
-    with open(log_file_path) as f:
-        return f.readlines()
+    log_file_path = get_logging_path(logging_config, lab_name)
+    return logreader.tail_log(log_file_path, lines, log_filter, end)
 
 
 def configure_logging_output(config_logging, log_level):
@@ -293,6 +725,12 @@ def run_capture(*args, **kwargs):
     It accepts the same parameters, returns the same values, and raises the
     same exceptions.
 
+    When the output is captured, the stdout and stderr of the command are
+    read in chunks of :data:`CHUNK_SIZE` bytes, as soon as they are
+    available. Each chunk is decoded and written to the terminal and to the
+    log file writer (see :func:`lablog_init`). The returned object does not
+    include the output.
+
     .. seealso: `Subprocess management
     <https://docs.python.org/3/library/subprocess.html>`_
 
@@ -308,17 +746,103 @@ def run_capture(*args, **kwargs):
         or kwargs.get("capture_output") is True
     ):
         return subprocess.run(*args, **kwargs)
+
+    check = kwargs.pop("check", False)
+    timeout = kwargs.pop("timeout", None)
+    encoding = (
+        kwargs.pop("encoding", None) or locale.getpreferredencoding(False)
+    )
+    errors = kwargs.pop("errors", None) or "replace"
+    # The output is decoded here, so the pipe must be binary
+    kwargs.pop("text", None)
+    kwargs.pop("universal_newlines", None)
+
     kwargs["stdout"] = subprocess.PIPE
     kwargs["stderr"] = subprocess.STDOUT
-    kwargs["universal_newlines"] = True
+
+    tee = _OutputTee(encoding, errors)
+    deadline = None if timeout is None else time.monotonic() + timeout
+
     with subprocess.Popen(*args, **kwargs) as process:
-        while process.poll() is None:
-            print(process.stdout.read(1), end="", flush=True)
-        else:
-            print(process.stdout.read(), end="", flush=True)
-            retcode = process.returncode
+        try:
+            _copy_output(process, tee, deadline)
+            retcode = process.wait(timeout=_remaining(deadline))
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            raise subprocess.TimeoutExpired(process.args, timeout)
+        finally:
+            tee.close()
+
+    if check and retcode:
+        raise subprocess.CalledProcessError(retcode, process.args)
+
     return subprocess.CompletedProcess(process.args, retcode)
 
 
+class _OutputTee:
+    """
+    Decode the output of a command,
+    and write it to the terminal and to the log file
+    """
+
+    def __init__(self, encoding, errors):
+        if isinstance(sys.stdout, _DupToLog):
+            self.terminal = sys.stdout.f
+            self.log_stream = sys.stdout.log_stream
+        else:
+            self.terminal = sys.stdout
+            self.log_stream = _log_stream
+
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors)
+
+    def write(self, chunk: bytes, final=False):
+        text = self._decoder.decode(chunk, final)
+        if not text:
+            return
+
+        self.terminal.write(text)
+        self.terminal.flush()
+
+        # The log writer thread buffers and flushes the log file
+        if self.log_stream is not None:
+            self.log_stream.write(text)
+
+    def close(self):
+        self.write(b"", final=True)
+
+
+def _copy_output(process, tee, deadline):
+    """
+    Copy the output of a process to the tee, as soon as it is available,
+    until the process closes its output.
+    Raises TimeoutExpired when the deadline is reached.
+    """
+    fd = process.stdout.fileno()
+    with selectors.DefaultSelector() as selector:
+        selector.register(fd, selectors.EVENT_READ)
+        while True:
+            remaining = _remaining(deadline)
+            if remaining == 0:
+                raise subprocess.TimeoutExpired(process.args, None)
+
+            if not selector.select(remaining):
+                continue
+
+            chunk = os.read(fd, CHUNK_SIZE)
+            if not chunk:
+                return
+            tee.write(chunk)
+
+
+def _remaining(deadline):
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0)
+
+
+atexit.register(_stop_log_writer)
+
+
 if __name__ == "__main__":
     pass
@@ -0,0 +1,386 @@
+"""
+Static discovery of lab scripts.
+
+This module finds the lab scripts of a course package by parsing the sources
+of the package with the :mod:`ast` module. Course modules are never executed,
+so discovering the scripts does not pay the cost of importing the course
+and its dependencies (ansible_runner, ocp, requests...).
+
+A class is a lab script if it derives from one of the :data:`LAB_BASES`
+classes, either directly or through other classes defined in the package.
+Classes that derive from other libraries' classes named like a lab base,
+such as ``OpenShift``, cannot be classified statically.
+The script name is the ``__LAB__`` string literal of the class, or the class
+name if the class does not define ``__LAB__``.
+
+Some modules cannot be resolved statically, for example when a lab class
+derives from the result of a function call, or when ``__LAB__`` is not a
+string literal. These modules are reported as dynamic, so that the caller
+can import them to inspect their classes.
+"""
+
+import os
+import ast
+import pkgutil
+import builtins
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Framework classes that lab scripts derive from
+LAB_BASES = {
+    "labs.grading.Default",
+    "labs.grading.AutoPlay",
+    "labs.activities.GuidedExercise",
+    "labs.activities.Lab",
+}
+
+# Names of the classes that lab scripts derive from in other libraries.
+# Modules that use them are imported to check their classes
+LIBRARY_LAB_BASES = {"Default", "GuidedExercise", "Lab", "AutoPlay",
+                     "OpenShift"}
+
+# Framework classes that are never lab scripts by themselves
+EXCLUDED_CLASSES = {"Default", "AutoPlay"}
+
+# Compound statements that might define classes conditionally
+_COMPOUND_STATEMENTS = (ast.If, ast.Try, ast.With, ast.For, ast.While)
+
+# Value returned when the script name of a class is not a string literal
+_DYNAMIC = object()
+
+
+class ScanResult(NamedTuple):
+    """
+    The result of scanning a course package
+    """
+    # Script name -> {"class": ..., "module": ...}, per module
+    scripts: Dict[str, Dict[str, Dict[str, str]]]
+    # Names of the modules that must be imported to find their lab scripts
+    dynamic: List[str]
+    # Names of all the modules of the package, in discovery order
+    modules: List[str]
+
+
+class _ModuleInfo(NamedTuple):
+    # Class name -> (base expressions, script name)
+    classes: Dict[str, Tuple[List[Optional[str]], object]]
+    # Local name -> imported dotted name (absolute, or relative to package)
+    imports: Dict[str, str]
+    # Whether the module defines or imports names that cannot be resolved
+    dynamic: bool
+
+
+class CourseScanner:
+    """
+    Scans the sources of a course package.
+
+    :param package: Name of the course package, such as ``do378``
+    :param locations: Directories of the package
+    """
+
+    def __init__(self, package: str, locations: List[str]):
+        self.package = package
+        self.locations = locations
+        self._modules: Dict[str, Optional[_ModuleInfo]] = {}
+
+    def scan(self) -> ScanResult:
+        """
+        Find the lab scripts of the top-level modules of the package
+        """
+        scripts = {}
+        dynamic = []
+        modules = [name for _, name, _ in pkgutil.iter_modules(self.locations)]
+
+        for module in modules:
+            module_scripts = self._scan_module(module)
+            if module_scripts is None:
+                dynamic.append(module)
+            else:
+                scripts[module] = module_scripts
+
+        return ScanResult(scripts, dynamic, modules)
+
+    def _scan_module(self, module: str):
+        info = self._get_module(module)
+        if info is None or info.dynamic:
+            return None
+
+        scripts = {}
+        for classname, (_, script) in info.classes.items():
+            if classname in EXCLUDED_CLASSES:
+                continue
+
+            is_lab = self._is_lab_class(module, classname, frozenset())
+            if is_lab is None or (is_lab and script is _DYNAMIC):
+                return None
+            if is_lab:
+                scripts[script or classname] = {
+                    "class": classname,
+                    "module": module
+                }
+
+        return scripts
+
+    def _is_lab_class(
+        self, module: str, classname: str, visiting: frozenset
+    ):
+        """
+        Whether a class of the package is a lab class.
+        Returns None if it cannot be determined statically.
+
+        visiting holds the classes of the current inheritance path,
+        so that bases shared by several paths are not taken for cycles.
+        """
+        if (module, classname) in visiting:
+            return None
+        visiting = visiting | {(module, classname)}
+
+        info = self._get_module(module)
+        if info is None:
+            return None
+
+        bases, _ = info.classes[classname]
+        undetermined = False
+        for base in bases:
+            is_lab = self._is_lab_base(module, base, visiting)
+            if is_lab:
+                return True
+            if is_lab is None:
+                undetermined = True
+
+        return None if undetermined else False
+
+    def _is_lab_base(
+        self, module: str, base: Optional[str], visiting: frozenset
+    ):
+        if base is None:
+            return None
+
+        target = self._resolve_name(module, base, set())
+        if target is None:
+            return None
+
+        target_module, target_name = target
+        if target_module is None:
+            # Not defined in the package
+            if target_name in LAB_BASES:
+                return True
+            if target_name.startswith("labs.") or \
+                    target_name.split(".")[-1] not in LIBRARY_LAB_BASES:
+                return False
+            return None
+
+        info = self._get_module(target_module)
+        if info is None:
+            return None
+
+        if target_name in info.classes:
+            return self._is_lab_class(target_module, target_name, visiting)
+
+        return None
+
+    def _resolve_name(self, module: str, name: str, visiting: set):
+        """
+        Find where a dotted name used in a module is defined.
+
+        Returns a (module, name) tuple for names defined in the package,
+        (None, dotted name) for names defined outside of the package,
+        or None when the name cannot be resolved.
+        """
+        if (module, name) in visiting:
+            return None
+        visiting.add((module, name))
+
+        info = self._get_module(module)
+        if info is None:
+            return None
+
+        head, _, tail = name.partition(".")
+
+        if not tail and head in info.classes:
+            return module, head
+
+        if head not in info.imports:
+            if not tail and hasattr(builtins, head):
+                return None, name
+            # Defined by other means, such as an assignment
+            return None
+
+        imported = _join(info.imports[head], tail)
+        if not imported.startswith("."):
+            return None, imported
+
+        # Relative to the package: ".common.MyBase"
+        parts = imported[1:].split(".")
+        for i in range(len(parts) - 1, 0, -1):
+            candidate = ".".join(parts[:i])
+            if self._get_module(candidate) is not None:
+                return self._resolve_name(
+                    candidate, ".".join(parts[i:]), visiting
+                )
+
+        return None
+
+    def _get_module(self, module: str) -> Optional[_ModuleInfo]:
+        if module not in self._modules:
+            self._modules[module] = self._parse_module(module)
+        return self._modules[module]
+
+    def _parse_module(self, module: str) -> Optional[_ModuleInfo]:
+        path = self._find_source(module)
+        if path is None:
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                tree = ast.parse(f.read(), filename=path)
+        except (OSError, SyntaxError, ValueError):
+            return None
+
+        # Relative imports of a package __init__ are relative to itself
+        if os.path.basename(path) == "__init__.py":
+            package = module
+        else:
+            package = module.rpartition(".")[0]
+        return _ModuleVisitor(self.package, package).visit_module(tree)
+
+    def _find_source(self, module: str) -> Optional[str]:
+        relpath = os.path.join(*module.split("."))
+        for location in self.locations:
+            for candidate in (
+                os.path.join(location, relpath + ".py"),
+                os.path.join(location, relpath, "__init__.py"),
+            ):
+                if os.path.isfile(candidate):
+                    return candidate
+        return None
+
+
+class _ModuleVisitor:
+    """
+    Collects the classes and imports of a module
+    """
+
+    def __init__(self, package: str, subpackage: str):
+        self.package = package
+        self.subpackage = subpackage
+        self.classes = {}
+        self.imports = {}
+        self.dynamic = False
+
+    def visit_module(self, tree: ast.Module) -> _ModuleInfo:
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                self.classes[node.name] = (
+                    [_dotted_name(base) for base in node.bases],
+                    _get_script_name(node)
+                )
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    # "import a.b" binds "a", "import a.b as c" binds "a.b"
+                    name = alias.name if alias.asname \
+                        else alias.name.split(".")[0]
+                    self._add_import(alias.asname or name, name)
+            elif isinstance(node, ast.ImportFrom):
+                self._visit_import_from(node)
+            elif isinstance(node, _COMPOUND_STATEMENTS):
+                if any(isinstance(n, ast.ClassDef) for n in ast.walk(node)):
+                    self.dynamic = True
+
+        return _ModuleInfo(self.classes, self.imports, self.dynamic)
+
+    def _visit_import_from(self, node: ast.ImportFrom):
+        if node.level:
+            # Relative import. Make it relative to the course package
+            base = self.subpackage.split(".") if self.subpackage else []
+            base = base[:len(base) - node.level + 1]
+            module = [node.module] if node.module else []
+            source = _join(".", ".".join(base + module))
+        else:
+            source = self._relativize(node.module)
+
+        for alias in node.names:
+            if alias.name == "*":
+                self.dynamic = True
+            else:
+                self._add_import(
+                    alias.asname or alias.name, _join(source, alias.name)
+                )
+
+    def _add_import(self, local_name: str, name: str):
+        self.imports[local_name] = self._relativize(name)
+
+    def _relativize(self, name: str):
+        """
+        Make names of the course package relative to the package,
+        e.g. "do378.common" becomes ".common"
+        """
+        if name == self.package:
+            return "."
+        if name.startswith(self.package + "."):
+            return name[len(self.package):]
+        return name
+
+
+def _join(prefix: str, name: str):
+    """
+    Join two parts of a dotted name.
+    A single dot prefix denotes the course package.
+    """
+    if not name:
+        return prefix
+    if prefix.endswith("."):
+        return prefix + name
+    return f"{prefix}.{name}"
+
+
+def _dotted_name(node: ast.expr) -> Optional[str]:
+    """
+    Return the dotted name of a Name or Attribute node, or None
+    """
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        value = _dotted_name(node.value)
+        return value and f"{value}.{node.attr}"
+    return None
+
+
+def _get_script_name(node: ast.ClassDef):
+    """
+    Return the ``__LAB__`` string literal of a class,
+    None if the class does not set ``__LAB__``,
+    or _DYNAMIC if ``__LAB__`` is not a string literal
+    """
+    script = None
+    for statement in node.body:
+        if isinstance(statement, ast.Assign):
+            targets = statement.targets
+        elif isinstance(statement, ast.AnnAssign) and statement.value:
+            targets = [statement.target]
+        else:
+            continue
+
+        if any(isinstance(t, ast.Name) and t.id == "__LAB__"
+               for t in targets):
+            script = _get_string_literal(statement.value)
+
+    return script
+
+
+def _get_string_literal(node: ast.expr):
+    # ast.Str is used by Python < 3.8
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if hasattr(ast, "Str") and isinstance(node, ast.Str):
+        return node.s
+    return _DYNAMIC
+
+
+def scan(package: str, locations: List[str]) -> ScanResult:
+    """
+    Find the lab scripts of a course package without importing it
+
+    :param package: Name of the course package, such as ``do378``
+    :param locations: Directories of the package
+    """
+    return CourseScanner(package, locations).scan()
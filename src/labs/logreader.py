@@ -0,0 +1,375 @@
+"""
+Read lab log files.
+
+Log files can be very large, for example when all the lab scripts log to a
+single file on a long-lived workstation. The functions of this module read
+log files backwards from the end, in blocks, so that the cost of showing
+the last lines is proportional to the number of lines, not to the file size.
+
+Log records start with the ``%(asctime)s:{lab_name}:`` prefix (see
+:func:`labs.lablog.lablog_init`). Lines without the prefix, such as
+tracebacks and captured output, belong to the previous record.
+
+Rotated log files (``path.1``, ``path.2.gz``, ...) are read after the
+current log file, as older segments of the same log.
+Compressed segments are decompressed in memory.
+"""
+
+import io
+import os
+import re
+import time
+import datetime
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional
+
+# Bytes read at once when reading files backwards
+BLOCK_SIZE = 64 * 1024
+
+# Seconds between checks of the log file in follow mode
+POLL_INTERVAL = 0.5
+
+# The prefix of log records: the asctime and the lab name
+_RECORD_PREFIX = re.compile(
+    rb"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d{3}:([^:\n]*):"
+)
+
+# Suffix of rotated log files, such as ".1" or ".2.gz"
+_SEGMENT_SUFFIX = re.compile(r"\.(\d+)(\.gz)?$")
+
+# Relative --since values, such as "10m"
+_RELATIVE_TIME = re.compile(r"^(\d+)([smhd])$")
+_TIME_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+
+class LogFilter:
+    """
+    Selects the records of a lab script, or newer than a given time
+
+    :param script: Name of the lab script, as logged in the record prefix
+    :param since: Only select records logged at this time or later
+    """
+
+    def __init__(
+        self,
+        script: Optional[str] = None,
+        since: Optional[datetime.datetime] = None,
+    ):
+        self.script = script
+        self.since = since
+
+    def is_active(self):
+        return self.script is not None or self.since is not None
+
+    def match(self, header: Optional[bytes]) -> bool:
+        """
+        Whether the record that starts with the header line is selected.
+        Lines before the first record are only selected without filters.
+        """
+        if not self.is_active():
+            return True
+
+        prefix = _RECORD_PREFIX.match(header) if header else None
+        if prefix is None:
+            return False
+
+        if self.script is not None and \
+                prefix.group(2).decode(errors="replace") != self.script:
+            return False
+
+        if self.since is not None and self.is_older(header):
+            return False
+
+        return True
+
+    def is_older(self, header: Optional[bytes]) -> bool:
+        """
+        Whether the record is older than the since time
+        """
+        timestamp = parse_record_time(header)
+        return (
+            self.since is not None
+            and timestamp is not None
+            and timestamp < self.since
+        )
+
+
+def parse_record_time(line: Optional[bytes]) -> Optional[datetime.datetime]:
+    """
+    Return the time of a log record, or None if the line
+    is not the first line of a record
+    """
+    prefix = _RECORD_PREFIX.match(line) if line else None
+    if prefix is None:
+        return None
+    return datetime.datetime.strptime(
+        prefix.group(1).decode(), "%Y-%m-%d %H:%M:%S"
+    )
+
+
+def is_record_start(line: bytes) -> bool:
+    return _RECORD_PREFIX.match(line) is not None
+
+
+def parse_since(value: str) -> datetime.datetime:
+    """
+    Parse a --since value.
+    Accepts timestamps, such as "2021-06-01 10:30",
+    and relative times, such as "30s", "10m", "2h", or "1d"
+
+    :raises ValueError: if the value is not valid
+    """
+    relative = _RELATIVE_TIME.match(value.strip())
+    if relative:
+        amount, unit = relative.groups()
+        delta = datetime.timedelta(**{_TIME_UNITS[unit]: int(amount)})
+        return datetime.datetime.now() - delta
+
+    for time_format in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.datetime.strptime(value.strip(), time_format)
+        except ValueError:
+            pass
+
+    raise ValueError(
+        f"Invalid time '{value}'. "
+        "Use 'YYYY-MM-DD [HH:MM[:SS]]', or a relative time such as '10m'"
+    )
+
+
+def iter_lines_reversed(
+    f: BinaryIO,
+    end: Optional[int] = None,
+    block_size=BLOCK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Yield the lines of a binary file, from the last one to the first one.
+    Lines do not include the line break.
+
+    :param end: Position of the file where reading starts.
+                By default, the end of the file.
+    """
+    position = f.seek(0, os.SEEK_END)
+    if end is not None:
+        position = min(position, end)
+    rest = b""
+    at_end = True
+
+    while position > 0:
+        size = min(block_size, position)
+        position -= size
+        f.seek(position)
+        parts = (f.read(size) + rest).split(b"\n")
+        # The first part might be the end of a line of the previous block
+        rest = parts.pop(0)
+
+        for line in reversed(parts):
+            if at_end:
+                at_end = False
+                if not line:
+                    # The file ends with a line break
+                    continue
+            yield line
+
+    if rest or not at_end:
+        yield rest
+
+
+def tail_lines(
+    f: BinaryIO,
+    lines: Optional[int],
+    log_filter: Optional[LogFilter] = None,
+    end: Optional[int] = None,
+) -> List[str]:
+    """
+    Return the last lines of a log file, optionally filtering records.
+
+    :param f: The log file, opened in binary mode
+    :param lines: Number of lines to return. None to return all the lines
+    :param log_filter: Only return the lines of the matching records
+    :param end: Position of the end of the file. By default, the file size.
+    """
+    return _select_tail(iter_lines_reversed(f, end), lines, log_filter)
+
+
+def tail_log(
+    path,
+    lines: Optional[int],
+    log_filter: Optional[LogFilter] = None,
+    end: Optional[int] = None,
+) -> List[str]:
+    """
+    Return the last lines of a log, including its rotated segments.
+
+    :param path: Path of the current log file
+    :param lines: Number of lines to return. None to return all the lines
+    :param log_filter: Only return the lines of the matching records
+    :param end: Position of the end of the current log file.
+                By default, the file size.
+    :raises FileNotFoundError: If the current log file does not exist
+    """
+    with open(path, "rb") as f:
+        def iter_log():
+            yield from iter_lines_reversed(f, end)
+            for segment in get_segments(path):
+                yield from iter_lines_reversed(_read_segment(segment))
+
+        return _select_tail(iter_log(), lines, log_filter)
+
+
+def get_segments(path) -> List[str]:
+    """
+    Return the rotated segments of a log file that exist,
+    from the newest to the oldest
+    """
+    directory, filename = os.path.split(str(path))
+    indexes = {}
+    try:
+        names = os.listdir(directory or ".")
+    except OSError:
+        return []
+
+    for name in names:
+        if not name.startswith(filename):
+            continue
+        suffix = _SEGMENT_SUFFIX.fullmatch(name[len(filename):])
+        if suffix:
+            indexes[os.path.join(directory, name)] = int(suffix.group(1))
+
+    return sorted(indexes, key=indexes.get)
+
+
+def is_segment(filename: str) -> bool:
+    """
+    Whether the file name is the name of a rotated log file
+    """
+    return _SEGMENT_SUFFIX.search(filename) is not None
+
+
+def _read_segment(path: str) -> BinaryIO:
+    if path.endswith(".gz"):
+        import gzip
+
+        with gzip.open(path, "rb") as f:
+            return io.BytesIO(f.read())
+
+    with open(path, "rb") as f:
+        return io.BytesIO(f.read())
+
+
+def _select_tail(
+    reversed_lines: Iterable[bytes],
+    lines: Optional[int],
+    log_filter: Optional[LogFilter],
+) -> List[str]:
+    """
+    Select the last lines, from lines in reverse order
+    """
+    log_filter = log_filter or LogFilter()
+    selected = []
+    # Lines of the record being read backwards, in reverse order
+    record = []
+
+    def add_record(header):
+        if log_filter.match(header):
+            selected.extend(record)
+
+    for line in reversed_lines:
+        if lines is not None and len(selected) >= lines:
+            break
+
+        record.append(line)
+        if not log_filter.is_active():
+            selected.append(line)
+            record.clear()
+            continue
+
+        if is_record_start(line):
+            if log_filter.is_older(line):
+                # Records are chronological. The rest are older
+                record.clear()
+                break
+            add_record(line)
+            record.clear()
+    else:
+        # Lines before the first record of the log
+        add_record(None)
+
+    tail = selected[:lines]
+    tail.reverse()
+    return [line.decode(errors="replace") + "\n" for line in tail]
+
+
+def follow_lines(
+    path,
+    offset: int,
+    log_filter: Optional[LogFilter] = None,
+    is_stopped: Callable[[], bool] = lambda: False,
+    poll_interval=POLL_INTERVAL,
+) -> Iterator[str]:
+    """
+    Yield the lines appended to a log file, as they are written.
+
+    The file is polled every poll_interval seconds. If the file is rotated,
+    then the rest of the rotated file is read, and the new file is read from
+    the beginning. If the file is truncated, then it is read again from
+    the beginning.
+
+    :param path: Path of the log file
+    :param offset: Position of the file from which lines are yielded
+    :param log_filter: Only yield the lines of the matching records
+    :param is_stopped: Function that returns True to stop following the file
+    """
+    log_filter = log_filter or LogFilter()
+    pending = b""
+    # Whether the lines of the current record are selected
+    selected = not log_filter.is_active()
+    f = _open_at(path, offset)
+
+    try:
+        while not is_stopped():
+            data = f.read(BLOCK_SIZE) if f else b""
+            if not data:
+                if _is_replaced(f, path):
+                    if f:
+                        f.close()
+                    f, pending = _open_at(path, 0), b""
+                else:
+                    time.sleep(poll_interval)
+                continue
+
+            *complete, pending = (pending + data).split(b"\n")
+            for line in complete:
+                if is_record_start(line):
+                    selected = log_filter.match(line)
+                if selected:
+                    yield line.decode(errors="replace") + "\n"
+    finally:
+        if f:
+            f.close()
+
+
+def _open_at(path, offset: int) -> Optional[BinaryIO]:
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    f.seek(offset)
+    return f
+
+
+def _is_replaced(f: Optional[BinaryIO], path) -> bool:
+    """
+    Whether the file at the path is not the open file anymore,
+    because it has been rotated, created, or truncated
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+
+    if f is None:
+        return True
+    return (
+        stat.st_ino != os.fstat(f.fileno()).st_ino
+        or stat.st_size < f.tell()
+    )
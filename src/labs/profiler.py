@@ -0,0 +1,189 @@
+"""
+Record the time spent in each step of a lab script.
+
+Profiling is disabled by default, and recording a span is then a no-op.
+Once enabled (see :func:`enable`), the framework records a span for:
+
+* Each UI step (:class:`labs.ui.step.Step`), task (:func:`run_task`),
+  and watch step, including the time spent in the commands, HTTP requests,
+  and playbooks that the step runs.
+* Each local or remote command, HTTP request, and playbook.
+
+Spans are recorded with monotonic clocks, per thread, so concurrent steps
+are reported separately. The ``--profile`` flag of the ``lab`` command
+prints a summary of the spans (see :func:`format_table`), and writes them
+as a Chrome trace (see :func:`write_chrome_trace`), which can be opened in
+``chrome://tracing`` or https://ui.perfetto.dev.
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple, Optional
+
+# Max number of recorded spans. Watching a lab for a long time could
+# otherwise grow the list forever
+MAX_SPANS = 100_000
+
+# Categories of the spans that are steps of the lab script
+STEP_CATEGORIES = ("step", "task", "watch")
+
+
+class Span(NamedTuple):
+    """
+    A timed operation.
+    Times are seconds of the monotonic clock.
+    """
+    name: str
+    category: str
+    start: float
+    duration: float
+    thread: int
+
+
+class SpanSummary(NamedTuple):
+    """
+    The spans with the same name and category
+    """
+    name: str
+    category: str
+    count: int
+    total: float
+    max: float
+
+
+_enabled = False
+_lock = threading.Lock()
+_spans: List[Span] = []
+_started = time.monotonic()
+
+
+def enable():
+    """
+    Start recording spans
+    """
+    global _enabled
+    _enabled = True
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """
+    Stop recording spans, and forget the recorded spans
+    """
+    global _enabled, _started
+    with _lock:
+        _enabled = False
+        _spans.clear()
+        _started = time.monotonic()
+
+
+@contextmanager
+def span(name: str, category: str = "step"):
+    """
+    Record the time spent in a block of code::
+
+        with profiler.span("Deploy the application"):
+            ...
+    """
+    if not _enabled:
+        yield
+        return
+
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        record(name, category, start)
+
+
+def record(name: str, category: str, start: float,
+           end: Optional[float] = None):
+    """
+    Record a span that started at the given monotonic time
+    """
+    if not _enabled:
+        return
+
+    end = time.monotonic() if end is None else end
+    with _lock:
+        if len(_spans) < MAX_SPANS:
+            _spans.append(Span(
+                name, category, start, end - start, threading.get_ident()
+            ))
+
+
+def get_spans() -> List[Span]:
+    with _lock:
+        return list(_spans)
+
+
+def summarize(spans: List[Span]) -> List[SpanSummary]:
+    """
+    Group the spans by name and category.
+    The slowest groups come first.
+    """
+    groups: Dict[tuple, List[Span]] = {}
+    for s in spans:
+        groups.setdefault((s.name, s.category), []).append(s)
+
+    summaries = [
+        SpanSummary(
+            name, category, len(group),
+            sum(s.duration for s in group), max(s.duration for s in group)
+        )
+        for (name, category), group in groups.items()
+    ]
+    return sorted(summaries, key=lambda s: s.total, reverse=True)
+
+
+def get_step_durations() -> Dict[str, float]:
+    """
+    Return the total seconds spent in each step of the lab script
+    """
+    return {
+        summary.name: round(summary.total, 3)
+        for summary in summarize(get_spans())
+        if summary.category in STEP_CATEGORIES
+    }
+
+
+def format_table(spans: List[Span]) -> str:
+    """
+    Format the summary of the spans as a table
+    """
+    lines = [f"{'TOTAL (s)':>10} {'COUNT':>6} {'MAX (s)':>9}  "
+             f"{'CATEGORY':<10} NAME"]
+    for s in summarize(spans):
+        lines.append(
+            f"{s.total:>10.3f} {s.count:>6} {s.max:>9.3f}  "
+            f"{s.category:<10} {s.name}"
+        )
+    return "\n".join(lines)
+
+
+def write_chrome_trace(path: str, spans: List[Span]):
+    """
+    Write the spans in the Chrome trace event format
+    """
+    events = [
+        {
+            "name": s.name,
+            "cat": s.category,
+            "ph": "X",
+            "ts": round((s.start - _started) * 1e6),
+            "dur": round(s.duration * 1e6),
+            "pid": os.getpid(),
+            "tid": s.thread,
+        }
+        for s in sorted(spans, key=lambda s: s.start)
+    ]
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
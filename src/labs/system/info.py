@@ -1,29 +1,66 @@
-import psutil
+import os
+import sys
+import json
 import socket
+import logging
 import platform
-from typing import Dict
+from typing import Callable, Dict, Iterable, Optional
+
+# Fields of the system information, in the order they are collected
+FIELDS = ("cpu", "memory", "platform", "python")
+
+STATIC_CACHE_FILENAME = "sysinfo.json"
+
+# Linux changes this id on every boot
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+
+
+def get_static_cache_path() -> str:
+    from labs import labconfig
+
+    return os.path.join(labconfig.get_cache_dir(), STATIC_CACHE_FILENAME)
 
 
 class SystemInfo:
     """
     Collects system information
+
+    Static facts, such as the platform, the python version or the number
+    of CPUs, do not change until the system reboots or python changes.
+    If a cache path is given, static facts are saved to the cache file,
+    and read from it in later invocations.
+
+    :param cache_path: The file that caches the static facts
     """
     _info: Dict
 
-    def __init__(self):
+    def __init__(self, cache_path: Optional[str] = None):
         self._info = {}
+        self._cache_path = cache_path
+        self._static: Optional[Dict] = None
+
+    def collect(self, fields: Iterable[str] = FIELDS):
+        """
+        Collect the given fields
 
-    def collect(self):
-        self.collect_info_cpu()
-        self.collect_info_memory()
-        self.collect_info_platform()
-        self.collect_info_python()
+        :raises ValueError: If a field is unknown
+        """
+        fields = list(fields)
+        unknown = [field for field in fields if field not in FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown system info fields: {unknown}")
+
+        for field in FIELDS:
+            if field in fields:
+                getattr(self, f"collect_info_{field}")()
         return self
 
     def collect_info_cpu(self) -> None:
+        import psutil
+
         load_1, load_5, load_15 = psutil.getloadavg()
         self._info['cpu'] = {
-            'count': psutil.cpu_count(),
+            'count': self._get_static("cpu_count", psutil.cpu_count),
             'load_average': {
                 '1m': load_1,
                 '5m': load_5,
@@ -32,26 +69,107 @@ class SystemInfo:
         }
 
     def collect_info_memory(self) -> None:
+        import psutil
+
+        memory = psutil.virtual_memory()
         self._info['memory'] = {
-            'total': psutil.virtual_memory().total,
-            'available': psutil.virtual_memory().available,
-            'used': psutil.virtual_memory().used,
-            'percent': psutil.virtual_memory().percent
+            'total': memory.total,
+            'available': memory.available,
+            'used': memory.used,
+            'percent': memory.percent
         }
 
     def collect_info_platform(self) -> None:
         self._info['platform'] = {
-            'system': platform.system(),
-            'release': platform.release(),
-            'architecture': platform.machine(),
+            **self._get_static("platform", _get_platform),
+            # The hostname can change without a reboot
             'hostname': socket.gethostname(),
         }
 
     def collect_info_python(self) -> None:
-        self._info['python'] = {
-            'version': platform.python_version(),
-            'compiler': platform.python_compiler(),
-        }
+        self._info['python'] = self._get_static("python", _get_python)
 
     def get_info(self) -> Dict:
         return self._info
+
+    def _get_static(self, name: str, collect: Callable):
+        """
+        Return a static fact from the cache,
+        or collect it and save it to the cache
+        """
+        if self._cache_path is None:
+            return collect()
+
+        if self._static is None:
+            self._static = _read_static_cache(self._cache_path)
+
+        if name not in self._static:
+            self._static[name] = collect()
+            _write_static_cache(self._cache_path, self._static)
+
+        return self._static[name]
+
+
+def _get_platform() -> Dict:
+    return {
+        'system': platform.system(),
+        'release': platform.release(),
+        'architecture': platform.machine(),
+    }
+
+
+def _get_python() -> Dict:
+    return {
+        'version': platform.python_version(),
+        'compiler': platform.python_compiler(),
+    }
+
+
+def get_static_cache_key() -> Dict:
+    """
+    Return the key of the static facts:
+    they are valid until the system reboots or python changes
+    """
+    try:
+        with open(BOOT_ID_PATH) as f:
+            boot_id = f.read().strip()
+    except OSError:
+        import psutil
+
+        boot_id = str(psutil.boot_time())
+
+    try:
+        python_mtime = os.stat(sys.executable).st_mtime_ns
+    except OSError:
+        python_mtime = None
+
+    return {
+        "boot_id": boot_id,
+        "python": sys.executable,
+        "python_mtime": python_mtime,
+    }
+
+
+def _read_static_cache(path: str) -> Dict:
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(cache, dict) or \
+            cache.get("key") != get_static_cache_key():
+        return {}
+
+    return cache.get("facts", {})
+
+
+def _write_static_cache(path: str, facts: Dict):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "w") as f:
+            json.dump({"key": get_static_cache_key(), "facts": facts}, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        logging.debug("Cannot save the system info cache", exc_info=True)
@@ -2,15 +2,16 @@
 Facade module for generating a system report
 """
 
-from .info import SystemInfo
+from typing import Iterable
+from .info import FIELDS, SystemInfo, get_static_cache_path
 from .reporters import REPORTERS
 
 
-def generate(reporter="json"):
+def generate(reporter="json", fields: Iterable[str] = FIELDS):
     """
-    Generate a system info report
+    Generate a system info report, with the given fields only
     """
-    sysinfo = SystemInfo().collect()
+    sysinfo = SystemInfo(get_static_cache_path()).collect(fields)
 
     try:
         REPORTERS[reporter](sysinfo)
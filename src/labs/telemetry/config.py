@@ -12,6 +12,17 @@ def get_api_endpoint():
     return all().get("api_endpoint")
 
 
+def get_batch_api_endpoint():
+    return all().get("batch_api_endpoint")
+
+
+def includes_step_durations():
+    """
+    Do reports include the duration of each lab script step?
+    """
+    return all().getboolean("step_durations", fallback=False)
+
+
 def get_uploader():
     return all().get("uploader")
 
@@ -13,13 +13,17 @@ class TelemetryReport:
     started_at: datetime
     finished_at: datetime
     sysinfo: dict
+    # Seconds spent in each step of the lab script, if enabled
+    step_durations: dict
 
-    def __init__(self, sku, action, started_at, finished_at, sysinfo):
+    def __init__(self, sku, action, started_at, finished_at, sysinfo,
+                 step_durations=None):
         self.sku = sku
         self.action = action
         self.started_at = started_at
         self.finished_at = finished_at
         self.sysinfo = sysinfo
+        self.step_durations = step_durations
 
     @property
     def duration(self):
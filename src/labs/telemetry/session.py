@@ -3,7 +3,9 @@ from datetime import datetime
 
 from .data import TelemetryReport
 from .upload import send
-from labs.system.info import SystemInfo
+from .config import includes_step_durations
+from labs import profiler
+from labs.system.info import SystemInfo, get_static_cache_path
 
 # TODO: read config to ignore telemetry if telemetry consent is not given
 
@@ -44,10 +46,17 @@ class TelemetrySession:
         return self
 
     def __exit__(self, *args, **kwargs):
-        self.finish()
+        try:
+            self.finish()
+        finally:
+            # The lab command ends here. Close its SSH connections
+            from labs.common.commands import ssh
+            ssh.close_connections()
 
     def start(self):
         self.started_at = datetime.now()
+        if includes_step_durations():
+            profiler.enable()
 
     def finish(self):
         self.finished_at = datetime.now()
@@ -57,18 +66,21 @@ class TelemetrySession:
         send(self.report)
 
     def _build_report(self):
-        system = SystemInfo()
-        system.collect_info_platform(),
-        system.collect_info_python()
-        sysinfo = system.get_info()
+        system = SystemInfo(get_static_cache_path())
+        sysinfo = system.collect(["platform", "python"]).get_info()
         sku = self._config["rhtlab"]["course"]["sku"]
+        step_durations = (
+            profiler.get_step_durations()
+            if includes_step_durations() else None
+        )
 
         self.report = TelemetryReport(
             sku,
             self.action,
             self.started_at,
             self.finished_at,
-            sysinfo
+            sysinfo,
+            step_durations
         )
 
 
@@ -0,0 +1,231 @@
+"""
+Local spool of telemetry reports.
+
+Uploading a report when a ``lab`` command finishes would delay the exit of
+the command, especially when the telemetry endpoint is slow or unreachable.
+Instead, reports are appended to a spool file in the DynoLabs cache
+directory (see :func:`labs.labconfig.get_cache_dir`), one JSON object per
+line. A detached background process uploads the spooled reports in batches
+(see :func:`flush`). Reports that cannot be uploaded stay in the spool,
+and the next ``lab`` command retries the upload.
+
+The spool is bounded: reports older than :data:`MAX_AGE` seconds are
+evicted, and the oldest reports are evicted when the spool grows over
+:data:`MAX_SPOOL_BYTES`.
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import glob
+import logging
+import datetime
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+from labs import labconfig
+from labs.telemetry import config
+
+SPOOL_FILENAME = "telemetry.jsonl"
+
+# Max size of the spool file
+MAX_SPOOL_BYTES = 1024 * 1024
+
+# Seconds before a spooled report is evicted
+MAX_AGE = 7 * 24 * 3600
+
+# Max reports uploaded in a single request
+BATCH_SIZE = 100
+
+# Seconds before the upload of a batch times out
+UPLOAD_TIMEOUT = 10
+
+# Uploads a batch of report dicts. Raises an exception if the upload fails
+BatchUploader = Callable[[List[Dict]], None]
+
+
+def get_spool_path() -> str:
+    return os.path.join(labconfig.get_cache_dir(), SPOOL_FILENAME)
+
+
+def append(report: Dict):
+    """
+    Append a report to the spool
+    """
+    path = get_spool_path()
+    line = json.dumps(
+        {"spooled_at": time.time(), "report": report},
+        default=_to_json
+    )
+
+    with _locked(f"{path}.lock"):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+
+        if size + len(line) > MAX_SPOOL_BYTES:
+            entries = _evict(_read_entries(path), MAX_SPOOL_BYTES // 2)
+            _write_entries(path, entries)
+
+        with open(path, "a") as f:
+            f.write(line + "\n")
+
+
+def flush(upload_batch: BatchUploader = None) -> int:
+    """
+    Upload the spooled reports in batches.
+    Returns the number of uploaded reports.
+
+    Only one process flushes the spool at a time. If another process is
+    flushing the spool, this function returns immediately.
+    Reports that fail to upload are returned to the spool.
+    """
+    path = get_spool_path()
+    upload_batch = upload_batch or http_batch_uploader
+
+    try:
+        with _locked(f"{path}.flush.lock", blocking=False):
+            # Take the spooled reports,
+            # so that appending new reports does not wait for the upload
+            sending = f"{path}.{os.getpid()}.sending"
+            with _locked(f"{path}.lock"):
+                if os.path.exists(path):
+                    os.replace(path, sending)
+
+            # This process is the only flusher,
+            # so other sending files belong to flushers that crashed
+            entries = []
+            for sending_path in glob.glob(f"{path}.*.sending"):
+                entries += _read_entries(sending_path)
+                os.remove(sending_path)
+
+            entries = _evict(entries, MAX_SPOOL_BYTES)
+            return _upload(path, entries, upload_batch)
+    except BlockingIOError:
+        logging.debug("Another process is uploading the telemetry spool")
+        return 0
+
+
+def flush_in_background():
+    """
+    Start a detached process that flushes the spool
+    """
+    import subprocess
+
+    subprocess.Popen(
+        [sys.executable, "-m", "labs.telemetry.spool", "--flush"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        close_fds=True,
+    )
+
+
+def http_batch_uploader(reports: List[Dict]):
+    """
+    Upload a batch of reports in a single POST request
+    """
+    import requests
+
+    response = requests.post(
+        config.get_batch_api_endpoint(),
+        data=json.dumps({"reports": reports}, default=_to_json),
+        headers={"Content-Type": "application/json"},
+        timeout=UPLOAD_TIMEOUT
+    )
+    response.raise_for_status()
+
+
+def _upload(path: str, entries: List[Dict], upload_batch: BatchUploader):
+    uploaded = 0
+    for start in range(0, len(entries), BATCH_SIZE):
+        batch = entries[start:start + BATCH_SIZE]
+        try:
+            upload_batch([entry["report"] for entry in batch])
+        except Exception:
+            logging.exception("Error while uploading telemetry")
+            # Return the rest of the reports to the spool
+            with _locked(f"{path}.lock"):
+                _write_entries(
+                    path,
+                    _evict(entries[start:] + _read_entries(path),
+                           MAX_SPOOL_BYTES)
+                )
+            break
+        uploaded += len(batch)
+
+    return uploaded
+
+
+def _evict(entries: List[Dict], max_bytes: int) -> List[Dict]:
+    """
+    Drop old reports, and the oldest reports that exceed max_bytes
+    """
+    now = time.time()
+    entries = sorted(
+        (e for e in entries if now - e.get("spooled_at", 0) < MAX_AGE),
+        key=lambda e: e.get("spooled_at", 0),
+        reverse=True
+    )
+
+    kept, size = [], 0
+    for entry in entries:
+        size += len(json.dumps(entry, default=_to_json)) + 1
+        if size > max_bytes:
+            break
+        kept.append(entry)
+
+    kept.reverse()
+    return kept
+
+
+def _read_entries(path: str) -> List[Dict]:
+    entries = []
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # Skip lines truncated by a crash
+                    continue
+    except OSError:
+        pass
+    return [e for e in entries if isinstance(e, dict) and "report" in e]
+
+
+def _write_entries(path: str, entries: List[Dict]):
+    """
+    Atomically replace the spool
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, default=_to_json) + "\n")
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _locked(lock_path: str, blocking=True):
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, "a") as lock:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        fcntl.flock(lock, flags)
+        yield
+
+
+def _to_json(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    return str(value)
+
+
+if __name__ == "__main__":
+    if "--flush" in sys.argv[1:]:
+        flush()
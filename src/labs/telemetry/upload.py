@@ -40,10 +40,29 @@ def http_uploader(data: TelemetryReport):
         logging.exception("Error while uploading telemetry")
 
 
+def spool_uploader(data: TelemetryReport):
+    """
+    Uploader that appends the report to the local spool,
+    and uploads the spool from a background process.
+    It does not delay the exit of the lab command.
+    """
+    from labs.telemetry import spool
+
+    try:
+        spool.append(data.to_dict())
+        spool.flush_in_background()
+    except OSError:
+        logging.exception("Error while spooling telemetry")
+
+
 # There's a default uploader, but
 # developers might want to use another one
 
-uploaders = {"console": console_uploader, "http": http_uploader}
+uploaders = {
+    "console": console_uploader,
+    "http": http_uploader,
+    "spool": spool_uploader,
+}
 
 # TODO: use http as default
 uploader_id = os.environ.get("TELEMETRY_UPLOADER", config.get_uploader())
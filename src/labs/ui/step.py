@@ -1,3 +1,4 @@
+import time
 import logging
 from enum import Enum
 from typing import List
@@ -7,6 +8,7 @@ from click import echo, style
 
 from labs import labconfig
 from labs import lablog
+from labs import profiler
 from labs.ui.tools import format_message
 from labs.ui._constants import BULLET, SECONDARY_MSG_PADDING, SPINNER
 
@@ -36,6 +38,7 @@ class Step():
         self.secondary_messages = []
 
         self._result = None
+        self._started_at = None
         self._secondary_message_padding = SECONDARY_MSG_PADDING
         self._spinner = Halo(
             text=self.message,
@@ -65,6 +68,7 @@ class Step():
         """
         Start the step by showing a spinner and the step message
         """
+        self._started_at = time.monotonic()
         self._spinner.start()
         return self
 
@@ -117,12 +121,17 @@ class Step():
         if not self.is_done():
             self.ok()
 
+        if self._started_at is not None:
+            profiler.record(self.message, "step", self._started_at)
+
         if self.has_failed() and self.is_fatal:
             self.add_message(style("Cannot continue lab script", fg="red"))
 
         self._print_result()
 
         if self.has_failed() and self.is_fatal:
+            # Write the pending logs before the lab script stops
+            lablog.flush()
             raise StepFatalError(self)
 
     def add_message(self, message: str):
@@ -8,6 +8,7 @@ and the "expect" function for assertions, as follows:
 import os
 from typing import Callable, List, Optional
 from .monitor import LabProgressMonitor
+from .executor import DEFAULT_MAX_WORKERS, DEFAULT_STEP_TIMEOUT
 from .watchstep import LabWatchStep, watchstep, expect, LabWatchStepFailure
 from . import reporter
 
@@ -17,25 +18,41 @@ def watch(
     message="",
     sleep_seconds=1,
     finish: Optional[Callable[[], None]] = None,
+    max_workers=DEFAULT_MAX_WORKERS,
+    step_timeout: Optional[float] = DEFAULT_STEP_TIMEOUT,
 ):
     """
     Watches the progress made in a lab by executing a list of checks,
-    called "watch steps"
+    called "watch steps".
+    The steps of each round run concurrently, up to max_workers at a time.
     """
     monitor = LabProgressMonitor(
         watchsteps,
         sleep_seconds,
         resolve_reporter(message),
-        finish
+        finish,
+        max_workers,
+        step_timeout,
     )
     monitor.watch()
     return monitor
 
 
 def resolve_reporter(message: str) -> reporter.WatchReporter:
+    """
+    Return the reporter selected by the WATCH_REPORTER environment variable:
+    "silent", "json-lines", "full" (prints every round that changes),
+    or "delta" (the default, prints only the steps that change)
+    """
     name = os.environ.get("WATCH_REPORTER", "").lower()
 
-    return reporter.silent() if name == "silent" else reporter.console(message)
+    if name == "silent":
+        return reporter.silent()
+    if name == "json-lines":
+        return reporter.jsonlines()
+    if name == "full":
+        return reporter.console(message)
+    return reporter.delta(message)
 
 
 __all__ = ["watch", "watchstep", "expect", "LabWatchStepFailure"]
@@ -0,0 +1,174 @@
+"""
+The "executor" module
+runs the watch steps of a round concurrently
+"""
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional
+from labs import profiler
+from .watchstep import LabWatchStep, LabWatchStepFailure
+from .round import WatchRoundResults
+
+# Max number of watch steps that run at the same time
+DEFAULT_MAX_WORKERS = 8
+
+# Seconds that a watch step can run before it is reported as failing
+DEFAULT_STEP_TIMEOUT = 30
+
+
+def run_watch_step(step: LabWatchStep) -> Optional[LabWatchStepFailure]:
+    """
+    Run a watch step.
+    Returns None if the step passes, or the failure otherwise.
+    """
+    try:
+        with profiler.span(step.label, "watch"):
+            step()
+        return None
+
+    except LabWatchStepFailure as error:
+        logging.exception(f"[Watch step failed] {step.label}")
+        return error
+
+    except Exception as error:
+        logging.exception(f"[Watch step exception] {step.label}")
+        return LabWatchStepFailure(
+            f"Exception catched: {error}",
+            hints=[
+                "Inspect the log file to find the stack trace"
+            ]
+        )
+
+
+class WatchRoundExecutor:
+    """
+    Runs the watch steps of a round concurrently, in a pool of threads.
+
+    Results are collected in the declared order of the steps.
+    A step that does not finish in its timeout is reported as failing.
+    Python threads cannot be killed, so the step keeps running
+    in the background, and it is not started again until it finishes.
+
+    :param max_workers: Max number of steps that run at the same time
+    :param timeout: Default timeout of the steps, in seconds
+    """
+
+    def __init__(
+        self,
+        max_workers=DEFAULT_MAX_WORKERS,
+        timeout: Optional[float] = DEFAULT_STEP_TIMEOUT,
+    ):
+        self.timeout = timeout
+        self._pool = _DaemonThreadPool(max_workers)
+        # Steps that are still running since a previous round
+        self._running: Dict[LabWatchStep, Future] = {}
+
+    def run(self, steps: List[LabWatchStep]) -> WatchRoundResults:
+        """
+        Run the watch steps once
+        """
+        started = time.monotonic()
+        futures = [self._submit(step) for step in steps]
+        results = WatchRoundResults()
+
+        for step, future in zip(steps, futures):
+            timeout = self.get_timeout(step)
+            remaining = (
+                None if timeout is None
+                else max(started + timeout - time.monotonic(), 0)
+            )
+            if not _wait(future, remaining):
+                logging.warning(
+                    f"[Watch step timeout] {step.label} did not finish "
+                    f"in {timeout} seconds"
+                )
+                results.add_error(step.label, LabWatchStepFailure(
+                    f"The step did not finish in {timeout} seconds",
+                    hints=["Inspect the log file to find the cause"]
+                ))
+                continue
+
+            self._running.pop(step, None)
+            error = future.result()
+            if error is None:
+                results.add_success(step.label)
+            else:
+                results.add_error(step.label, error)
+
+        return results
+
+    def get_timeout(self, step: LabWatchStep) -> Optional[float]:
+        timeout = getattr(step, "timeout", None)
+        return timeout if timeout is not None else self.timeout
+
+    def _submit(self, step: LabWatchStep) -> Future:
+        running = self._running.get(step)
+        if running is not None and not running.done():
+            # The step has not finished since a previous round
+            return running
+
+        future = self._pool.submit(lambda: run_watch_step(step))
+        self._running[step] = future
+        return future
+
+
+def _wait(future: Future, timeout: Optional[float]) -> bool:
+    """
+    Wait for a future. Returns whether it has finished.
+    """
+    try:
+        future.exception(timeout)
+        return True
+    except FutureTimeoutError:
+        return False
+
+
+class _DaemonThreadPool:
+    """
+    A minimal pool of daemon threads.
+
+    Unlike ThreadPoolExecutor, the threads of this pool do not prevent the
+    program from exiting, so a watch step that hangs forever does not
+    hang the lab command after the watch finishes.
+    Threads are started as needed, up to max_workers.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(max_workers, 1)
+        self._tasks: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._idle = 0
+
+    def submit(self, fn: Callable) -> Future:
+        future: Future = Future()
+        self._tasks.put((future, fn))
+
+        with self._lock:
+            if self._idle:
+                self._idle -= 1
+            elif len(self._threads) < self.max_workers:
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f"lab-watch-{len(self._threads)}",
+                    daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+
+        return future
+
+    def _work(self):
+        while True:
+            future, fn = self._tasks.get()
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn())
+                except BaseException as error:
+                    future.set_exception(error)
+
+            with self._lock:
+                self._idle += 1
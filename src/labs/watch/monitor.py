@@ -2,13 +2,18 @@
 The "monitor" module
 watches the exercise by running checks in an infinite loop
 """
-import logging
-from time import sleep
+import time
 from typing import Callable, List, Optional
 from inspect import getmembers
-from .watchstep import is_watchstep, LabWatchStep, LabWatchStepFailure
+from labs import profiler
+from .watchstep import is_watchstep, LabWatchStep
 from .reporter.base import WatchReporter
 from .round import WatchRoundResults
+from .executor import (
+    WatchRoundExecutor, DEFAULT_MAX_WORKERS, DEFAULT_STEP_TIMEOUT
+)
+from .scheduler import WatchScheduler, DEFAULT_MAX_BACKOFF
+from .triggers import create_file_watcher
 
 
 class LabProgressMonitor:
@@ -16,6 +21,15 @@ class LabProgressMonitor:
     """
     Watches a lab by executing a set of watch steps.
     Each of these watch steps executes a verification of the lab progress.
+
+    The steps of a round run concurrently, up to max_workers at a time.
+    A step that runs longer than its timeout (step_timeout by default)
+    is reported as failing.
+
+    Rounds only run the steps that are due (see :class:`WatchScheduler`).
+    Steps that declare paths run when the paths change
+    (see :mod:`labs.watch.triggers`).
+    Before finishing, a round verifies all the steps again.
     """
 
     watchsteps: List[LabWatchStep]
@@ -29,11 +43,19 @@ class LabProgressMonitor:
         sleep_seconds=1,
         reporter=WatchReporter,
         on_finish: Optional[Callable[[], None]] = None,
+        max_workers=DEFAULT_MAX_WORKERS,
+        step_timeout: Optional[float] = DEFAULT_STEP_TIMEOUT,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
     ):
         self.watchsteps = watchsteps
         self.sleep_seconds = sleep_seconds
         self.reporter = reporter
         self.finish_fn = on_finish
+        self.executor = WatchRoundExecutor(max_workers, step_timeout)
+        self.scheduler = WatchScheduler(
+            watchsteps, sleep_seconds, max_backoff
+        )
+        self.file_watcher = None
 
     @classmethod
     def with_checks_from(cls, module, **kargs):
@@ -47,50 +69,71 @@ class LabProgressMonitor:
         """
         Watch the exercise by running the checks
         """
+        # Watch the files before the first round,
+        # so that no change is missed
+        self.file_watcher = create_file_watcher(
+            self.watchsteps, self.sleep_seconds
+        )
+        try:
+            with profiler.span("Watch lab", "lab"):
+                self._watch_until_done()
+        finally:
+            if self.file_watcher:
+                self.file_watcher.close()
+
+        self.finish()
+
+    def _watch_until_done(self):
         results = self._run_watch_round()
         self.reporter.report(results)
 
-        while not results.done():
-            sleep(self.sleep_seconds)
-
-            next = self._run_watch_round()
+        while not results.done() or not self.scheduler.is_verified():
+            if results.done():
+                # Verify the steps that did not run in the last rounds
+                next = self._run_watch_round()
+            else:
+                self._wait_for_due_steps()
+                next = self._run_due_steps()
 
             if next != results:
                 self.reporter.report(next)
 
             results = next
 
-        self.finish()
+    def _wait_for_due_steps(self):
+        """
+        Wait until a step is due, or until a file change triggers a step
+        """
+        while True:
+            timeout = self.scheduler.seconds_until_due()
+            if self.file_watcher is None:
+                time.sleep(self.sleep_seconds if timeout is None else timeout)
+                return
+
+            changed = self.file_watcher.wait(timeout)
+            triggered = self.file_watcher.affected_steps(changed)
+            self.scheduler.trigger(triggered)
+            if triggered or not changed or timeout == 0:
+                return
 
     def _run_watch_round(self) -> WatchRoundResults:
         """
-        Run the watch steps funcions once.
-        Returns True if all checks pass.
+        Run all the watch steps funcions once.
+        Returns the results of the steps, in declared order.
         """
-        results = WatchRoundResults()
-
-        for step in self.watchsteps:
-            try:
-                step()
-                results.add_success(step.label)
-
-            except LabWatchStepFailure as error:
-                results.add_error(step.label, error)
-                logging.exception(f"[Watch step failed] {step.label}")
-
-            except Exception as error:
-                results.add_error(
-                    step.label,
-                    LabWatchStepFailure(
-                        f"Exception catched: {error}",
-                        hints=[
-                            "Inspect the log file to find the stack trace"
-                        ]
-                    ))
-                logging.exception(f"[Watch step exception] {step.label}")
-
+        results = self.executor.run(self.watchsteps)
+        self.scheduler.record(self.watchsteps, results)
         return results
 
+    def _run_due_steps(self) -> WatchRoundResults:
+        """
+        Run the watch steps that are due.
+        Returns the latest results of all the steps, in declared order.
+        """
+        due = self.scheduler.due_steps()
+        self.scheduler.record(due, self.executor.run(due))
+        return self.scheduler.results()
+
     def finish(self):
         """
         Finish the lab monitorization.
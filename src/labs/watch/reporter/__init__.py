@@ -1,8 +1,12 @@
 from .base import WatchReporter
 from .console import ConsoleWatchReporter
+from .delta import DeltaWatchReporter
+from .jsonlines import JsonLinesWatchReporter
 from .silent import SilentWatchReporter
 
 console = ConsoleWatchReporter
+delta = DeltaWatchReporter
+jsonlines = JsonLinesWatchReporter
 silent = SilentWatchReporter
 
-__all__ = [WatchReporter, console, silent]
+__all__ = [WatchReporter, console, delta, jsonlines, silent]
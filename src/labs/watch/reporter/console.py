@@ -2,6 +2,7 @@
 Console output functions to show lab progress
 """
 from datetime import datetime
+from typing import List, NamedTuple
 import click
 from .base import WatchReporter
 from ..watchstep import LabWatchStepFailure
@@ -70,39 +71,87 @@ def echo_header(labname=""):
     click.echo("")
 
 
+class Line(NamedTuple):
+    """
+    A line of console output, and whether it goes to stderr
+    """
+    text: str
+    err: bool = False
+
+
+def echo_lines(lines: List[Line]):
+    for line in lines:
+        click.echo(line.text, err=line.err)
+
+
 def echo_step(
     description: str,
     number: int,
     error: LabWatchStepFailure = None
 ):
+    echo_lines(format_step(description, number, error))
+
+
+def echo_passing_step(description: str, number: int):
+    echo_lines(format_passing_step(description, number))
+
+
+def echo_failing_step(
+    description: str,
+    number: int,
+    error: LabWatchStepFailure
+):
+    echo_lines(format_failing_step(description, number, error))
+
+
+def echo_footer(passing: int, failing: int):
+    echo_lines(format_footer(passing, failing))
+
+
+def format_step(
+    description: str,
+    number: int,
+    error: LabWatchStepFailure = None
+) -> List[Line]:
+    """
+    Return the lines of a step, followed by a blank line
+    """
     if error:
-        echo_failing_step(description, number, error)
+        lines = format_failing_step(description, number, error)
     else:
-        echo_passing_step(description, number)
+        lines = format_passing_step(description, number)
 
-    click.echo("")
+    return lines + [Line("")]
 
 
-def echo_passing_step(description: str, number: int):
+def format_passing_step(description: str, number: int) -> List[Line]:
     checkmark = click.style("✓", fg="green")
     description = click.style(description, bold=True, fg="bright_white")
-    click.echo(f"{checkmark} {number}. {description}")
+    return [Line(f"{checkmark} {number}. {description}")]
 
 
-def echo_failing_step(
+def format_failing_step(
     description: str,
     number: int,
     error: LabWatchStepFailure
-):
+) -> List[Line]:
+    """
+    Failing steps go to stderr
+    """
     errormark = click.style("✖", fg="red")
     hintmark = click.style("Hint", fg="cyan")
     description = click.style(description, bold=True, fg="bright_white")
-    click.echo(f"{errormark} {number}. {description}", err=True)
-    click.secho(f"  {error.message}", fg="red", err=True)
-    for hint in error.hints:
-        click.secho(f"  {hintmark}: {hint}", err=True)
-
-
-def echo_footer(passing: int, failing: int):
-    click.secho(f"{passing} passing", fg="green")
-    click.secho(f"{failing} failing", fg="red")
+    lines = [
+        Line(f"{errormark} {number}. {description}", err=True),
+        Line(click.style(f"  {error.message}", fg="red"), err=True),
+    ]
+    return lines + [
+        Line(f"  {hintmark}: {hint}", err=True) for hint in error.hints
+    ]
+
+
+def format_footer(passing: int, failing: int) -> List[Line]:
+    return [
+        Line(click.style(f"{passing} passing", fg="green")),
+        Line(click.style(f"{failing} failing", fg="red")),
+    ]
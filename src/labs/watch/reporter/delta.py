@@ -0,0 +1,102 @@
+"""
+Console output that only shows the steps that change
+"""
+import sys
+import shutil
+from datetime import datetime
+from typing import List, Optional
+import click
+from .console import (
+    ConsoleWatchReporter, Line, echo_header, echo_lines, format_step,
+    format_footer
+)
+from ..round import WatchRoundResults
+
+# Moves the cursor up a number of lines, and clears the rest of the screen
+_CURSOR_UP_AND_CLEAR = "\x1b[{}A\x1b[J"
+
+
+class DeltaWatchReporter(ConsoleWatchReporter):
+    """
+    A lab watch reporter that prints the whole round once,
+    and then only the steps whose state changes.
+
+    If stdout is a terminal, then the changed steps are updated in place.
+    The steps printed after the first changed step are printed again,
+    because their position on the screen might change.
+    Otherwise, the changed steps are printed after a short header.
+    """
+
+    interactive: bool
+
+    def __init__(self, headermsg: str, interactive: Optional[bool] = None):
+        super().__init__(headermsg)
+        self.interactive = (
+            sys.stdout.isatty() if interactive is None else interactive
+        )
+        self._previous: Optional[WatchRoundResults] = None
+        # Lines of each step, and of the footer, as printed on the screen
+        self._blocks: List[List[Line]] = []
+
+    def report(self, results: WatchRoundResults):
+        previous, self._previous = self._previous, results
+        changed = results.changed_steps(previous)
+        blocks = _format_blocks(results)
+
+        if not changed and previous is not None:
+            return
+
+        if previous is None or len(changed) == len(results.items):
+            self._echo_all(blocks)
+        elif self.interactive:
+            if not self._update_in_place(blocks, changed[0]):
+                self._echo_all(blocks)
+        else:
+            now = datetime.now().strftime("%H:%M:%S")
+            click.echo(f"🔎 [{now}] {len(changed)} step(s) changed")
+            click.echo("")
+            _echo_blocks([blocks[i] for i in changed] + [blocks[-1]])
+
+        self._blocks = blocks
+
+    def _echo_all(self, blocks: List[List[Line]]):
+        echo_header(self.headermsg)
+        _echo_blocks(blocks)
+
+    def _update_in_place(self, blocks: List[List[Line]], first: int) -> bool:
+        """
+        Print again the steps from the first changed step,
+        over the previous output.
+        Returns False if the previous output is not visible on the screen.
+        """
+        columns, rows = shutil.get_terminal_size()
+        height = sum(
+            _get_height(line.text, columns)
+            for block in self._blocks[first:] for line in block
+        )
+        if height >= rows:
+            return False
+
+        click.echo(_CURSOR_UP_AND_CLEAR.format(height), nl=False, color=True)
+        _echo_blocks(blocks[first:])
+        return True
+
+
+def _format_blocks(results: WatchRoundResults) -> List[List[Line]]:
+    blocks = [
+        format_step(item.description, i, item.error)
+        for i, item in enumerate(results.items, start=1)
+    ]
+    return blocks + [format_footer(results.passing, results.failing)]
+
+
+def _echo_blocks(blocks: List[List[Line]]):
+    echo_lines([line for block in blocks for line in block])
+
+
+def _get_height(line: str, columns: int) -> int:
+    """
+    Return the number of terminal rows of a line, including wrapped rows
+    """
+    width = len(click.unstyle(line))
+    return max((width + columns - 1) // max(columns, 1), 1)
@@ -0,0 +1,48 @@
+"""
+Machine-readable output of lab progress
+"""
+import sys
+import json
+from datetime import datetime
+from typing import Optional, TextIO
+from .base import WatchReporter
+from ..round import WatchRoundResults
+
+
+class JsonLinesWatchReporter(WatchReporter):
+    """
+    A lab watch reporter that writes one JSON object per line.
+
+    Only transitions are written: a "step" event for each step whose state
+    changes, a "success" event when all the steps pass, and a "finish" event
+    before running "lab finish".
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream or sys.stdout
+        self._previous: Optional[WatchRoundResults] = None
+
+    def report(self, results: WatchRoundResults):
+        for i in results.changed_steps(self._previous):
+            item = results.items[i]
+            self._emit({
+                "event": "step",
+                "number": i + 1,
+                "description": item.description,
+                "ok": item.ok,
+                "error": item.error.message if item.error else None,
+                "hints": list(item.error.hints) if item.error else [],
+            })
+        self._previous = results
+
+    def success(self):
+        self._emit({"event": "success"})
+
+    def finish(self) -> bool:
+        self._emit({"event": "finish"})
+        return True
+
+    def _emit(self, event: dict):
+        event["time"] = datetime.now().isoformat(timespec="seconds")
+        self.stream.write(json.dumps(event) + "\n")
+        self.stream.flush()
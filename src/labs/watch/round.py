@@ -1,14 +1,28 @@
-from typing import List, NamedTuple
+from typing import List, NamedTuple, Optional
 from .watchstep import LabWatchStepFailure
 
 
 class StepResult(NamedTuple):
     """
-    The result of running a "watch step"
+    The result of running a "watch step".
+
+    The fingerprint is a hash of the state of the step, as reported to the
+    student: its result, description, error message, and hints.
     """
     ok: bool
     description: str
     error: LabWatchStepFailure
+    fingerprint: int = 0
+
+
+def get_fingerprint(
+    ok: bool,
+    description: str,
+    error: Optional[LabWatchStepFailure],
+) -> int:
+    if error is None:
+        return hash((ok, description))
+    return hash((ok, description, str(error), tuple(error.hints)))
 
 
 class WatchRoundResults:
@@ -27,27 +41,44 @@ class WatchRoundResults:
         self.failing = 0
 
     def __eq__(self, other: "WatchRoundResults") -> bool:
-        if len(self.items) != len(other.items):
-            return False
+        return (
+            self.fingerprints() == other.fingerprints()
+            and self.passing == other.passing
+            and self.failing == other.failing
+        )
 
-        for i, item in enumerate(self.items):
-            if not (
-                item.ok == other.items[i].ok and
-                item.description == other.items[i].description and
-                str(item.error) == str(other.items[i].error)
-            ):
-                return False
+    def fingerprints(self) -> List[int]:
+        return [item.fingerprint for item in self.items]
+
+    def changed_steps(
+        self, previous: Optional["WatchRoundResults"]
+    ) -> List[int]:
+        """
+        Return the indexes of the steps whose state changed since
+        the previous round. If the previous round has different steps,
+        then all the steps are considered as changed.
+        """
+        if previous is None or len(previous.items) != len(self.items):
+            return list(range(len(self.items)))
 
-        return (self.passing == other.passing and
-                self.failing == other.failing)
+        return [
+            i for i, (item, before) in enumerate(zip(self.items,
+                                                     previous.items))
+            if item.fingerprint != before.fingerprint
+        ]
 
     def add_success(self, description: str):
-        r = StepResult(True, description, None)
+        r = StepResult(
+            True, description, None, get_fingerprint(True, description, None)
+        )
         self.items.append(r)
         self.passing += 1
 
     def add_error(self, description: str, error: LabWatchStepFailure):
-        r = StepResult(False, description, error)
+        r = StepResult(
+            False, description, error,
+            get_fingerprint(False, description, error)
+        )
         self.items.append(r)
         self.failing += 1
 
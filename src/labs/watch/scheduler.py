@@ -0,0 +1,192 @@
+"""
+The "scheduler" module
+decides which watch steps run in each watch round.
+
+Instead of running every step in every round:
+
+* Each step runs at its own interval (``@watchstep(interval=...)``),
+  or at the interval of the monitor.
+* A step that keeps failing with the same error backs off exponentially,
+  up to ``max_backoff`` seconds between runs.
+* A "sticky" step (``@watchstep(sticky=True)``) is not run again once it
+  passes, until all the steps are verified before finishing the watch.
+* A step that declares paths (``@watchstep(paths=[...])``) only runs again
+  when it is triggered by a change of its paths (see :mod:`.triggers`).
+
+Steps that do not run in a round keep their previous result.
+"""
+import time
+from typing import Dict, List, Optional
+from .watchstep import LabWatchStep, LabWatchStepFailure
+from .round import StepResult, WatchRoundResults
+
+# Max seconds between runs of a step that keeps failing the same way
+DEFAULT_MAX_BACKOFF = 10
+
+
+class _StepState:
+    """
+    The last result of a watch step, and when it must run again
+    """
+
+    def __init__(self):
+        self.result: Optional[StepResult] = None
+        self.next_run = 0.0
+        # Number of consecutive runs that failed with the same error
+        self.repeated_failures = 0
+        # Whether the step result comes from the latest verification
+        self.verified = False
+        # Whether a change of the paths of the step requires to run it
+        self.triggered = False
+
+
+class WatchScheduler:
+    """
+    Schedules the watch steps of a monitor.
+
+    :param steps: The watch steps, in declared order
+    :param interval: Default seconds between runs of a step
+    :param max_backoff: Max seconds between runs of a failing step
+    """
+
+    def __init__(
+        self,
+        steps: List[LabWatchStep],
+        interval: float = 1,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+    ):
+        self.steps = steps
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self._states: Dict[LabWatchStep, _StepState] = {
+            step: _StepState() for step in steps
+        }
+
+    def due_steps(self, now: Optional[float] = None) -> List[LabWatchStep]:
+        """
+        Return the steps that must run now, in declared order
+        """
+        now = time.monotonic() if now is None else now
+        return [
+            step for step in self.steps
+            if self._get_next_run(step) is not None
+            and self._get_next_run(step) <= now
+        ]
+
+    def seconds_until_due(
+        self, now: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        Return the seconds until the next step must run,
+        or None if all the steps wait for file changes
+        """
+        now = time.monotonic() if now is None else now
+        pending = [
+            self._get_next_run(step) for step in self.steps
+            if self._get_next_run(step) is not None
+        ]
+        if not pending:
+            return None
+        return max(min(pending) - now, 0)
+
+    def trigger(self, steps: List[LabWatchStep]):
+        """
+        Run the steps as soon as possible,
+        because the files they depend on have changed
+        """
+        for step in steps:
+            self._states[step].triggered = True
+
+    def record(
+        self,
+        steps: List[LabWatchStep],
+        results: WatchRoundResults,
+        now: Optional[float] = None,
+    ):
+        """
+        Save the results of the steps that have run in a round.
+
+        :param steps: The steps that have run
+        :param results: The results of the steps, in the same order
+        :param now: The time when the round finished
+        """
+        now = time.monotonic() if now is None else now
+        verified = len(steps) == len(self.steps)
+
+        for step, result in zip(steps, results.items):
+            state = self._states[step]
+            if (
+                not result.ok and state.result is not None
+                and not state.result.ok
+                and _same_error(result.error, state.result.error)
+            ):
+                state.repeated_failures += 1
+            else:
+                state.repeated_failures = 0
+
+            state.result = result
+            state.verified = verified
+            state.triggered = False
+            state.next_run = now + self.get_interval(step)
+
+    def get_interval(self, step: LabWatchStep) -> float:
+        """
+        Return the seconds until a step must run again
+        """
+        interval = getattr(step, "interval", None)
+        interval = self.interval if interval is None else interval
+        backoff = interval * 2 ** self._states[step].repeated_failures
+        return max(min(backoff, self.max_backoff), interval)
+
+    def results(self) -> WatchRoundResults:
+        """
+        Return the latest result of each step, in declared order
+        """
+        results = WatchRoundResults()
+        for step in self.steps:
+            result = self._states[step].result
+            if result is None:
+                continue
+            if result.ok:
+                results.add_success(result.description)
+            else:
+                results.add_error(result.description, result.error)
+        return results
+
+    def is_verified(self) -> bool:
+        """
+        Whether all the results come from a round that ran all the steps
+        """
+        return all(state.verified for state in self._states.values())
+
+    def _get_next_run(self, step: LabWatchStep) -> Optional[float]:
+        """
+        Return when a step must run,
+        or None if it waits for the final verification or for file changes
+        """
+        state = self._states[step]
+        if self._is_settled(step):
+            return None
+        if state.triggered:
+            return 0.0
+        if getattr(step, "paths", None) and state.result is not None:
+            return None
+        return state.next_run
+
+    def _is_settled(self, step: LabWatchStep) -> bool:
+        """
+        Whether a step does not need to run until the final verification
+        """
+        result = self._states[step].result
+        return (
+            getattr(step, "sticky", False)
+            and result is not None
+            and result.ok
+        )
+
+
+def _same_error(
+    error: LabWatchStepFailure,
+    previous: LabWatchStepFailure,
+) -> bool:
+    return str(error) == str(previous)
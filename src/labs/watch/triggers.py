@@ -0,0 +1,308 @@
+"""
+The "triggers" module
+detects changes in the files that watch steps depend on.
+
+Watch steps that declare paths (``@watchstep(paths=[...])``) only run
+again when one of their paths changes. A change is the creation, removal,
+or modification of a path, or of an entry of a directory path.
+Changes deeper inside directories are not detected.
+
+On Linux, changes are reported by inotify, so the monitor is idle until
+something changes. Otherwise, or if inotify is not available,
+the paths are polled every ``poll_interval`` seconds.
+Set the ``WATCH_TRIGGERS`` environment variable to ``poll``
+to always use polling.
+"""
+import os
+import time
+import errno
+import select
+import struct
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .watchstep import LabWatchStep
+
+# Seconds between checks of the paths, when inotify is not available
+DEFAULT_POLL_INTERVAL = 1
+
+# inotify event flags (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+_WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+
+# Event header: watch descriptor, mask, cookie, and length of the name
+_EVENT = struct.Struct("iIII")
+
+
+def get_paths(step: LabWatchStep) -> List[str]:
+    """
+    Return the absolute paths that a watch step depends on
+    """
+    return [
+        os.path.abspath(os.path.expanduser(path))
+        for path in getattr(step, "paths", None) or []
+    ]
+
+
+def is_affected(path: str, changed: str) -> bool:
+    """
+    Whether a change of the changed path affects the path
+    """
+    return (
+        path == changed
+        or changed.startswith(path.rstrip(os.sep) + os.sep)
+        or path.startswith(changed.rstrip(os.sep) + os.sep)
+    )
+
+
+class FileWatcher(ABC):
+    """
+    Detects the changes in the paths of a list of watch steps
+
+    :param steps: The watch steps. Steps without paths are ignored
+    """
+
+    def __init__(self, steps: List[LabWatchStep]):
+        self.paths: Dict[LabWatchStep, List[str]] = {
+            step: get_paths(step) for step in steps if get_paths(step)
+        }
+
+    @abstractmethod
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """
+        Wait until any path changes, or until the timeout expires.
+        Returns the changed paths.
+        """
+        pass
+
+    def affected_steps(self, changed: Iterable[str]) -> List[LabWatchStep]:
+        """
+        Return the steps whose paths are affected by the changed paths
+        """
+        changed = list(changed)
+        return [
+            step for step, paths in self.paths.items()
+            if any(is_affected(p, c) for p in paths for c in changed)
+        ]
+
+    def close(self):
+        pass
+
+    def _all_paths(self) -> Set[str]:
+        return {path for paths in self.paths.values() for path in paths}
+
+
+class PollingFileWatcher(FileWatcher):
+    """
+    Detects changes by comparing the status of the paths periodically
+    """
+
+    def __init__(
+        self,
+        steps: List[LabWatchStep],
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ):
+        super().__init__(steps)
+        self.poll_interval = poll_interval
+        self._snapshot = self._take_snapshot()
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            snapshot = self._take_snapshot()
+            changed = {
+                path for path in snapshot
+                if snapshot[path] != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changed:
+                return changed
+
+            remaining = (
+                self.poll_interval if deadline is None
+                else min(deadline - time.monotonic(), self.poll_interval)
+            )
+            if remaining <= 0:
+                return set()
+            time.sleep(remaining)
+
+    def _take_snapshot(self) -> Dict[str, Tuple]:
+        return {path: _get_status(path) for path in self._all_paths()}
+
+
+def _get_status(path: str) -> Tuple:
+    """
+    Return the status of a path, and of its entries if it is a directory
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return ()
+
+    status = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    if not os.path.isdir(path):
+        return status
+
+    try:
+        with os.scandir(path) as entries:
+            children = sorted(
+                (entry.name, entry.stat(follow_symlinks=False).st_mtime_ns,
+                 entry.stat(follow_symlinks=False).st_size)
+                for entry in entries
+            )
+    except OSError:
+        children = []
+
+    return status + tuple(children)
+
+
+class InotifyFileWatcher(FileWatcher):
+    """
+    Detects changes with the Linux inotify API.
+
+    Each path is watched through its nearest existing directory:
+    the path itself if it is a directory, or its parent otherwise.
+    Watches are updated when directories are created or removed.
+
+    :raises OSError: If inotify is not available
+    """
+
+    def __init__(self, steps: List[LabWatchStep]):
+        super().__init__(steps)
+        self._libc = _load_libc()
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise _errno_error("inotify_init1")
+        # Watch descriptor -> watched directory
+        self._watches: Dict[int, str] = {}
+        self._update_watches()
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed = set()
+        for wd, mask, name in self._read_events():
+            if mask & IN_Q_OVERFLOW:
+                # The kernel dropped events: any path might have changed
+                logging.debug("inotify event queue overflow")
+                changed |= self._all_paths()
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+            changed.add(os.path.join(directory, name) if name else directory)
+
+        self._update_watches()
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _read_events(self) -> List[Tuple[int, int, str]]:
+        events = []
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                events.append((wd, mask, os.fsdecode(name)))
+
+    def _update_watches(self):
+        """
+        Watch the nearest existing directory of each path
+        """
+        watched = set(self._watches.values())
+        for path in self._all_paths():
+            directory = _nearest_directory(path)
+            if directory is None or directory in watched:
+                continue
+
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(directory), _WATCH_MASK
+            )
+            if wd < 0:
+                logging.debug(f"Cannot watch {directory} with inotify")
+                continue
+
+            self._watches[wd] = directory
+            watched.add(directory)
+
+
+def _nearest_directory(path: str) -> Optional[str]:
+    """
+    Return the path if it is a directory,
+    or its nearest existing parent directory
+    """
+    while not os.path.isdir(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    return path
+
+
+def _load_libc():
+    import ctypes
+    import ctypes.util
+
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError(errno.ENOSYS, "inotify is not available")
+    return libc
+
+
+def _errno_error(function: str) -> OSError:
+    import ctypes
+
+    error = ctypes.get_errno()
+    return OSError(error, f"{function}: {os.strerror(error)}")
+
+
+def create_file_watcher(
+    steps: List[LabWatchStep],
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+) -> Optional[FileWatcher]:
+    """
+    Return a file watcher for the steps that declare paths,
+    or None if no step declares paths.
+    Uses inotify if available, and polling otherwise.
+    """
+    if not any(get_paths(step) for step in steps):
+        return None
+
+    if os.environ.get("WATCH_TRIGGERS", "").lower() != "poll":
+        try:
+            return InotifyFileWatcher(steps)
+        except (OSError, AttributeError):
+            logging.debug("inotify is not available", exc_info=True)
+
+    return PollingFileWatcher(steps, poll_interval)
@@ -1,4 +1,4 @@
-from typing import Any, Callable, List, Dict, Union
+from typing import Any, Callable, List, Dict, Optional, Union
 
 
 TestFunction = Callable[[], None]
@@ -14,29 +14,67 @@ class LabWatchStep:
         - A label
         - A test function: Test functions do not accept parameters
           and return None.
+        - An optional timeout, in seconds. Steps that run longer
+          are reported as failing.
+        - An optional interval, in seconds, between runs of the step.
+        - Whether the step is sticky. Sticky steps do not run again
+          after they pass, until the final verification of the lab.
+        - Optional paths that the step depends on. Steps with paths
+          only run again when the paths change.
     """
 
     label: str
     testfn: TestFunction
-
-    def __init__(self, label: str, testfn: TestFunction):
+    timeout: Optional[float]
+    interval: Optional[float]
+    sticky: bool
+    paths: List[str]
+
+    def __init__(
+        self,
+        label: str,
+        testfn: TestFunction,
+        timeout: Optional[float] = None,
+        interval: Optional[float] = None,
+        sticky=False,
+        paths: Optional[List[str]] = None,
+    ):
         """
         Do not use this constructor,
         instead, use the @watchstep decorator
         """
         self.label = label
         self.testfn = testfn
+        self.timeout = timeout
+        self.interval = interval
+        self.sticky = sticky
+        self.paths = list(paths or [])
 
     def __call__(self, *args: Any, **kwds: Any) -> Any:
         return self.testfn(*args, **kwds)
 
 
-def watchstep(label: str) -> LabWatchStep:
+def watchstep(
+    label: str,
+    timeout: Optional[float] = None,
+    interval: Optional[float] = None,
+    sticky=False,
+    paths: Optional[List[str]] = None,
+) -> LabWatchStep:
     """
     Decorates a function to be a lab watch step.
+    If timeout or interval are None, the defaults of the monitor apply.
+    If paths are given, the step only runs again when the paths change.
     """
     def decorator(func):
-        return LabWatchStep(label, testfn=func)
+        return LabWatchStep(
+            label,
+            testfn=func,
+            timeout=timeout,
+            interval=interval,
+            sticky=sticky,
+            paths=paths
+        )
 
     return decorator
 
@@ -0,0 +1,53 @@
+"""
+Utils to replace system commands with fake executables in test scenarios
+
+Unlike test doubles of :py:mod:`subprocess`, fake commands run as real
+processes, with real pipes.
+"""
+
+import os
+import json
+import sys
+from typing import List
+
+_SCRIPT = """#!{python}
+import sys, json
+with open({calls!r}, "a") as f:
+    f.write(json.dumps(sys.argv[1:]) + "\\n")
+sys.stdout.write({stdout!r})
+sys.exit({returncode})
+"""
+
+
+class FakeCommands:
+    """
+    Fake executables in a directory of the PATH.
+    Each fake command records its arguments and prints a fixed output.
+    """
+
+    def __init__(self, bin_dir: str):
+        self.bin_dir = bin_dir
+
+    def register(self, name: str, stdout: str = "", returncode: int = 0):
+        path = os.path.join(self.bin_dir, name)
+        with open(path, "w") as f:
+            f.write(_SCRIPT.format(
+                python=sys.executable,
+                calls=self._calls_path(name),
+                stdout=stdout,
+                returncode=returncode,
+            ))
+        os.chmod(path, 0o755)
+
+    def calls(self, name: str) -> List[List[str]]:
+        """
+        Return the arguments of each call to a fake command
+        """
+        try:
+            with open(self._calls_path(name)) as f:
+                return [json.loads(line) for line in f]
+        except FileNotFoundError:
+            return []
+
+    def _calls_path(self, name: str) -> str:
+        return os.path.join(self.bin_dir, f"{name}.calls")
@@ -1,7 +1,12 @@
 import os
 import logging
+import tempfile
 from pathlib import Path
 
+import pytest
+
+from tests._util.commands import FakeCommands
+
 
 def pytest_configure():
     # We should not pollute the dev enviroment,
@@ -13,3 +18,19 @@ def pytest_configure():
     os.environ["RHT_LABS_CONFIG_PATH"] = config_path
 
     logging.info(f"DynoLabs config path: {config_path}")
+
+    # Keep the lab script index and other caches out of ~/.grading
+    os.environ["RHT_LABS_CACHE_DIR"] = tempfile.mkdtemp(
+        prefix="rht-labs-tests-cache-"
+    )
+
+
+@pytest.fixture
+def fake_commands(tmp_path, monkeypatch):
+    """
+    Replace system commands with fake executables (see FakeCommands)
+    """
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return FakeCommands(str(bin_dir))
@@ -0,0 +1,64 @@
+"""
+Benchmark of the shell completion of lab scripts.
+
+Requires the ts000 test course
+(see tests/_util/config.yaml, testcourse, and tests/conftest.py)
+"""
+import os
+import sys
+import subprocess
+
+# Maximum time to answer "lab start <TAB>", in seconds.
+# Interpreter startup is excluded, because it depends on the environment
+COMPLETION_BUDGET = 0.05
+
+# Measures the time to import the entry point and answer the completion
+BENCHMARK = """
+import sys, time
+start = time.perf_counter()
+from labs.cli import main
+try:
+    main()
+except SystemExit:
+    pass
+print(time.perf_counter() - start, file=sys.stderr)
+"""
+
+
+def _complete(words, cword):
+    env = {
+        **os.environ,
+        "_LAB_COMPLETE": "bash_complete",
+        "COMP_WORDS": words,
+        "COMP_CWORD": str(cword),
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", BENCHMARK],
+        encoding="utf-8",
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        check=True,
+    )
+    return result.stdout, float(result.stderr.strip().splitlines()[-1])
+
+
+def test_completion__lab_start__output():
+    output, _ = _complete("lab start test-python-lab", 2)
+
+    assert output.splitlines() == [
+        "plain,test-python-lab",
+        "plain,test-python-lab-error",
+    ]
+
+
+def test_completion__lab_start__latency_budget():
+    # The first run builds the caches
+    _complete("lab start ", 2)
+
+    elapsed = min(_complete("lab start ", 2)[1] for _ in range(5))
+
+    assert elapsed < COMPLETION_BUDGET, (
+        f"'lab start <TAB>' took {elapsed * 1000:.1f}ms. "
+        f"Budget: {COMPLETION_BUDGET * 1000:.0f}ms"
+    )
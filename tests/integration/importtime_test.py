@@ -0,0 +1,84 @@
+"""
+Import-time regression tests for the lab CLI.
+
+Uses "python -X importtime" to verify that light commands
+do not import the heavy dependencies of the lab framework.
+
+Requires the ts000 test course
+(see tests/_util/config.yaml, testcourse, and tests/conftest.py)
+"""
+import os
+import sys
+import subprocess
+
+import pytest
+
+# Maximum time spent importing modules, in microseconds.
+# Modules imported at interpreter startup are excluded
+IMPORT_BUDGET_US = 150_000
+
+# Packages that light commands must not import
+FORBIDDEN_PACKAGES = [
+    "ansible_runner",
+    "halo",
+    "pkg_resources",
+    "psutil",
+    "requests",
+    "labs.grading",
+    "labs.labload",
+    "labs.telemetry",
+    "labs.system",
+]
+
+LAB = "import sys; from labs.cli import main; sys.argv = {argv!r}; main()"
+
+
+def _import_times(code):
+    """
+    Return the self import time of each module imported by the code
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        encoding="utf-8",
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        env=os.environ.copy(),
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(self_us)
+
+    return times
+
+
+@pytest.fixture(scope="module")
+def startup_modules():
+    return set(_import_times("pass"))
+
+
+@pytest.mark.parametrize("argv", [
+    ["lab", "--version"],
+    ["lab", "logs"],
+])
+def test_import_budget(argv, startup_modules):
+    times = _import_times(LAB.format(argv=argv))
+    imported = {
+        name: us for name, us in times.items() if name not in startup_modules
+    }
+
+    forbidden = [
+        name for name in imported
+        for package in FORBIDDEN_PACKAGES
+        if name == package or name.startswith(package + ".")
+    ]
+    assert not forbidden, f"'{' '.join(argv)}' imports {forbidden}"
+
+    total = sum(imported.values())
+    assert total < IMPORT_BUDGET_US, (
+        f"'{' '.join(argv)}' spends {total / 1000:.1f}ms importing modules. "
+        f"Budget: {IMPORT_BUDGET_US / 1000:.0f}ms"
+    )
@@ -134,6 +134,23 @@ def test_command__system_info__output():
     assert_output_is_sysinfo_report(result.output)
 
 
+def test_command__system_info__fields():
+    runner = CliRunner()
+
+    result = runner.invoke(lab.system_info, ["--fields", "python,memory"])
+
+    assert result.exit_code == 0
+    assert sorted(json.loads(result.output)) == ["memory", "python"]
+
+
+def test_command__system_info__invalid_fields():
+    runner = CliRunner()
+
+    result = runner.invoke(lab.system_info, ["--fields", "disk"])
+
+    assert result.exit_code == 2
+
+
 def assert_output_is_sysinfo_report(output: str):
     report = json.loads(output)
 
@@ -257,5 +274,28 @@ def test_command__logs__missing_script__multiple_files():
     assert result.exit_code == 1
 
 
+def test_command__logs__invalid_since():
+    """
+    lab logs --since fails with an invalid time
+    """
+    runner = CliRunner()
+
+    result = runner.invoke(lab.main, ["logs", "--since", "yesterday"])
+
+    assert "Invalid time" in result.output
+    assert result.exit_code == 2
+
+
+def test_command__logs__since():
+    """
+    lab logs --since accepts relative times
+    """
+    runner = CliRunner()
+
+    result = runner.invoke(lab.main, ["logs", "--since", "1h"])
+
+    assert result.exit_code == 0
+
+
 # Add tests for other commands below
 # lab ...
@@ -0,0 +1,53 @@
+"""
+Throughput benchmark of lablog.run_capture.
+
+run_capture duplicates the output of commands to the terminal and the log
+file. Verbose commands, such as ansible-playbook, must not be slowed down.
+"""
+import os
+import sys
+import subprocess
+
+# Bytes of output produced by the benchmark command
+OUTPUT_SIZE = 10 * 1000 * 1000
+
+# Min throughput, in MB per second
+MIN_THROUGHPUT = 20
+
+BENCHMARK = """
+import sys
+import time
+import labs.lablog as lablog
+
+config = {"rhtlab": {"logging": {"path": sys.argv[1], "capture_output": True}}}
+lablog.lablog_init(config, "benchmark")
+
+size = int(sys.argv[2])
+command = [
+    sys.executable, "-c",
+    f"import sys; sys.stdout.write(('x' * 79 + chr(10)) * {size // 80})"
+]
+start = time.perf_counter()
+lablog.run_capture(command)
+sys.__stderr__.write(str(time.perf_counter() - start))
+"""
+
+
+def test_run_capture_throughput(tmp_path):
+    log_dir = str(tmp_path) + os.sep
+
+    result = subprocess.run(
+        [sys.executable, "-c", BENCHMARK, log_dir, str(OUTPUT_SIZE)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        encoding="utf-8",
+        check=True,
+    )
+
+    throughput = OUTPUT_SIZE / float(result.stderr) / 1e6
+    assert throughput > MIN_THROUGHPUT, (
+        f"run_capture throughput is {throughput:.1f} MB/s. "
+        f"Expected: more than {MIN_THROUGHPUT} MB/s"
+    )
+    # The whole output is in the log file
+    assert os.path.getsize(tmp_path / "benchmark") >= OUTPUT_SIZE
@@ -1,4 +1,4 @@
-from labs.common.commands import run_command, run_command_step
+from labs.common.commands import run_command, run_command_step, run_remote
 
 
 def test__run_command__returns_process():
@@ -46,3 +46,20 @@ def test__run_command_step__shell__verifies_output():
     )
 
     assert step.has_succeeded()
+
+
+def test__run_remote__quotes_arguments(fake_commands):
+    """
+    run_remote() runs the command through ssh, reusing connections
+    """
+    fake_commands.register("ssh", stdout="a b")
+
+    process = run_remote("servera", ["echo", "a b"], sshkey="/tmp/key")
+
+    assert process.returncode == 0
+    assert process.stdout == b"a b"
+    master, command = fake_commands.calls("ssh")
+    assert "-M" in master
+    assert command[:2] == ["-i", "/tmp/key"]
+    assert "ControlMaster=no" in command
+    assert command[-3:] == ["servera", "echo", "'a b'"]
@@ -1,5 +1,3 @@
-from pytest_subprocess import FakeProcess
-
 from requests.exceptions import ConnectionError, Timeout
 from requests_mock import Mocker as RequestMocker
 
@@ -65,22 +63,22 @@ def test__check_registry_step__timeout():
     assert "timed out" in " ".join(step.secondary_messages)
 
 
-def test__prune_images__step(fp: FakeProcess):
+def test__prune_images__step(fake_commands):
     """
     prune_images_step() OK
     """
-    fp.register(["podman", fp.any()])
+    fake_commands.register("podman")
 
     step = prune_images_step()
 
     assert step.has_succeeded()
 
 
-def test__prune_images__failure(fp: FakeProcess):
+def test__prune_images__failure(fake_commands):
     """
     prune_images_step() fails if command return non-zero code
     """
-    fp.register(["podman", fp.any()], returncode=1)
+    fake_commands.register("podman", returncode=1)
 
     step = prune_images_step(fatal=False)
 
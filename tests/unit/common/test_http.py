@@ -1,3 +1,8 @@
+import time
+
+import pytest
+
+from labs.common import http
 from labs.common.http import check_http_response_step
 
 
@@ -69,3 +74,74 @@ def test__http_request_failure_extra_long_message(httpserver):
         fatal=False
     )
     assert len(step.secondary_messages[0]) < 100
+
+
+def test__get_session__reuses_sessions_per_host():
+    session = http.get_session("http://example.com/a")
+
+    assert http.get_session("http://example.com/b") is session
+    assert http.get_session("https://example.com/a") is not session
+    assert http.get_session("http://example.org/a") is not session
+
+
+def test__make_request__times_out(httpserver):
+    def slow_handler(request):
+        time.sleep(1)
+
+    httpserver.expect_request("/").respond_with_handler(slow_handler)
+
+    with pytest.raises(http.HttpRequestError, match="timed out"):
+        http.make_request(httpserver.url_for("/"), timeout=0.2)
+
+
+def test__make_request__keeps_connections_alive(httpserver):
+    httpserver.expect_request("/").respond_with_data("ok")
+    url = httpserver.url_for("/")
+
+    http.make_request(url)
+    http.make_request(url)
+
+    adapter = http.get_session(url).get_adapter(url)
+    assert len(adapter.poolmanager.pools) == 1
+
+
+def test__make_request__does_not_keep_cookies(httpserver):
+    httpserver.expect_request("/login").respond_with_data(
+        "ok", headers={"Set-Cookie": "session=secret; Path=/"}
+    )
+    httpserver.expect_request("/private").respond_with_data("ok")
+
+    http.make_request(httpserver.url_for("/login"))
+    http.make_request(httpserver.url_for("/private"))
+
+    request, _ = httpserver.log[-1]
+    assert request.path == "/private"
+    assert "Cookie" not in request.headers
+
+
+def test__check_http_responses_step__reports_all_failures(httpserver):
+    httpserver.expect_request("/ok").respond_with_data(status=200)
+    httpserver.expect_request("/missing").respond_with_data(status=404)
+    urls = [
+        httpserver.url_for("/ok"),
+        httpserver.url_for("/missing"),
+        "http://0.0.0.1",
+    ]
+
+    step = http.check_http_responses_step(urls, fatal=False)
+
+    assert step.has_failed()
+    assert len(step.secondary_messages) == 2
+    assert "404" in step.secondary_messages[0]
+    assert "Error connecting to" in step.secondary_messages[1]
+
+
+def test__check_http_responses_step__succeeds(httpserver):
+    httpserver.expect_request("/a").respond_with_data(status=200)
+    httpserver.expect_request("/b").respond_with_data(status=200)
+
+    step = http.check_http_responses_step(
+        [httpserver.url_for("/a"), httpserver.url_for("/b")]
+    )
+
+    assert step.has_succeeded()
@@ -61,6 +61,7 @@ class TestLog:
         """Test that stdin is captured."""
 
         labcommand.log_stdin("Test stdin")
+        lablog.flush()
         assert setup_test.is_file()
         with open(setup_test) as f:
             content = f.read()
@@ -70,6 +71,7 @@ class TestLog:
         """Test that stdout is captured."""
 
         labcommand.log_stdout("Test stdout")
+        lablog.flush()
         assert setup_test.is_file()
         with open(setup_test) as f:
             content = f.read()
@@ -79,6 +81,7 @@ class TestLog:
         """Test that stderr is captured."""
 
         labcommand.log_stderr("Test stderr")
+        lablog.flush()
         assert setup_test.is_file()
         with open(setup_test) as f:
             content = f.read()
@@ -89,6 +92,7 @@ class TestLog:
 
         item = [{"msgs": "Test errormsg"}]
         labcommand.log_errormsg(item)
+        lablog.flush()
         assert setup_test.is_file()
         with open(setup_test) as f:
             content = f.read()
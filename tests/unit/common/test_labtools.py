@@ -0,0 +1,106 @@
+import time
+import socket
+import asyncio
+from unittest.mock import Mock, patch
+
+import pytest
+
+from labs.common import labtools
+
+
+@pytest.fixture
+def open_port():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(8)
+    yield str(server.getsockname()[1])
+    server.close()
+
+
+@pytest.fixture
+def closed_port():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = str(s.getsockname()[1])
+    s.close()
+    return port
+
+
+def test_probe_hosts_latency(open_port, closed_port):
+    latencies = labtools.probe_hosts(
+        ["127.0.0.1"], [open_port, closed_port], timeout=2
+    )
+
+    assert latencies[("127.0.0.1", open_port)] >= 0
+    assert latencies[("127.0.0.1", closed_port)] is None
+
+
+@pytest.mark.parametrize("wait_closed", [True, False])
+def test_probe_hosts_waits_until_connections_close(wait_closed):
+    """
+    Connections are closed before the event loop.
+    Writers of Python 3.6 do not have wait_closed
+    """
+    closed = []
+    writer = Mock(spec=["close"])
+    if wait_closed:
+        async def wait():
+            closed.append(True)
+
+        writer.wait_closed = wait
+
+    async def open_connection(host, port):
+        return Mock(), writer
+
+    with patch("asyncio.open_connection", open_connection):
+        latencies = labtools.probe_hosts(["host1"], ["22"], timeout=2)
+
+    assert latencies[("host1", "22")] >= 0
+    writer.close.assert_called_once()
+    assert closed == ([True] if wait_closed else [])
+
+
+def test_host_reachable_returns_unreachable_hosts(open_port, closed_port):
+    assert labtools.host_reachable(["127.0.0.1"], open_port) == []
+    assert labtools.host_reachable(["127.0.0.1"], closed_port) == [
+        ("127.0.0.1", closed_port)
+    ]
+
+
+def test_host_reachable_does_not_change_default_timeout(open_port):
+    labtools.host_reachable(["127.0.0.1"], open_port)
+
+    assert socket.getdefaulttimeout() is None
+
+
+def test_probe_hosts_deadline():
+    """
+    The deadline bounds the whole check, even if connections hang
+    """
+    async def hang(host, port):
+        await asyncio.sleep(10)
+
+    start = time.monotonic()
+    with patch("asyncio.open_connection", hang):
+        latencies = labtools.probe_hosts(
+            ["host1", "host2"], ["22"], timeout=10, deadline=0.2
+        )
+
+    assert time.monotonic() - start < 2
+    assert latencies == {("host1", "22"): None, ("host2", "22"): None}
+
+
+def test_check_host_reachable(open_port, closed_port):
+    item = {"hosts": ["127.0.0.1"], "ports": [open_port], "timeout": 2}
+
+    assert labtools.check_host_reachable(item) == 0
+    assert "127.0.0.1" in item["latency"]
+
+    item = {"hosts": ["127.0.0.1"], "ports": [open_port, closed_port]}
+
+    assert labtools.check_host_reachable(item) == 1
+    assert item["failed"]
+    assert item["latency"] == {}
+    assert item["msgs"] == [{
+        "text": f"127.0.0.1 cannot be reached over port {closed_port}"
+    }]
@@ -0,0 +1,213 @@
+import os
+import fcntl
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from labs.common import playbooks
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setenv("RHT_LABS_CACHE_DIR", str(tmp_path / "cache"))
+    manager = playbooks.RunnerManager(max_runs=3)
+    manager.get_course = Mock(return_value=("do000", "1.0.0"))
+    monkeypatch.setattr(playbooks, "_manager", manager)
+    return manager
+
+
+@pytest.fixture
+def ansible_run(monkeypatch):
+    def run(private_data_dir, ident, **kwargs):
+        artifact_dir = os.path.join(private_data_dir, "artifacts", ident)
+        os.makedirs(artifact_dir)
+        return Mock(rc=0, events=[], config=Mock(artifact_dir=artifact_dir))
+
+    run = Mock(side_effect=run)
+    monkeypatch.setattr(playbooks.ansible_runner, "run", run)
+    return run
+
+
+@pytest.fixture
+def discover(tmp_path, monkeypatch):
+    roles = tmp_path / "roles"
+    roles.mkdir()
+    discover = Mock(return_value=[str(roles)])
+    monkeypatch.setattr(playbooks, "discover_roles_path", discover)
+    return discover
+
+
+@pytest.fixture
+def playbook(tmp_path):
+    path = tmp_path / "course" / "ansible" / "start.yml"
+    path.parent.mkdir(parents=True)
+    path.write_text("- hosts: all\n")
+    (path.parent.parent / "inventory").write_text("localhost\n")
+    return path
+
+
+def test_runner_runs_in_project_dir(manager, ansible_run, discover, playbook):
+    cwd = os.getcwd()
+
+    messages = playbooks.Runner(str(playbook)).run(
+        {"name": "value"}, inventory="inventory"
+    )
+
+    assert messages == []
+    assert os.getcwd() == cwd
+    kwargs = ansible_run.call_args.kwargs
+    assert kwargs["project_dir"] == str(playbook.parent.parent)
+    assert kwargs["playbook"] == os.path.join("ansible", "start.yml")
+    assert kwargs["inventory"] == str(playbook.parent.parent / "inventory")
+    assert kwargs["extravars"] == {"name": "value"}
+    assert kwargs["roles_path"] == discover.return_value
+    assert os.path.dirname(kwargs["private_data_dir"]) == \
+        os.path.join(manager.get_data_dir(), "runs")
+
+
+def test_runner_returns_failed_tasks(manager, ansible_run, discover, playbook):
+    ansible_run.side_effect = None
+    ansible_run.return_value = Mock(
+        rc=2,
+        events=[{
+            "event": "runner_on_failed",
+            "event_data": {"host": "servera", "task": "Install",
+                           "res": {"msg": "No package"}},
+        }],
+        config=Mock(artifact_dir="/tmp/artifacts")
+    )
+
+    messages = playbooks.Runner(str(playbook)).run()
+
+    assert messages == ["servera: Install: No package"]
+
+
+def test_course_version_is_read_once(monkeypatch):
+    monkeypatch.setattr(playbooks.labconfig, "get_course_sku", lambda: "DO000")
+    get_version = Mock(return_value="1.0.0")
+    monkeypatch.setattr(playbooks.course, "get_package_version", get_version)
+    manager = playbooks.RunnerManager()
+
+    assert manager.get_course() == ("do000", "1.0.0")
+    manager.get_data_dir()
+    manager.get_course()
+
+    get_version.assert_called_once_with("do000")
+
+
+def test_roles_path_is_cached(manager, discover):
+    assert manager.get_roles_path() == discover.return_value
+    assert manager.get_roles_path() == discover.return_value
+    discover.assert_called_once_with("do000")
+
+
+def test_roles_path_is_saved_per_version(manager, discover):
+    manager.get_roles_path()
+
+    other = playbooks.RunnerManager()
+    other.get_course = manager.get_course
+    assert other.get_roles_path() == discover.return_value
+    discover.assert_called_once()
+
+    other.get_course = Mock(return_value=("do000", "1.0.1"))
+    other.get_roles_path()
+    assert discover.call_count == 2
+
+
+def test_roles_path_is_not_saved_without_version(manager, discover):
+    manager.get_course.return_value = ("do000", None)
+    manager.get_roles_path()
+
+    other = playbooks.RunnerManager()
+    other.get_course = manager.get_course
+    other.get_roles_path()
+
+    assert discover.call_count == 2
+
+
+def test_project_config_and_inventory(
+    manager, ansible_run, discover, playbook
+):
+    project_dir = playbook.parent.parent
+    (project_dir / "ansible.cfg").write_text(
+        "[defaults]\ninventory = ./inventory\n"
+    )
+
+    playbooks.Runner(str(playbook)).run()
+
+    kwargs = ansible_run.call_args.kwargs
+    assert kwargs["envvars"] == {
+        "ANSIBLE_CONFIG": str(project_dir / "ansible.cfg")
+    }
+    assert kwargs["inventory"] == [str(project_dir / "inventory")]
+
+
+def test_project_is_saved_per_version(manager, monkeypatch, playbook):
+    project_dir = str(playbook.parent.parent)
+    discover = Mock(return_value={"config": None, "inventory": None})
+    monkeypatch.setattr(playbooks, "discover_project", discover)
+    manager.get_project(project_dir)
+    manager.get_project(project_dir)
+
+    other = playbooks.RunnerManager()
+    other.get_course = manager.get_course
+    other.get_project(project_dir)
+    discover.assert_called_once_with(project_dir)
+
+    other.get_course = Mock(return_value=("do000", "1.0.1"))
+    other.get_project(project_dir)
+    assert discover.call_count == 2
+
+
+def test_old_runs_are_pruned(manager, ansible_run, playbook):
+    for _ in range(5):
+        manager.run("ansible/start.yml", str(playbook.parent.parent))
+
+    runs = os.path.join(manager.get_data_dir(), "runs")
+    assert len(os.listdir(runs)) == 3
+
+
+def test_runs_in_progress_are_not_pruned(manager, ansible_run, playbook):
+    """
+    Runs of other lab commands lock their directory
+    """
+    running = os.path.join(manager.get_data_dir(), "runs", "running")
+    os.makedirs(running)
+    os.utime(running, (0, 0))
+    run_lock = os.open(running, os.O_RDONLY)
+    fcntl.flock(run_lock, fcntl.LOCK_EX)
+
+    try:
+        for _ in range(5):
+            manager.run("ansible/start.yml", str(playbook.parent.parent))
+    finally:
+        os.close(run_lock)
+
+    assert os.path.isdir(running)
+
+
+def test_playbooks_run_concurrently(manager, ansible_run, playbook):
+    running = threading.Barrier(3, timeout=5)
+
+    def run(private_data_dir, ident, **kwargs):
+        # Fails if the runs do not overlap
+        running.wait()
+        return Mock(rc=0, events=[])
+
+    ansible_run.side_effect = run
+    threads = [
+        threading.Thread(
+            target=manager.run,
+            args=("ansible/start.yml", str(playbook.parent.parent))
+        )
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    idents = {call.kwargs["ident"] for call in ansible_run.call_args_list}
+    assert len(idents) == 3
+    assert not running.broken
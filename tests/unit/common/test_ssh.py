@@ -0,0 +1,103 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from labs.common.commands import ssh
+
+
+@pytest.fixture
+def pool(fake_commands):
+    fake_commands.register("ssh")
+    pool = ssh.SSHConnectionPool()
+    yield pool
+    pool.close()
+
+
+def test_ssh_command_reuses_connections(fake_commands):
+    fake_commands.register("ssh")
+
+    command = ssh.ssh_command("root@servera", "/home/student/.ssh/lab_rsa")
+
+    control_path = ssh.get_pool().get_control_path(
+        "root", "servera", "/home/student/.ssh/lab_rsa"
+    )
+    assert command[:3] == ["ssh", "-i", "/home/student/.ssh/lab_rsa"]
+    assert command[3:] == [
+        "-o", "ControlMaster=no", "-S", control_path, "root@servera"
+    ]
+
+
+def test_ssh_command_starts_the_master(pool, fake_commands):
+    command = pool.ssh_command("root", "servera", "key")
+
+    control_path = pool.get_control_path("root", "servera", "key")
+    assert fake_commands.calls("ssh") == [[
+        "-i", "key", "-M", "-N", "-f",
+        "-o", f"ControlPersist={ssh.CONTROL_PERSIST}",
+        "-S", control_path, "root@servera",
+    ]]
+    assert "-M" not in command
+
+
+def test_masters_start_once_per_key_in_concurrent_commands(
+    pool, fake_commands
+):
+    hosts = ["servera", "serverb"] * 8
+
+    with ThreadPoolExecutor(len(hosts)) as executor:
+        list(executor.map(
+            lambda host: pool.ssh_command("root", host), hosts
+        ))
+
+    masters = [args for args in fake_commands.calls("ssh") if "-M" in args]
+    assert sorted(args[-1] for args in masters) == [
+        "root@servera", "root@serverb"
+    ]
+
+
+def test_commands_connect_directly_if_the_master_fails(fake_commands):
+    fake_commands.register("ssh", returncode=255)
+    pool = ssh.SSHConnectionPool()
+
+    command = pool.ssh_command("root", "servera")
+    pool.ssh_command("root", "servera")
+
+    assert "ControlMaster=no" in command
+    assert len(fake_commands.calls("ssh")) == 1
+    pool.close()
+
+
+def test_one_master_per_user_host_and_key():
+    pool = ssh.SSHConnectionPool()
+
+    path = pool.get_control_path("root", "servera", None)
+
+    assert pool.get_control_path("root", "servera", None) == path
+    assert pool.get_control_path("student", "servera", None) != path
+    assert pool.get_control_path("root", "serverb", None) != path
+    assert pool.get_control_path("root", "servera", "key") != path
+    pool.close()
+
+
+def test_ssh_command_without_user(fake_commands):
+    fake_commands.register("ssh")
+
+    command = ssh.ssh_command("servera")
+
+    assert command[0] == "ssh"
+    assert command[-1] == "servera"
+
+
+def test_close_exits_masters_and_removes_control_dir(fp):
+    pool = ssh.SSHConnectionPool()
+    control_path = pool.get_control_path("root", "servera")
+    open(control_path, "w").close()
+    pool.get_control_path("root", "serverb")
+    fp.register(["ssh", "-S", control_path, "-O", "exit", "root@servera"])
+
+    pool.close()
+
+    assert not os.path.exists(os.path.dirname(control_path))
+    # Only the masters that were started are closed
+    assert len(fp.calls) == 1
@@ -0,0 +1,107 @@
+import sys
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from labs.common.commands.stream import (
+    LogWriter,
+    TailBuffer,
+    TextMatcher,
+    run_streaming,
+)
+
+
+def test__run_streaming__keeps_the_tail_of_the_output():
+    command = [sys.executable, "-c", "print('x' * 100000); print('end')"]
+
+    process = run_streaming(command, prints="END", max_output=10)
+
+    assert process.returncode == 0
+    assert process.stdout == b"xxxxx\nend\n"
+    assert process.truncated
+    assert process.matched
+
+
+def test__run_streaming__stops_on_match():
+    """
+    Commands that never finish can be stopped when the text is found
+    """
+    command = [
+        sys.executable, "-c",
+        "import time\nprint('ready', flush=True)\ntime.sleep(60)"
+    ]
+
+    process = run_streaming(command, prints="ready", stop_on_match=True)
+
+    assert process.matched
+    assert process.stopped
+    assert process.returncode != 0
+
+
+def test__run_streaming__kills_the_command_on_errors():
+    """
+    Commands do not outlive an interrupted lab script
+    """
+    processes = []
+    Popen = subprocess.Popen
+
+    def popen(*args, **kwargs):
+        processes.append(Popen(*args, **kwargs))
+        return processes[-1]
+
+    command = [sys.executable, "-c", "import time\ntime.sleep(60)"]
+    with patch("labs.common.commands.stream.subprocess.Popen", popen), \
+            patch("labs.common.commands.stream._select_streams",
+                  side_effect=KeyboardInterrupt):
+        with pytest.raises(KeyboardInterrupt):
+            run_streaming(command)
+
+    assert processes[0].returncode is not None
+    assert processes[0].stdout.closed
+
+
+def test__run_streaming__not_matched():
+    process = run_streaming(["echo", "hello"], prints="bye")
+
+    assert process.matched is False
+    assert not process.stopped
+
+
+def test__tail_buffer():
+    buffer = TailBuffer(4)
+    buffer.write(b"abc")
+    buffer.write(b"def")
+
+    assert buffer.getvalue() == b"cdef"
+    assert buffer.truncated
+
+
+def test__text_matcher__matches_across_chunks():
+    matcher = TextMatcher("Hello")
+
+    assert not matcher.feed(b"...he")
+    assert matcher.feed(b"LLO world")
+
+
+def test__text_matcher__multibyte_characters_across_chunks():
+    matcher = TextMatcher("café")
+    data = "café".encode()
+
+    assert not matcher.feed(data[:4])
+    assert matcher.feed(data[4:])
+
+
+@patch("labs.common.commands.stream.logging")
+def test__log_writer__writes_blocks(logging):
+    writer = LogWriter("STDOUT", 20, block_size=8)
+
+    writer.write(b"line1\nline2\nline3")
+    writer.close()
+
+    records = [c.args[1] for c in logging.log.call_args_list]
+    assert records == [
+        "\n\nSTDOUT: \n\nline1\n",
+        "\n\nSTDOUT (cont.): \n\nline2\n",
+        "\n\nSTDOUT (cont.): \n\nline3",
+    ]
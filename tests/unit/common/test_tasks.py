@@ -2,6 +2,8 @@
 labs.common.tasks tests
 """
 import os
+import threading
+import subprocess
 from tempfile import NamedTemporaryFile
 from unittest import TestCase
 from unittest.mock import patch
@@ -426,3 +428,108 @@ class TestCheckCommandResult(TestCase):
         common.tasks.check_command_result(item)
 
         assert item["failed"]
+
+
+class TestRunCommand(TestCase):
+
+    """
+    run_command()
+    """
+
+    # Inject the "fake_commands" fixture into the class.
+    # The SSH masters of the hosts are started through the fake ssh
+    @pytest.fixture(autouse=True)
+    def _prepare_fixture(self, fake_commands):
+        fake_commands.register("ssh")
+        self.fake_commands = fake_commands
+        yield
+        common.tasks.ssh.close_connections()
+
+    def run_command(self, hosts, run_log, **kwargs):
+        item = {
+            "hosts": hosts,
+            "username": "root",
+            "command": "uptime",
+            "options": [],
+            "shell": False,
+            "returns": 0,
+            "student_msg": "Check the hosts",
+            **kwargs
+        }
+        with patch("labs.common.tasks.labcommand.run_log", run_log):
+            common.tasks.run_command(item)
+        return item
+
+    def test_runs_hosts_concurrently(self):
+        """
+        The command runs in all the hosts at the same time,
+        reusing SSH connections
+        """
+        barrier = threading.Barrier(3, timeout=5)
+        commands = []
+
+        def run_log(args, **kwargs):
+            barrier.wait()
+            commands.append(args)
+            return subprocess.CompletedProcess(args, 0, b"", b"")
+
+        item = self.run_command(["servera", "serverb", "serverc"], run_log)
+
+        assert item["failed"] is False
+        assert len(commands) == 3
+        for args in commands:
+            assert args[0] == "ssh"
+            assert "ControlMaster=no" in args
+            assert args[-1] == "uptime"
+
+    def test_starts_one_master_per_host(self):
+        """
+        Commands in the same host share a master connection,
+        started by the connection pool instead of by a captured command
+        """
+        commands = []
+
+        def run_log(args, **kwargs):
+            commands.append(args)
+            return subprocess.CompletedProcess(args, 0, b"", b"")
+
+        self.run_command(["servera", "serverb", "servera", "serverb"],
+                         run_log)
+
+        masters = self.fake_commands.calls("ssh")
+        assert sorted(args[-1] for args in masters) == [
+            "root@servera", "root@serverb"
+        ]
+        assert all("-M" in args and "-f" in args for args in masters)
+        assert len(commands) == 4
+        assert not any("-M" in args for args in commands)
+
+    def test_aggregates_failed_hosts(self):
+        """
+        Error messages include the failed hosts
+        """
+        def run_log(args, **kwargs):
+            returncode = 1 if "root@serverb" in args else 0
+            return subprocess.CompletedProcess(args, returncode, b"", b"")
+
+        item = self.run_command(["servera", "serverb"], run_log)
+
+        assert item["failed"] is True
+        assert item["msgs"] == [
+            {"text": "Check the hosts"},
+            {"text": "serverb: Command did not exit with the expected code"},
+            {"text": "serverb: Expected: 0, Received: 1"},
+        ]
+
+    def test_single_host_messages(self):
+        def run_log(args, **kwargs):
+            return subprocess.CompletedProcess(args, 0, b"output", b"")
+
+        item = self.run_command(["localhost"], run_log, prints="expected")
+
+        assert item["failed"] is True
+        assert item["msgs"] == [
+            {"text": "Check the hosts"},
+            {"text": "Command did not print the expected message"},
+            {"text": "'expected' not found in command output"},
+        ]
@@ -1,5 +1,8 @@
+import threading
 from unittest.mock import Mock
 
+import pytest
+
 from labs.common.userinterface import Console
 from labs import watch
 from labs.core.step import LabStep
@@ -108,3 +111,51 @@ def test__on__items__error__raise_error():
         pass
 
     probe.assert_not_called()
+
+
+def test__run_items__parallel_results_in_declared_order():
+    """
+    Parallel steps print their results in declared order,
+    even if they finish in a different order
+    """
+    second_done = threading.Event()
+
+    def first(item):
+        second_done.wait(5)
+
+    def second(item):
+        second_done.set()
+
+    items = [
+        {"label": "First step", "task": first, "parallel_group": "g"},
+        {"label": "Second step", "task": second, "parallel_group": "g"},
+        {"label": "Sequential step"},
+    ]
+
+    console = Console(items, spinner_delay=0)
+    console.echo_item_result = Mock()
+
+    console.run_items()
+
+    calls = console.echo_item_result.call_args_list
+    printed = [c.args[0].label for c in calls]
+    assert printed == ["First step", "Second step", "Sequential step"]
+
+
+def test__run_items__parallel_fatal_step():
+    """
+    A failing fatal parallel step stops the lab script
+    """
+    step3 = Mock()
+
+    items = [
+        {"label": "a", "task": Mock(return_value=True), "fatal": True,
+         "parallel_group": "g"},
+        {"label": "b", "task": Mock(), "parallel_group": "g"},
+        {"label": "c", "task": step3},
+    ]
+
+    with pytest.raises(LabError):
+        Console(items, spinner_delay=0).run_items()
+
+    step3.assert_not_called()
@@ -0,0 +1,128 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from labs.core.step import LabStep
+from labs.core.task.scheduler import (
+    StepScheduler,
+    check_dependencies,
+    get_prerequisites,
+)
+from labs.laberrors import LabError
+
+
+def test__get_prerequisites__parallel_groups():
+    """
+    Steps of a group wait for the previous steps of other groups
+    """
+    steps = [
+        LabStep(label="a", parallel_group="checks"),
+        LabStep(label="b", parallel_group="checks"),
+        LabStep(label="c", parallel_group="setup"),
+        LabStep(label="d", parallel_group="setup"),
+    ]
+
+    assert get_prerequisites(steps) == [set(), set(), {0, 1}, {0, 1}]
+
+
+def test__get_prerequisites__dependencies():
+    """
+    Steps with dependencies only wait for their dependencies
+    """
+    steps = [
+        LabStep(label="a", parallel_group="checks"),
+        LabStep(label="b", parallel_group="checks"),
+        LabStep(label="c", depends_on=["a"]),
+        LabStep(label="outside", depends_on=["previous segment"]),
+    ]
+
+    assert get_prerequisites(steps) == [set(), set(), {0}, set()]
+
+
+def test__check_dependencies__unknown_label():
+    steps = [
+        LabStep(label="a", depends_on=["b"]),
+        LabStep(label="b"),
+    ]
+
+    with pytest.raises(LabError):
+        check_dependencies(steps)
+
+
+def test__scheduler__runs_group_concurrently():
+    """
+    The steps of a parallel group run at the same time
+    """
+    barrier = threading.Barrier(3, timeout=5)
+
+    def task(item):
+        barrier.wait()
+
+    steps = [
+        LabStep(label=f"step {i}", task=task, parallel_group="checks")
+        for i in range(3)
+    ]
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        scheduler = StepScheduler(steps, executor)
+        results = [scheduler.wait_for(i) for i in range(3)]
+
+    assert results == [(False, None)] * 3
+    assert not any(step.failed for step in steps)
+
+
+def test__scheduler__waits_for_dependencies():
+    order = []
+
+    def task(item):
+        order.append(item.label)
+
+    steps = [
+        LabStep(label="a", task=task, parallel_group="g"),
+        LabStep(label="b", task=task, depends_on=["a"]),
+        LabStep(label="c", task=task, depends_on=["b"]),
+    ]
+
+    with ThreadPoolExecutor() as executor:
+        scheduler = StepScheduler(steps, executor)
+        scheduler.wait_for(2)
+
+    assert order == ["a", "b", "c"]
+
+
+def test__scheduler__skips_steps_with_false_condition():
+    steps = [
+        LabStep(label="a", parallel_group="g", condition=lambda: False),
+        LabStep(label="b", parallel_group="g"),
+    ]
+
+    with ThreadPoolExecutor() as executor:
+        scheduler = StepScheduler(steps, executor)
+
+        assert scheduler.wait_for(0) == (True, None)
+        assert scheduler.wait_for(1) == (False, 0)
+
+
+def test__scheduler__does_not_start_steps_after_fatal_failure():
+    """
+    Steps declared after a failed fatal step are not started
+    """
+    executed = []
+
+    def fail(item):
+        item.fail()
+
+    steps = [
+        LabStep(label="a", task=fail, fatal=True, parallel_group="g1"),
+        LabStep(label="b", task=executed.append, parallel_group="g2"),
+    ]
+
+    with ThreadPoolExecutor() as executor:
+        scheduler = StepScheduler(steps, executor)
+        scheduler.wait_for(0)
+
+        with pytest.raises(LabError):
+            scheduler.wait_for(1)
+
+    assert executed == []
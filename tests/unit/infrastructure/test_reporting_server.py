@@ -0,0 +1,158 @@
+"""Test the Reporting API Server (infrastructure/reporting)."""
+
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("flask")
+
+sys.path.insert(0, os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "infrastructure", "reporting"
+))
+
+import server  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "DATABASE", str(tmp_path / "reporting.db"))
+    monkeypatch.setattr(server.app, "_got_first_request", False)
+    yield server.app.test_client()
+
+    while not server._pool.empty():
+        server._pool.get_nowait().close()
+    server._pool_opened = 0
+
+
+def test_post_report(client):
+    response = client.post("/v1/report", json={"sku": "do180"})
+
+    assert response.status_code == 201
+    location = response.headers["Location"]
+    assert client.get(location).get_json() == {"sku": "do180"}
+
+
+def test_post_batch(client):
+    reports = [{"sku": "do180"}, {"sku": "do280"}]
+
+    response = client.post("/v1/reports:batch", json={"reports": reports})
+
+    assert response.status_code == 201
+    assert response.get_json() == {"count": 2}
+    assert client.get("/v1/report/2").get_json() == {"sku": "do280"}
+
+
+def test_post_batch__too_large(client):
+    reports = [{}] * (server.MAX_BATCH_SIZE + 1)
+
+    response = client.post("/v1/reports:batch", json=reports)
+
+    assert response.status_code == 413
+
+
+def test_tables_are_created_once(client):
+    with patch.object(server, "init_db", wraps=server.init_db) as init_db:
+        for _ in range(3):
+            client.post("/v1/report", json={"sku": "do180"})
+
+    init_db.assert_called_once()
+
+
+def test_requests_reuse_pooled_connections(client):
+    for _ in range(3):
+        client.post("/v1/report", json={"sku": "do180"})
+        client.get("/v1/report/1")
+
+    assert server._pool_opened == 1
+    assert server._pool.qsize() == 1
+
+
+@pytest.fixture
+def reports(client):
+    reports = [
+        {"sku": "do180", "action": "start", "duration": duration,
+         "started_at": f"2021-06-0{day} 10:00:00"}
+        for day, duration in ((1, 1.0), (1, 2.0), (2, 3.0), (2, 4.0))
+    ] + [
+        {"sku": "do280", "action": "start", "duration": 10.0,
+         "started_at": "2021-06-02 10:00:00"},
+        {"sku": "do280", "action": "grade",
+         "started_at": "2021-06-02 11:00:00"},
+    ]
+    client.post("/v1/reports:batch", json=reports)
+    return reports
+
+
+def test_stats_count(client, reports):
+    response = client.get("/v1/stats/count?group_by=sku")
+
+    assert response.get_json() == {"results": [
+        {"sku": "do180", "count": 4},
+        {"sku": "do280", "count": 2},
+    ]}
+
+
+def test_stats_count__filters(client, reports):
+    response = client.get(
+        "/v1/stats/count?action=start&since=2021-06-02&until=2021-06-03"
+    )
+
+    assert response.get_json() == {"results": [{"count": 3}]}
+
+
+def test_stats_count__invalid_filters(client, reports):
+    assert client.get("/v1/stats/count?since=never").status_code == 400
+    assert client.get("/v1/stats/count?group_by=record").status_code == 400
+
+
+def test_stats_duration(client, reports):
+    response = client.get("/v1/stats/duration?percentiles=50,75,100")
+
+    assert response.get_json() == {"results": [
+        {"count": 5, "p50": 3.0, "p75": 4.0, "p100": 10.0},
+    ]}
+
+
+def test_stats_duration__groups(client, reports):
+    response = client.get(
+        "/v1/stats/duration?group_by=sku,action&percentiles=25,50"
+    )
+
+    assert response.get_json() == {"results": [
+        {"sku": "do180", "action": "start", "count": 4,
+         "p25": 1.0, "p50": 2.0},
+        {"sku": "do280", "action": "grade", "count": 0,
+         "p25": None, "p50": None},
+        {"sku": "do280", "action": "start", "count": 1,
+         "p25": 10.0, "p50": 10.0},
+    ]}
+
+
+def test_stats_duration__no_reports(client):
+    response = client.get("/v1/stats/duration?percentiles=50")
+
+    assert response.get_json() == {"results": [{"count": 0, "p50": None}]}
+
+
+def test_stats_duration__invalid_percentiles(client):
+    assert client.get("/v1/stats/duration?percentiles=0").status_code == 400
+    assert client.get("/v1/stats/duration?percentiles=x").status_code == 400
+
+
+def test_stats_histogram(client, reports):
+    response = client.get("/v1/stats/histogram?bucket=day&group_by=sku")
+
+    assert response.get_json() == {"results": [
+        {"bucket": "2021-06-01", "sku": "do180", "count": 2,
+         "avg_duration": 1.5},
+        {"bucket": "2021-06-02", "sku": "do180", "count": 2,
+         "avg_duration": 3.5},
+        {"bucket": "2021-06-02", "sku": "do280", "count": 2,
+         "avg_duration": 10.0},
+    ]}
+
+
+def test_stats_histogram__invalid_bucket(client):
+    assert client.get("/v1/stats/histogram?bucket=year").status_code == 400
@@ -1,6 +1,11 @@
+import os
+import json
+import shutil
+import tempfile
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
 
+from labs.system import info
 from labs.system.info import SystemInfo
 
 
@@ -47,6 +52,7 @@ class TestSystemInfo(TestCase):
         }
 
         self.assertDictEqual(expected, system.get_info())
+        mock_virtual_memory.assert_called_once_with()
 
     @patch("socket.gethostname")
     @patch("platform.machine")
@@ -104,3 +110,67 @@ class TestSystemInfo(TestCase):
         assert system.collect_info_memory.called
         assert system.collect_info_platform.called
         assert system.collect_info_python.called
+
+    def test_collect_only_requested_fields(self):
+        system = SystemInfo()
+
+        system.collect(["python", "platform"])
+
+        assert sorted(system.get_info()) == ["platform", "python"]
+
+    def test_collect_unknown_field_fails(self):
+        with self.assertRaises(ValueError):
+            SystemInfo().collect(["disk"])
+
+
+class TestSystemInfoCache(TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.cache_dir, "sysinfo.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    @patch("platform.python_version")
+    def test_static_facts_are_read_from_cache(self, mock_version):
+        mock_version.return_value = "a-version"
+        SystemInfo(self.cache_path).collect(["python"])
+
+        mock_version.return_value = "another-version"
+        system = SystemInfo(self.cache_path).collect(["python"])
+
+        assert system.get_info()["python"]["version"] == "a-version"
+        assert mock_version.call_count == 1
+
+    @patch("platform.python_version")
+    def test_cache_is_invalid_after_reboot(self, mock_version):
+        mock_version.return_value = "a-version"
+        SystemInfo(self.cache_path).collect(["python"])
+
+        mock_version.return_value = "another-version"
+        with patch.object(info, "get_static_cache_key",
+                          return_value={"boot_id": "another-boot"}):
+            system = SystemInfo(self.cache_path).collect(["python"])
+
+        assert system.get_info()["python"]["version"] == "another-version"
+
+    @patch("socket.gethostname")
+    def test_hostname_is_not_cached(self, mock_gethostname):
+        mock_gethostname.return_value = "a-host"
+        SystemInfo(self.cache_path).collect(["platform"])
+
+        mock_gethostname.return_value = "another-host"
+        system = SystemInfo(self.cache_path).collect(["platform"])
+
+        assert system.get_info()["platform"]["hostname"] == "another-host"
+
+    def test_corrupt_cache_is_ignored(self):
+        with open(self.cache_path, "w") as f:
+            f.write("{corrupt")
+
+        system = SystemInfo(self.cache_path).collect(["python"])
+
+        assert "version" in system.get_info()["python"]
+        with open(self.cache_path) as f:
+            assert "python" in json.load(f)["facts"]
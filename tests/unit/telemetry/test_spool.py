@@ -0,0 +1,120 @@
+"""Test the :mod:`labs.telemetry.spool` module."""
+
+import json
+import time
+import datetime
+
+import pytest
+
+from labs.telemetry import spool
+
+
+@pytest.fixture(autouse=True)
+def spool_path(tmp_path, monkeypatch):
+    path = tmp_path / "telemetry.jsonl"
+    monkeypatch.setattr(spool, "get_spool_path", lambda: str(path))
+    return path
+
+
+class FakeUploader:
+
+    def __init__(self, fail_after=None):
+        self.batches = []
+        self.fail_after = fail_after
+
+    def __call__(self, reports):
+        if self.fail_after is not None and len(self.batches) >= \
+                self.fail_after:
+            raise ConnectionError("Telemetry endpoint is unreachable")
+        self.batches.append(reports)
+
+
+def test_flush_uploads_spooled_reports(spool_path):
+    spool.append({"action": "start"})
+    spool.append({"action": "finish"})
+    upload = FakeUploader()
+
+    assert spool.flush(upload) == 2
+    assert upload.batches == [[{"action": "start"}, {"action": "finish"}]]
+    assert spool.flush(upload) == 0
+    assert not spool_path.exists()
+
+
+def test_append_serializes_dates(spool_path):
+    spool.append({"started_at": datetime.datetime(2021, 6, 1, 10, 30)})
+
+    entry = json.loads(spool_path.read_text())
+
+    assert entry["report"] == {"started_at": "2021-06-01T10:30:00"}
+
+
+def test_flush_uploads_in_batches(monkeypatch):
+    monkeypatch.setattr(spool, "BATCH_SIZE", 2)
+    for i in range(5):
+        spool.append({"i": i})
+    upload = FakeUploader()
+
+    assert spool.flush(upload) == 5
+    assert [len(batch) for batch in upload.batches] == [2, 2, 1]
+
+
+def test_flush_keeps_reports_that_fail_to_upload(monkeypatch):
+    monkeypatch.setattr(spool, "BATCH_SIZE", 2)
+    for i in range(5):
+        spool.append({"i": i})
+
+    assert spool.flush(FakeUploader(fail_after=1)) == 2
+
+    upload = FakeUploader()
+    assert spool.flush(upload) == 3
+    assert upload.batches == [[{"i": 2}, {"i": 3}], [{"i": 4}]]
+
+
+def test_flush_evicts_old_reports(monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now - spool.MAX_AGE - 1)
+    spool.append({"action": "old"})
+    monkeypatch.setattr(time, "time", lambda: now)
+    spool.append({"action": "new"})
+    upload = FakeUploader()
+
+    spool.flush(upload)
+
+    assert upload.batches == [[{"action": "new"}]]
+
+
+def test_append_evicts_oldest_reports_when_full(spool_path, monkeypatch):
+    monkeypatch.setattr(spool, "MAX_SPOOL_BYTES", 1000)
+    for i in range(50):
+        spool.append({"i": i})
+    upload = FakeUploader()
+
+    assert spool_path.stat().st_size <= 1000
+    spool.flush(upload)
+    reports = upload.batches[0]
+    assert reports[-1] == {"i": 49}
+    assert {"i": 0} not in reports
+
+
+def test_flush_skips_when_another_process_flushes(spool_path):
+    spool.append({"action": "start"})
+    upload = FakeUploader()
+
+    with spool._locked(f"{spool_path}.flush.lock"):
+        # flock locks are per open file, so the second open file conflicts
+        assert spool.flush(upload) == 0
+
+    assert upload.batches == []
+    assert spool.flush(upload) == 1
+
+
+def test_flush_recovers_reports_of_crashed_flushers(spool_path):
+    crashed = spool_path.parent / f"{spool_path.name}.12345.sending"
+    crashed.write_text(
+        json.dumps({"spooled_at": time.time(), "report": {"i": 1}}) + "\n"
+        + "truncated line"
+    )
+    upload = FakeUploader()
+
+    assert spool.flush(upload) == 1
+    assert not crashed.exists()
@@ -2,6 +2,7 @@ from contextlib import contextmanager
 from datetime import datetime
 from time import sleep
 from unittest.mock import Mock, patch
+from labs import profiler
 from labs.telemetry.upload import http_uploader
 from src.labs import telemetry
 
@@ -169,6 +170,35 @@ def test__telemetry_http_sends_a_post_request(requests):
         requests.post.assert_called_once()
 
 
+def test__telemetry_includes_step_durations_when_enabled():
+    # Given
+    with telementry_enabled_and_config() as config, patch(
+        "src.labs.telemetry.session.includes_step_durations",
+        return_value=True
+    ):
+        # When
+        with telemetry.session(config) as t:
+            with profiler.span("Deploy the application"):
+                pass
+
+    profiler.reset()
+
+    # Then
+    assert list(t.report.step_durations) == ["Deploy the application"]
+
+
+def test__telemetry_excludes_step_durations_by_default():
+    # Given
+    with telementry_enabled_and_config() as config:
+
+        # When
+        with telemetry.session(config) as t:
+            pass
+
+        # Then
+        assert t.report.step_durations is None
+
+
 def fake_uploader():
     return Mock()
 
@@ -0,0 +1,166 @@
+"""Test the :mod:`labs.completion` module."""
+
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+
+from labs import completion
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("RHT_LABS_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def bash_scripts_installed(tmp_path, monkeypatch):
+    """
+    Simulates an environment with traditional lab scripts
+    """
+    bash_completion = tmp_path / "lab-completion"
+    bash_completion.write_text("")
+    rht = tmp_path / "rht"
+    rht.write_text('RHT_COURSE=xx000\nRHT_VMTREE="rhel8.2/x86_64"\n')
+    monkeypatch.setattr(
+        completion, "BASH_COMPLETION_PATH", str(bash_completion)
+    )
+    monkeypatch.setattr(completion, "RHT_PATH", str(rht))
+
+
+def complete_env(monkeypatch, words, cword, shell="bash"):
+    monkeypatch.setenv(completion.COMPLETE_VAR, f"{shell}_complete")
+    monkeypatch.setenv("COMP_WORDS", words)
+    monkeypatch.setenv("COMP_CWORD", str(cword))
+
+
+def test_main__completes_lab_scripts(cache_dir, monkeypatch, capsys):
+    complete_env(monkeypatch, "lab start test-python-lab-", 2)
+
+    assert completion.main() is True
+
+    assert capsys.readouterr().out == "plain,test-python-lab-error\n"
+
+
+def test_main__completes_fish(cache_dir, monkeypatch, capsys):
+    complete_env(monkeypatch, "lab grade test-python-c", "test-python-c",
+                 shell="fish")
+
+    assert completion.main() is True
+
+    assert capsys.readouterr().out == "plain,test-python-classic_grading\n"
+
+
+def test_main__matches_substrings_like_click(cache_dir, monkeypatch, capsys):
+    complete_env(monkeypatch, "lab start lab-err", 2)
+
+    assert completion.main() is True
+
+    assert capsys.readouterr().out == "plain,test-python-lab-error\n"
+
+
+@pytest.mark.parametrize("words,cword", [
+    ("lab ", 1),
+    ("lab select ", 2),
+    ("lab logs -n ", 3),
+    ("lab start 'test", 2),
+])
+def test_main__falls_back_to_click(cache_dir, monkeypatch, words, cword):
+    complete_env(monkeypatch, words, cword)
+
+    assert completion.main() is False
+
+
+def test_main__ignores_other_instructions(monkeypatch):
+    monkeypatch.setenv(completion.COMPLETE_VAR, "bash_source")
+
+    assert completion.main() is False
+
+
+def test_get_lab_scripts__uses_cache(cache_dir):
+    first = completion.get_lab_scripts()
+
+    with patch("labs.labload.loadcache") as loadcache:
+        second = completion.get_lab_scripts()
+
+    loadcache.assert_not_called()
+    assert first == second
+    assert "test-python-lab" in second
+
+
+def test_get_lab_scripts__detects_config_changes(cache_dir, monkeypatch):
+    completion.get_lab_scripts()
+    cache_path = cache_dir / "completion.json"
+    cache = json.loads(cache_path.read_text())
+    cache["config"][1] -= 1
+    cache_path.write_text(json.dumps(cache))
+
+    with patch("labs.labload.loadcache", return_value={}) as loadcache:
+        completion.get_lab_scripts()
+
+    loadcache.assert_called_once()
+
+
+def test_get_bash_scripts__not_installed(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        completion, "BASH_COMPLETION_PATH", str(tmp_path / "missing")
+    )
+
+    assert completion.get_bash_scripts() == []
+
+
+def test_get_bash_scripts__refreshes_when_missing(
+    cache_dir, bash_scripts_installed
+):
+    with patch(
+        "labs.labload.fetch_bash_scripts", return_value=["bash-lab"]
+    ) as fetch:
+        assert completion.get_bash_scripts(background=False) == ["bash-lab"]
+        assert completion.get_bash_scripts(background=False) == ["bash-lab"]
+
+    fetch.assert_called_once()
+
+
+def test_get_bash_scripts__refreshes_outdated_cache_in_background(
+    cache_dir, bash_scripts_installed
+):
+    with patch("labs.labload.fetch_bash_scripts", return_value=["bash-lab"]):
+        completion.refresh_bash_scripts()
+
+    cache_path = cache_dir / "bash-scripts.json"
+    cache = json.loads(cache_path.read_text())
+    cache["fetched_at"] = time.time() - completion.BASH_SCRIPTS_TTL - 1
+    cache_path.write_text(json.dumps(cache))
+
+    with patch(
+        "labs.completion._refresh_bash_scripts_in_background"
+    ) as refresh, patch("labs.labload.fetch_bash_scripts") as fetch:
+        scripts = completion.get_bash_scripts()
+
+    refresh.assert_called_once()
+    fetch.assert_not_called()
+    assert scripts == ["bash-lab"]
+
+
+def test_refresh_bash_scripts__keeps_scripts_on_error(
+    cache_dir, bash_scripts_installed
+):
+    with patch("labs.labload.fetch_bash_scripts", return_value=["bash-lab"]):
+        completion.refresh_bash_scripts()
+
+    with patch(
+        "labs.labload.fetch_bash_scripts", side_effect=OSError("offline")
+    ):
+        assert completion.refresh_bash_scripts() == ["bash-lab"]
+
+
+@pytest.mark.parametrize("incomplete,expected", [
+    (None, True),
+    ("", True),
+    ("lab-err", True),
+    ("other", False),
+])
+def test_matches(incomplete, expected):
+    assert completion.matches("test-python-lab-error", incomplete) is expected
@@ -1,6 +1,10 @@
 import os
 from tempfile import TemporaryDirectory
-from src.labs.labconfig import ConfigError, gencfg, loadcfg
+from unittest.mock import patch
+
+import pytest
+
+from src.labs.labconfig import ConfigError, gencfg, loadcfg, savecfg
 
 
 def test_configerror_message():
@@ -31,3 +35,75 @@ def test_gencfg_uses_default_log_path():
         # Then the config uses /tmp/log/labs/ as default logging path
         config = loadcfg(filepath)
         assert config["rhtlab"]["logging"]["path"] == "/tmp/log/labs/"
+
+
+def test_loadcfg_parses_the_file_once():
+    """
+    loadcfg caches the parsed file while it does not change
+    """
+    # Given a tmp config file
+    with TemporaryDirectory() as tempdir:
+        filepath = os.path.join(tempdir, "config.yaml")
+        gencfg(filepath, "SKU123")
+        loadcfg(filepath)
+
+        # When the config is loaded again
+        with patch("src.labs.labconfig._parsecfg") as parsecfg:
+            config = loadcfg(filepath)
+
+        # Then the file is not parsed again
+        parsecfg.assert_not_called()
+        assert config["rhtlab"]["course"]["sku"] == "sku123"
+
+
+def test_loadcfg_returns_a_copy():
+    """
+    Modifying the loaded config does not modify the cache
+    """
+    with TemporaryDirectory() as tempdir:
+        filepath = os.path.join(tempdir, "config.yaml")
+        gencfg(filepath, "SKU123")
+
+        loadcfg(filepath)["rhtlab"]["course"]["sku"] = "other"
+
+        assert loadcfg(filepath)["rhtlab"]["course"]["sku"] == "sku123"
+
+
+def test_savecfg_invalidates_the_cache():
+    """
+    loadcfg returns the saved config, even if the file size does not change
+    """
+    with TemporaryDirectory() as tempdir:
+        filepath = os.path.join(tempdir, "config.yaml")
+        gencfg(filepath, "SKU123")
+        config = loadcfg(filepath)
+
+        config["rhtlab"]["course"]["sku"] = "sku456"
+        savecfg(config, filepath)
+
+        assert loadcfg(filepath)["rhtlab"]["course"]["sku"] == "sku456"
+
+
+def test_loadcfg_detects_external_changes():
+    """
+    The cache is invalidated when the file changes on disk
+    """
+    with TemporaryDirectory() as tempdir:
+        filepath = os.path.join(tempdir, "config.yaml")
+        gencfg(filepath, "SKU123")
+        loadcfg(filepath)
+
+        with open(filepath, "w") as f:
+            f.write("rhtlab:\n  course:\n    sku: do378\n")
+
+        assert loadcfg(filepath)["rhtlab"]["course"]["sku"] == "do378"
+
+
+def test_loadcfg_invalid_format():
+    with TemporaryDirectory() as tempdir:
+        filepath = os.path.join(tempdir, "config.yaml")
+        with open(filepath, "w") as f:
+            f.write("- not a config\n")
+
+        with pytest.raises(ConfigError):
+            loadcfg(filepath)
@@ -1,5 +1,10 @@
-from unittest.mock import patch
-from labs.labload import loadcache
+import os
+from unittest.mock import Mock, patch
+
+import pytest
+
+from labs import labload
+from labs.labload import get_index_path, loadcache
 
 
 @patch("labs.labconfig.loadcfg")
@@ -18,3 +23,127 @@ def test_logdir(loadcfg):
 
     # Then the cache is an empty dictionary
     assert cache == {}
+
+
+def test_loadcache__finds_testcourse_scripts():
+    """
+    loadcache() returns the lab scripts of the active course
+    """
+    cache = loadcache()
+
+    assert cache["test-python-lab"] == {
+        "class": "PythonLabTest",
+        "module": "test_python_lab"
+    }
+
+
+def test_loadcache__reuses_index(tmp_path, monkeypatch):
+    """
+    loadcache() only imports the course modules when the index is missing
+    """
+    monkeypatch.setenv("RHT_LABS_CACHE_DIR", str(tmp_path))
+
+    first = loadcache()
+
+    with patch("labs.labload._discover_course_scripts") as discover_scripts:
+        second = loadcache()
+
+    discover_scripts.assert_not_called()
+    assert first == second
+    assert os.path.isfile(get_index_path("ts000"))
+
+
+def test_loadcache__rebuilds_outdated_index(tmp_path, monkeypatch):
+    """
+    loadcache() rebuilds the index when the course package changes
+    """
+    monkeypatch.setenv("RHT_LABS_CACHE_DIR", str(tmp_path))
+    loadcache()
+
+    with patch(
+        "labs.labload._get_course_fingerprint", return_value="changed"
+    ), patch(
+        "labs.labload._discover_course_scripts", return_value={}
+    ) as discover_scripts:
+        loadcache()
+
+    discover_scripts.assert_called_once()
+
+
+def test_loadcache__static_discovery_does_not_import(tmp_path, monkeypatch):
+    """
+    loadcache() does not import the course modules
+    when the lab scripts can be found statically
+    """
+    monkeypatch.setenv("RHT_LABS_CACHE_DIR", str(tmp_path))
+
+    with patch("labs.labload._import_course_scripts") as import_scripts:
+        cache = loadcache()
+
+    import_scripts.assert_not_called()
+    assert "test-python-lab" in cache
+
+
+def test_loadcache__import_discovery(tmp_path, monkeypatch):
+    """
+    loadcache() finds the same lab scripts with both discovery modes
+    """
+    monkeypatch.setenv("RHT_LABS_CACHE_DIR", str(tmp_path))
+    static = loadcache()
+
+    monkeypatch.setenv("RHT_LABS_DISCOVERY", "import")
+    imported = loadcache()
+
+    assert static == imported
+
+
+def test_loadcache__rebuilds_index_when_subpackage_changes(
+    tmp_path, monkeypatch
+):
+    """
+    loadcache() rebuilds the index when a file of a subpackage changes
+    """
+    monkeypatch.setenv("RHT_LABS_CACHE_DIR", str(tmp_path / "cache"))
+    package = tmp_path / "tmpcourse"
+    (package / "steps").mkdir(parents=True)
+    (package / "__init__.py").write_text("")
+    (package / "steps" / "__init__.py").write_text("")
+    base = package / "steps" / "base.py"
+    base.write_text("STEPS = []\n")
+    monkeypatch.setattr(labload.labconfig, "get_course_sku",
+                        lambda: "tmpcourse")
+    monkeypatch.setattr(labload, "get_package_locations",
+                        lambda course: [str(package)])
+
+    with patch(
+        "labs.labload._discover_course_scripts", return_value={}
+    ) as discover_scripts:
+        loadcache()
+        loadcache()
+        assert discover_scripts.call_count == 1
+
+        base.write_text("STEPS = ['changed']\n")
+        loadcache()
+
+    assert discover_scripts.call_count == 2
+
+
+def test_import_grading_library__does_not_hide_script_errors(monkeypatch):
+    """
+    Errors raised when creating the lab script are not reported
+    as a missing grading library
+    """
+    class BrokenLab:
+        def __init__(self):
+            raise AttributeError("bug in the lab script")
+
+    monkeypatch.setattr(labload, "loadcache", lambda: {
+        "broken-lab": {"class": "BrokenLab", "module": "broken_lab"}
+    })
+    monkeypatch.setattr(labload.labconfig, "get_course_sku", lambda: "xx000")
+    monkeypatch.setattr("labs.lablog.lablog_init", Mock())
+    monkeypatch.setattr(labload.importlib, "import_module",
+                        lambda name: Mock(BrokenLab=BrokenLab))
+
+    with pytest.raises(AttributeError, match="bug in the lab script"):
+        labload.import_grading_library({}, "broken-lab")
@@ -12,6 +12,7 @@ import pathlib
 import logging
 import datetime
 import sys
+import subprocess
 
 import labs.lablog
 
@@ -40,6 +41,7 @@ def test_logdir(setup_test):
     logging.critical("==MSG==")
 
     assert expected_file.is_file()
+    labs.lablog.flush()
     with open(expected_file) as f:
         assert "==MSG==" in f.read()
 
@@ -55,6 +57,7 @@ def test_lognamesubst(setup_test):
     logging.critical("==MSG==")
 
     assert expected_file.is_file()
+    labs.lablog.flush()
     with open(expected_file) as f:
         assert "==MSG==" in f.read()
 
@@ -71,6 +74,7 @@ def test_logdatetime(setup_test):
     logging.critical("==MSG==")
 
     assert expected_file.is_file()
+    labs.lablog.flush()
     with open(expected_file) as f:
         assert "==MSG==" in f.read()
 
@@ -91,6 +95,7 @@ def test_loglevel(setup_test):
     logging.critical("==CRITICAL MSG==")
 
     assert expected_file.is_file()
+    labs.lablog.flush()
     with open(expected_file) as f:
         content = f.read()
     assert "==DEBUG MSG==" not in content
@@ -113,6 +118,7 @@ def test_lognocapture(setup_test):
     print("==STDERR OUTPUT==", file=sys.stderr)
 
     assert expected_file.is_file()
+    labs.lablog.flush()
     with open(expected_file) as f:
         content = f.read()
     assert "==MSG==" in content
@@ -134,6 +140,7 @@ def test_logcapture(setup_test):
     print("==STDERR OUTPUT==", file=sys.stderr)
 
     assert expected_file.is_file()
+    labs.lablog.flush()
     with open(expected_file) as f:
         content = f.read()
     assert "==MSG==" in content
@@ -155,6 +162,7 @@ def test_logcapturedebug(setup_test):
     print("==STDERR OUTPUT==", file=sys.stderr)
 
     assert expected_file.is_file()
+    labs.lablog.flush()
     with open(expected_file) as f:
         content = f.read()
     assert "==MSG==" in content
@@ -175,6 +183,7 @@ def test_logcapturecmd(setup_test):
     labs.lablog.run_capture(["cat", "DONOTEXIST", "/etc/hosts"])
 
     assert expected_file.is_file()
+    labs.lablog.flush()
     with open(expected_file) as f:
         content = f.read()
     assert "==MSG==" in content
@@ -191,3 +200,180 @@ def remove_root_logger_handlers():
     """
     logger = logging.getLogger()
     logger.handlers = []
+
+
+def test_run_capture_returns_completed_process(setup_test):
+    """Captured commands keep the subprocess.run return contract."""
+    (config, lab_name) = setup_test
+    config["rhtlab"]["logging"]["path"] += "/"
+    config["rhtlab"]["logging"]["capture_output"] = True
+    labs.lablog.lablog_init(config, lab_name)
+
+    process = labs.lablog.run_capture(["sh", "-c", "echo héllo; exit 3"])
+
+    assert process.returncode == 3
+    assert process.stdout is None
+    with pytest.raises(subprocess.CalledProcessError):
+        labs.lablog.run_capture(["false"], check=True)
+    with pytest.raises(subprocess.TimeoutExpired):
+        labs.lablog.run_capture(["sleep", "10"], timeout=0.1)
+
+    labs.lablog.flush()
+    log_path = pathlib.Path(config["rhtlab"]["logging"]["path"]) / lab_name
+    assert "héllo" in log_path.read_text()
+
+
+def test_log_writer_buffers_writes(setup_test):
+    """Records are written by the log writer, and drained by flush()."""
+    (config, lab_name) = setup_test
+    config["rhtlab"]["logging"]["path"] += "/"
+    labs.lablog.lablog_init(config, lab_name)
+    log_path = pathlib.Path(config["rhtlab"]["logging"]["path"]) / lab_name
+
+    for i in range(1000):
+        logging.info(f"==RECORD {i}==")
+    labs.lablog.flush()
+
+    assert labs.lablog._log_listener.running
+    assert "==RECORD 999==" in log_path.read_text()
+
+
+def test_log_writer_stops_cleanly(setup_test):
+    """Stopping the log writer writes the pending records."""
+    (config, lab_name) = setup_test
+    config["rhtlab"]["logging"]["path"] += "/"
+    labs.lablog.lablog_init(config, lab_name)
+    log_path = pathlib.Path(config["rhtlab"]["logging"]["path"]) / lab_name
+
+    listener = labs.lablog._log_listener
+    logging.critical("==LAST==")
+    labs.lablog._stop_log_writer()
+
+    assert not listener.running
+    assert "==LAST==" in log_path.read_text()
+    # Flushing a stopped log writer does not wait for it
+    labs.lablog.flush()
+
+
+def test_log_rotation(setup_test):
+    """Log files are rotated and compressed when they grow too large."""
+    (config, lab_name) = setup_test
+    log_dir = pathlib.Path(config["rhtlab"]["logging"]["path"])
+    config["rhtlab"]["logging"].update({
+        "path": str(log_dir) + "/",
+        "max_bytes": "1K",
+        "backup_count": 3,
+        "compress": "gzip",
+    })
+    labs.lablog.lablog_init(config, lab_name)
+
+    for i in range(200):
+        logging.info(f"==RECORD {i}==")
+        if i % 10 == 0:
+            labs.lablog.flush()
+    labs.lablog.flush()
+
+    log_path = log_dir / lab_name
+    assert log_path.stat().st_size <= 2048
+    assert sorted(p.name for p in log_dir.glob(f"{lab_name}.*")) == [
+        f"{lab_name}.1.gz", f"{lab_name}.2.gz", f"{lab_name}.3.gz",
+    ]
+    lines = labs.lablog.read_log_lines(config["rhtlab"]["logging"], lab_name)
+    assert "==RECORD 199==" in lines[-1]
+    assert any("==RECORD 180==" in line for line in lines)
+
+
+def test_log_rotation_concurrent_processes(setup_test):
+    """Several processes can append to a rotated log file."""
+    (config, lab_name) = setup_test
+    logging_config = config["rhtlab"]["logging"]
+    logging_config.update({
+        "path": logging_config["path"] + "/all.log",
+        "max_bytes": 4096,
+        "backup_count": 1000,
+    })
+    script = (
+        "import logging, sys\n"
+        "import labs.lablog\n"
+        f"config = {config!r}\n"
+        "labs.lablog.lablog_init(config, sys.argv[1])\n"
+        "for i in range(300):\n"
+        "    logging.info(f'=={sys.argv[1]} {i}==')\n"
+        "    if i % 5 == 0:\n"
+        "        labs.lablog.flush()\n"
+    )
+
+    processes = [
+        subprocess.Popen([sys.executable, "-c", script, f"writer{n}"])
+        for n in range(3)
+    ]
+    for process in processes:
+        assert process.wait(60) == 0
+
+    lines = labs.lablog.read_log_lines(logging_config, None)
+    for n in range(3):
+        for i in range(300):
+            expected = f"==writer{n} {i}=="
+            assert sum(expected in line for line in lines) == 1
+
+
+def test_rotating_file_keeps_the_lock_file_open(tmp_path):
+    """The lock file is only reopened when the log file is reopened."""
+    log_file = labs.lablog._RotatingFile(tmp_path / "lab.log", 100, 2)
+
+    log_file.write("first\n")
+    lock = log_file._lock_file
+    log_file.write("second\n")
+    assert log_file._lock_file is lock
+
+    # Another process rotates the log file
+    (tmp_path / "lab.log").rename(tmp_path / "lab.log.1")
+    log_file.write("third\n")
+    log_file.write("fourth\n")
+    assert log_file._lock_file is not lock
+    log_file.close()
+
+    assert (tmp_path / "lab.log").read_text() == "third\nfourth\n"
+
+
+def test_rotating_file_without_fcntl(tmp_path, monkeypatch):
+    """Log files are rotated without locks where fcntl is not available."""
+    monkeypatch.setattr(labs.lablog, "fcntl", None)
+    log_file = labs.lablog._RotatingFile(tmp_path / "lab.log", 10, 2)
+
+    log_file.write("0123456789\n")
+    log_file.write("abc\n")
+    log_file.close()
+
+    assert (tmp_path / "lab.log").read_text() == "abc\n"
+    assert (tmp_path / "lab.log.1").read_text() == "0123456789\n"
+    assert not (tmp_path / ".lab.log.lock").exists()
+
+
+def test_log_rotation_invalid_config():
+    with pytest.raises(ValueError):
+        labs.lablog.configure_rotation({"max_bytes": "lots"})
+    with pytest.raises(ValueError):
+        labs.lablog.configure_rotation({"max_bytes": 10, "compress": "zip"})
+    assert labs.lablog.configure_rotation({}) is None
+    assert labs.lablog.parse_size("10M") == 10 * 1024 * 1024
+
+
+@pytest.mark.parametrize("has_fcntl", [True, False])
+def test_rotating_file_after_removing_the_log_directory(
+    tmp_path, monkeypatch, has_fcntl
+):
+    """The open file is kept when the log directory is removed."""
+    if not has_fcntl:
+        monkeypatch.setattr(labs.lablog, "fcntl", None)
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    log_file = labs.lablog._RotatingFile(log_dir / "lab.log", 10, 2)
+    log_file.write("0123456789\n")
+
+    shutil.rmtree(log_dir)
+    log_file.write("abc\n")
+    log_file.write("def\n")
+
+    assert not log_file.file.closed
+    log_file.close()
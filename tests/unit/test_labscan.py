@@ -0,0 +1,200 @@
+"""Test the :mod:`labs.labscan` module."""
+
+import textwrap
+
+import pytest
+
+from labs import labscan
+
+
+@pytest.fixture
+def course(tmp_path):
+    """
+    Creates a course package in a temporary directory
+    and returns a function to add modules to the package
+    """
+    package = tmp_path / "xx000"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+
+    def add_module(name, source):
+        (package / f"{name}.py").write_text(textwrap.dedent(source))
+
+    return str(package), add_module
+
+
+def test_scan__finds_direct_subclasses(course):
+    location, add_module = course
+    add_module("my-ge", """
+        from labs.activities import GuidedExercise
+
+        class MyGE(GuidedExercise):
+            __LAB__ = "my-ge"
+    """)
+
+    result = labscan.scan("xx000", [location])
+
+    assert result.scripts["my-ge"] == {
+        "my-ge": {"class": "MyGE", "module": "my-ge"}
+    }
+    assert result.dynamic == []
+
+
+def test_scan__uses_class_name_without_lab_attribute(course):
+    location, add_module = course
+    add_module("my-lab", """
+        from labs import grading
+
+        class MyLab(grading.Default):
+            pass
+    """)
+
+    result = labscan.scan("xx000", [location])
+
+    assert "MyLab" in result.scripts["my-lab"]
+
+
+def test_scan__finds_subclasses_of_package_classes(course):
+    location, add_module = course
+    add_module("common", """
+        from labs.grading import Default
+
+        class CourseBase(Default):
+            pass
+    """)
+    add_module("relative", """
+        from .common import CourseBase
+
+        class Relative(CourseBase):
+            __LAB__ = "relative"
+    """)
+    add_module("absolute", """
+        from xx000 import common
+
+        class Absolute(common.CourseBase):
+            __LAB__ = "absolute"
+    """)
+
+    result = labscan.scan("xx000", [location])
+
+    assert "relative" in result.scripts["relative"]
+    assert "absolute" in result.scripts["absolute"]
+
+
+def test_scan__ignores_other_classes(course):
+    location, add_module = course
+    add_module("helpers", """
+        from abc import ABC
+
+        class Helper(ABC):
+            __LAB__ = "not-a-lab"
+
+        class MyError(Exception):
+            pass
+    """)
+
+    result = labscan.scan("xx000", [location])
+
+    assert result.scripts["helpers"] == {}
+
+
+def test_scan__diamond_inheritance(course):
+    """
+    Bases shared by several branches of the hierarchy are not cycles
+    """
+    location, add_module = course
+    add_module("diamond", """
+        from labs.grading import Default
+
+        class Base(Default):
+            pass
+
+        class Left(Base):
+            pass
+
+        class Right(Base):
+            pass
+
+        class Diamond(Left, Right):
+            __LAB__ = "diamond"
+
+        class Mixin:
+            pass
+
+        class First(Mixin):
+            pass
+
+        class Second(Mixin):
+            pass
+
+        class Helper(First, Second):
+            pass
+    """)
+
+    result = labscan.scan("xx000", [location])
+
+    assert result.dynamic == []
+    assert "diamond" in result.scripts["diamond"]
+    assert "Helper" not in result.scripts["diamond"]
+
+
+def test_scan__ignores_other_framework_classes(course):
+    location, add_module = course
+    add_module("console", """
+        from labs.common.userinterface import Console
+
+        class MyConsole(Console):
+            pass
+    """)
+
+    result = labscan.scan("xx000", [location])
+
+    assert result.scripts["console"] == {}
+    assert result.dynamic == []
+
+
+@pytest.mark.parametrize("source", [
+    """
+    from other_pkg import Default
+
+    class MyDefault(Default):
+        __LAB__ = "dynamic"
+    """,
+    """
+    from labs.activities import Lab
+
+    NAME = "dynamic"
+
+    class MyLab(Lab):
+        __LAB__ = NAME
+    """,
+    """
+    from labs.activities import Lab
+
+    class MyLab(make_base(Lab)):
+        __LAB__ = "dynamic"
+    """,
+    """
+    from labs.activities import *
+
+    class MyLab(Lab):
+        __LAB__ = "dynamic"
+    """,
+    """
+    try:
+        from labs.activities import Lab
+
+        class MyLab(Lab):
+            __LAB__ = "dynamic"
+    except ImportError:
+        pass
+    """,
+])
+def test_scan__reports_dynamic_modules(course, source):
+    location, add_module = course
+    add_module("dynamic", source)
+
+    result = labscan.scan("xx000", [location])
+
+    assert result.dynamic == ["dynamic"]
+    assert "dynamic" not in result.scripts
@@ -0,0 +1,234 @@
+"""Test the :mod:`labs.logreader` module."""
+
+import io
+import os
+import gzip
+import datetime
+import threading
+
+import pytest
+
+from labs import logreader
+
+
+def record(time, script, message):
+    return f"2021-06-01 {time},123:{script}:INFO:lab.py(10)  {message}\n"
+
+
+LOG = (
+    "header without prefix\n"
+    + record("10:00:00", "lab-one", "one start")
+    + record("10:01:00", "lab-two", "two start")
+    + "Traceback (most recent call last):\n"
+    + "  two traceback\n"
+    + record("10:02:00", "lab-one", "one end")
+    + record("10:03:00", "lab-two", "two end")
+)
+
+
+def as_file(text: str):
+    return io.BytesIO(text.encode())
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 64, 1024])
+def test_iter_lines_reversed(block_size):
+    f = as_file("one\ntwo\n\nthree\n")
+
+    lines = list(logreader.iter_lines_reversed(f, block_size=block_size))
+
+    assert lines == [b"three", b"", b"two", b"one"]
+
+
+def test_iter_lines_reversed_without_final_line_break():
+    lines = list(logreader.iter_lines_reversed(as_file("one\ntwo"), None, 2))
+
+    assert lines == [b"two", b"one"]
+
+
+def test_iter_lines_reversed_empty_file():
+    assert list(logreader.iter_lines_reversed(as_file(""))) == []
+
+
+def test_iter_lines_reversed_from_position():
+    f = as_file("one\ntwo\nthree\n")
+
+    lines = list(logreader.iter_lines_reversed(f, end=8))
+
+    assert lines == [b"two", b"one"]
+
+
+def test_tail_lines():
+    lines = logreader.tail_lines(as_file(LOG), 3)
+
+    assert lines == LOG.splitlines(keepends=True)[-3:]
+
+
+def test_tail_lines_more_than_available():
+    lines = logreader.tail_lines(as_file(LOG), 100)
+
+    assert "".join(lines) == LOG
+
+
+def test_tail_lines_reads_from_the_end():
+    f = as_file("x\n" * 1_000_000 + "last\n")
+    reads = []
+    read = f.read
+
+    def counting_read(size):
+        reads.append(size)
+        return read(size)
+
+    f.read = counting_read
+
+    assert logreader.tail_lines(f, 1) == ["last\n"]
+    assert sum(reads) <= logreader.BLOCK_SIZE
+
+
+def test_tail_lines_filters_script():
+    log_filter = logreader.LogFilter(script="lab-two")
+
+    lines = logreader.tail_lines(as_file(LOG), 100, log_filter)
+
+    assert lines == [
+        record("10:01:00", "lab-two", "two start"),
+        "Traceback (most recent call last):\n",
+        "  two traceback\n",
+        record("10:03:00", "lab-two", "two end"),
+    ]
+
+
+def test_tail_lines_filters_since():
+    since = datetime.datetime(2021, 6, 1, 10, 1, 30)
+    log_filter = logreader.LogFilter(since=since)
+
+    lines = logreader.tail_lines(as_file(LOG), 100, log_filter)
+
+    assert lines == [
+        record("10:02:00", "lab-one", "one end"),
+        record("10:03:00", "lab-two", "two end"),
+    ]
+
+
+def test_tail_lines_filters_script_and_since():
+    since = datetime.datetime(2021, 6, 1, 10, 0, 30)
+    log_filter = logreader.LogFilter("lab-one", since)
+
+    lines = logreader.tail_lines(as_file(LOG), 100, log_filter)
+
+    assert lines == [record("10:02:00", "lab-one", "one end")]
+
+
+def test_parse_since_timestamp():
+    assert logreader.parse_since("2021-06-01 10:30") == \
+        datetime.datetime(2021, 6, 1, 10, 30)
+    assert logreader.parse_since("2021-06-01") == \
+        datetime.datetime(2021, 6, 1)
+
+
+def test_parse_since_relative():
+    before = datetime.datetime.now()
+
+    since = logreader.parse_since("10m")
+
+    expected = before - datetime.timedelta(minutes=10)
+    assert abs((since - expected).total_seconds()) < 5
+
+
+def test_parse_since_invalid():
+    with pytest.raises(ValueError):
+        logreader.parse_since("yesterday")
+
+
+def test_follow_lines(tmp_path):
+    path = tmp_path / "lab.log"
+    path.write_text(record("10:00:00", "lab-one", "old"))
+    offset = path.stat().st_size
+    received = []
+    done = threading.Event()
+
+    def follow():
+        log_filter = logreader.LogFilter(script="lab-two")
+        for line in logreader.follow_lines(
+            str(path), offset, log_filter, done.is_set, poll_interval=0.01
+        ):
+            received.append(line)
+            if "end" in line:
+                done.set()
+
+    thread = threading.Thread(target=follow)
+    thread.start()
+    with open(path, "a") as f:
+        f.write(record("10:01:00", "lab-one", "ignored"))
+        f.write(record("10:02:00", "lab-two", "start"))
+        f.flush()
+        f.write("  continuation\n")
+        f.write(record("10:03:00", "lab-two", "end"))
+    thread.join(5)
+    done.set()
+
+    assert received == [
+        record("10:02:00", "lab-two", "start"),
+        "  continuation\n",
+        record("10:03:00", "lab-two", "end"),
+    ]
+
+
+def test_follow_lines_truncated_file(tmp_path):
+    path = tmp_path / "lab.log"
+    path.write_text("old line\nanother old line\n")
+    offset = path.stat().st_size
+    path.write_text("new\n")
+
+    lines = logreader.follow_lines(str(path), offset, poll_interval=0.01)
+
+    assert next(lines) == "new\n"
+
+
+def test_tail_log_reads_rotated_segments(tmp_path):
+    path = tmp_path / "lab.log"
+    with gzip.open(tmp_path / "lab.log.2.gz", "wt") as f:
+        f.write(record("10:00:00", "lab-one", "oldest"))
+    (tmp_path / "lab.log.1").write_text(record("10:01:00", "lab-two", "old"))
+    path.write_text(record("10:02:00", "lab-one", "new"))
+
+    assert logreader.tail_log(path, None) == [
+        record("10:00:00", "lab-one", "oldest"),
+        record("10:01:00", "lab-two", "old"),
+        record("10:02:00", "lab-one", "new"),
+    ]
+    assert logreader.tail_log(path, 2, logreader.LogFilter("lab-one")) == [
+        record("10:00:00", "lab-one", "oldest"),
+        record("10:02:00", "lab-one", "new"),
+    ]
+
+
+def test_get_segments(tmp_path):
+    for name in ["lab.log", "lab.log.10.gz", "lab.log.2.gz", "lab.log.1",
+                 "other.log.1", "lab.logs"]:
+        (tmp_path / name).touch()
+
+    segments = logreader.get_segments(tmp_path / "lab.log")
+
+    assert segments == [
+        str(tmp_path / "lab.log.1"),
+        str(tmp_path / "lab.log.2.gz"),
+        str(tmp_path / "lab.log.10.gz"),
+    ]
+
+
+def test_follow_lines_rotated_file(tmp_path):
+    path = tmp_path / "lab.log"
+    path.write_text("")
+    lines = logreader.follow_lines(str(path), 0, poll_interval=0.01)
+
+    with open(path, "a") as f:
+        f.write("first\n")
+    assert next(lines) == "first\n"
+
+    with open(path, "a") as f:
+        f.write("before rotation\n")
+    os.replace(path, tmp_path / "lab.log.1")
+    path.write_text("after rotation\n")
+
+    assert next(lines) == "before rotation\n"
+    assert next(lines) == "after rotation\n"
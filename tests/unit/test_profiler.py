@@ -0,0 +1,131 @@
+"""Test the :mod:`labs.profiler` module."""
+
+import json
+import time
+import threading
+
+import pytest
+
+from labs import profiler
+from labs.common.userinterface import Console
+from labs.ui.step import Step
+
+
+@pytest.fixture(autouse=True)
+def enabled_profiler():
+    profiler.reset()
+    profiler.enable()
+    yield
+    profiler.reset()
+
+
+def test_span_records_duration():
+    with profiler.span("Sleep", "step"):
+        time.sleep(0.01)
+
+    spans = profiler.get_spans()
+
+    assert [(s.name, s.category) for s in spans] == [("Sleep", "step")]
+    assert spans[0].duration >= 0.01
+
+
+def test_span_records_failed_blocks():
+    with pytest.raises(RuntimeError):
+        with profiler.span("Fail"):
+            raise RuntimeError()
+
+    assert [s.name for s in profiler.get_spans()] == ["Fail"]
+
+
+def test_disabled_profiler_records_nothing():
+    profiler.reset()
+
+    with profiler.span("Ignored"):
+        pass
+    profiler.record("Ignored", "step", time.monotonic())
+
+    assert profiler.get_spans() == []
+
+
+def test_spans_are_bounded(monkeypatch):
+    monkeypatch.setattr(profiler, "MAX_SPANS", 3)
+
+    for _ in range(5):
+        profiler.record("Step", "step", time.monotonic())
+
+    assert len(profiler.get_spans()) == 3
+
+
+def test_summarize_sorts_by_total_time():
+    now = time.monotonic()
+    profiler.record("fast", "step", now, now + 1)
+    profiler.record("slow", "step", now, now + 2)
+    profiler.record("slow", "step", now, now + 3)
+
+    summaries = profiler.summarize(profiler.get_spans())
+
+    assert [(s.name, s.count, s.total, s.max) for s in summaries] == [
+        ("slow", 2, 5, 3),
+        ("fast", 1, 1, 1),
+    ]
+
+
+def test_get_step_durations_ignores_other_categories():
+    now = time.monotonic()
+    profiler.record("Deploy", "task", now, now + 1.5)
+    profiler.record("GET http://example.com", "http", now, now + 1)
+
+    assert profiler.get_step_durations() == {"Deploy": 1.5}
+
+
+def test_format_table():
+    now = time.monotonic()
+    profiler.record("Deploy", "task", now, now + 1.5)
+
+    table = profiler.format_table(profiler.get_spans()).splitlines()
+
+    assert "NAME" in table[0]
+    assert table[1].split() == ["1.500", "1", "1.500", "task", "Deploy"]
+
+
+def test_write_chrome_trace(tmp_path):
+    def work():
+        with profiler.span("Thread step"):
+            pass
+
+    with profiler.span("Main step"):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    path = tmp_path / "profiles" / "trace.json"
+
+    profiler.write_chrome_trace(str(path), profiler.get_spans())
+
+    events = json.loads(path.read_text())["traceEvents"]
+    assert [e["name"] for e in events] == ["Main step", "Thread step"]
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+    assert events[0]["tid"] != events[1]["tid"]
+
+
+def test_ui_step_records_span():
+    with Step("Checking the cluster", fatal=False):
+        pass
+
+    assert [(s.name, s.category) for s in profiler.get_spans()] == [
+        ("Checking the cluster", "step")
+    ]
+
+
+def test_run_items_records_tasks():
+    items = [
+        {"label": "First step", "task": lambda item: None},
+        {"label": "Second step", "task": lambda item: None},
+    ]
+
+    Console(items, spinner_delay=0).run_items("Starting")
+
+    assert [(s.name, s.category) for s in profiler.get_spans()] == [
+        ("First step", "task"),
+        ("Second step", "task"),
+        ("Starting lab", "lab"),
+    ]
@@ -0,0 +1,75 @@
+import time
+import threading
+from labs import watch
+from labs.watch.executor import WatchRoundExecutor
+
+
+def sleeping_step(label, seconds, error=None, **kwargs):
+    @watch.watchstep(label, **kwargs)
+    def step():
+        time.sleep(seconds)
+        if error:
+            raise error
+
+    return step
+
+
+def test__executor_run__runs_steps_concurrently():
+    steps = [sleeping_step(f"step {i}", 0.3) for i in range(5)]
+    executor = WatchRoundExecutor(max_workers=5)
+
+    start = time.monotonic()
+    results = executor.run(steps)
+
+    assert time.monotonic() - start < 1
+    assert results.done()
+
+
+def test__executor_run__returns_results_in_declared_order():
+    steps = [
+        sleeping_step("slow", 0.2, watch.LabWatchStepFailure("slow error")),
+        sleeping_step("fast", 0),
+        sleeping_step("exception", 0.1, ValueError("boom")),
+    ]
+    executor = WatchRoundExecutor(max_workers=3)
+
+    results = executor.run(steps)
+
+    assert [item.description for item in results.items] == \
+        ["slow", "fast", "exception"]
+    assert [item.ok for item in results.items] == [False, True, False]
+    assert results.items[0].error.message == "slow error"
+    assert "boom" in results.items[2].error.message
+
+
+def test__executor_run__reports_timeout_of_hanging_step():
+    release = threading.Event()
+    calls = []
+
+    @watch.watchstep("hangs", timeout=0.1)
+    def hanging_step():
+        calls.append(1)
+        release.wait(5)
+
+    executor = WatchRoundExecutor(max_workers=2)
+
+    first = executor.run([hanging_step, sleeping_step("ok", 0)])
+    second = executor.run([hanging_step])
+    release.set()
+    time.sleep(0.1)
+    third = executor.run([hanging_step])
+
+    assert [item.ok for item in first.items] == [False, True]
+    assert "did not finish" in first.items[0].error.message
+    assert not second.done()
+    assert third.done()
+    # The hanging step is not started again while it is running
+    assert len(calls) == 2
+
+
+def test__executor_run__uses_default_timeout():
+    executor = WatchRoundExecutor(timeout=0.1)
+
+    results = executor.run([sleeping_step("slow", 1)])
+
+    assert not results.done()
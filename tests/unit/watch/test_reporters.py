@@ -0,0 +1,107 @@
+import io
+import json
+import click
+import pytest
+from labs import watch
+from labs.watch.round import WatchRoundResults
+from labs.watch.reporter.console import ConsoleWatchReporter
+from labs.watch.reporter.delta import DeltaWatchReporter
+from labs.watch.reporter.jsonlines import JsonLinesWatchReporter
+
+
+def make_round(*errors):
+    results = WatchRoundResults()
+    for i, error in enumerate(errors, start=1):
+        if error:
+            failure = watch.LabWatchStepFailure(error, hints=["a hint"])
+            results.add_error(f"step {i}", failure)
+        else:
+            results.add_success(f"step {i}")
+    return results
+
+
+def test__round__compares_fingerprints():
+    assert make_round(None, "error") == make_round(None, "error")
+    assert make_round(None, "error") != make_round(None, "other error")
+    assert make_round(None) != make_round(None, None)
+
+
+def test__round__returns_changed_steps():
+    before = make_round(None, "error", "error")
+    after = make_round(None, None, "error")
+
+    assert after.changed_steps(before) == [1]
+    assert after.changed_steps(None) == [0, 1, 2]
+    assert after.changed_steps(make_round(None)) == [0, 1, 2]
+
+
+def test__delta_reporter__prints_only_changed_steps(capsys):
+    reporter = DeltaWatchReporter("Watching", interactive=False)
+
+    reporter.report(make_round("error 1", "error 2"))
+    first = click.unstyle("".join(capsys.readouterr()))
+    reporter.report(make_round("error 1", None))
+    second = click.unstyle("".join(capsys.readouterr()))
+
+    assert "step 1" in first and "step 2" in first
+    assert "Watching" in first
+    assert "step 1" not in second
+    assert "✓ 2. step 2" in second
+    assert "1 passing" in second
+
+
+def test__delta_reporter__updates_in_place(capsys):
+    reporter = DeltaWatchReporter("Watching", interactive=True)
+
+    reporter.report(make_round(None, "error 2"))
+    capsys.readouterr()
+    reporter.report(make_round(None, None))
+    output = capsys.readouterr().out
+
+    # Step 2 (4 lines) and the footer (2 lines) are printed again
+    assert output.startswith("\x1b[6A\x1b[J")
+    assert "step 1" not in output
+    assert "step 2" in output
+
+
+@pytest.mark.parametrize("reporter", [
+    ConsoleWatchReporter("Watching"),
+    DeltaWatchReporter("Watching", interactive=False),
+])
+def test__console_reporters__print_failing_steps_to_stderr(reporter, capsys):
+    reporter.report(make_round(None, "error 2"))
+
+    out, err = capsys.readouterr()
+    out, err = click.unstyle(out), click.unstyle(err)
+    assert "✓ 1. step 1" in out
+    assert "✖ 2. step 2" in err
+    assert "Hint: a hint" in err
+    assert "step 2" not in out
+    assert "1 passing" in out
+
+
+def test__jsonlines_reporter__emits_transitions():
+    stream = io.StringIO()
+    reporter = JsonLinesWatchReporter(stream)
+
+    reporter.report(make_round(None, "error"))
+    reporter.report(make_round(None, None))
+    reporter.success()
+
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(e["event"], e.get("number"), e.get("ok")) for e in events] == [
+        ("step", 1, True),
+        ("step", 2, False),
+        ("step", 2, True),
+        ("success", None, None),
+    ]
+    assert events[1]["error"] == "error"
+    assert events[1]["hints"] == ["a hint"]
+
+
+def test__resolve_reporter(monkeypatch):
+    monkeypatch.setenv("WATCH_REPORTER", "json-lines")
+    assert isinstance(watch.resolve_reporter(""), JsonLinesWatchReporter)
+
+    monkeypatch.delenv("WATCH_REPORTER")
+    assert isinstance(watch.resolve_reporter(""), DeltaWatchReporter)
@@ -0,0 +1,88 @@
+from unittest.mock import Mock
+from labs import watch
+from labs.watch.monitor import LabProgressMonitor
+from labs.watch.reporter.base import WatchReporter
+from labs.watch.round import WatchRoundResults
+from labs.watch.scheduler import WatchScheduler
+
+
+def make_step(label, **kwargs):
+    return watch.watchstep(label, **kwargs)(lambda: None)
+
+
+def round_results(*errors):
+    results = WatchRoundResults()
+    for i, error in enumerate(errors):
+        if error:
+            results.add_error(f"step {i}", watch.LabWatchStepFailure(error))
+        else:
+            results.add_success(f"step {i}")
+    return results
+
+
+def test__scheduler__runs_steps_at_their_interval():
+    fast = make_step("fast")
+    slow = make_step("slow", interval=5)
+    scheduler = WatchScheduler([fast, slow], interval=1)
+
+    scheduler.record([fast, slow], round_results("error", "error"), now=0)
+
+    assert scheduler.due_steps(now=1) == [fast]
+    assert scheduler.due_steps(now=5) == [fast, slow]
+    assert scheduler.seconds_until_due(now=0.5) == 0.5
+
+
+def test__scheduler__backs_off_steps_that_fail_the_same_way():
+    step = make_step("step")
+    scheduler = WatchScheduler([step], interval=1, max_backoff=4)
+
+    intervals = []
+    for now in range(5):
+        scheduler.record([step], round_results("same error"), now=now)
+        intervals.append(scheduler.get_interval(step))
+
+    assert intervals == [1, 2, 4, 4, 4]
+
+    scheduler.record([step], round_results("other error"), now=5)
+    assert scheduler.get_interval(step) == 1
+
+
+def test__scheduler__does_not_run_sticky_steps_after_they_pass():
+    sticky = make_step("sticky", sticky=True)
+    other = make_step("other")
+    scheduler = WatchScheduler([sticky, other])
+
+    scheduler.record([sticky, other], round_results(None, "error"), now=0)
+    assert scheduler.due_steps(now=10) == [other]
+
+    scheduler.record([other], round_results(None), now=10)
+    results = scheduler.results()
+    assert results.done()
+    assert [item.description for item in results.items] == \
+        ["step 0", "step 0"]
+    assert not scheduler.is_verified()
+
+
+def test__monitor__verifies_sticky_steps_before_finishing():
+    calls = []
+
+    @watch.watchstep("sticky", sticky=True)
+    def sticky_step():
+        calls.append("sticky")
+
+    @watch.watchstep("eventually passes")
+    def other_step():
+        calls.append("other")
+        watch.expect(calls.count("other") > 1)
+
+    reporter = Mock(spec=WatchReporter)
+    monitor = LabProgressMonitor(
+        [sticky_step, other_step], sleep_seconds=0, reporter=reporter
+    )
+    monitor.watch()
+
+    # Round 1: both steps. Round 2: the failing step only.
+    # Round 3: verification of all the steps
+    assert calls.count("sticky") == 2
+    assert calls.count("other") == 3
+    reporter.success.assert_called()
@@ -0,0 +1,131 @@
+import threading
+import pytest
+from unittest.mock import Mock
+from labs import watch
+from labs.watch import triggers
+from labs.watch.monitor import LabProgressMonitor
+from labs.watch.reporter.base import WatchReporter
+from labs.watch.round import WatchRoundResults
+from labs.watch.scheduler import WatchScheduler
+
+
+def file_step(*paths):
+    return watch.watchstep("file step", paths=list(paths))(lambda: None)
+
+
+@pytest.fixture(params=["inotify", "poll"])
+def make_watcher(request):
+    watchers = []
+
+    def make(steps):
+        if request.param == "inotify":
+            watcher = triggers.InotifyFileWatcher(steps)
+        else:
+            watcher = triggers.PollingFileWatcher(steps, poll_interval=0.01)
+        watchers.append(watcher)
+        return watcher
+
+    yield make
+    for watcher in watchers:
+        watcher.close()
+
+
+def test__file_watcher__detects_file_creation(tmp_path, make_watcher):
+    path = tmp_path / "app" / "pom.xml"
+    step = file_step(str(path))
+    watcher = make_watcher([step])
+
+    assert watcher.wait(0.05) == set()
+
+    # The parent directory is created after the watcher
+    path.parent.mkdir()
+    watcher.wait(0.1)
+
+    path.write_text("<project/>")
+    changed = set()
+    while str(path) not in changed:
+        changed |= watcher.wait(1) or {"timeout"}
+        assert "timeout" not in changed
+    assert watcher.affected_steps(changed) == [step]
+
+
+def test__file_watcher__ignores_unrelated_files(tmp_path, make_watcher):
+    step = file_step(str(tmp_path / "expected.txt"))
+    watcher = make_watcher([step])
+
+    (tmp_path / "other.txt").write_text("other")
+    changed = watcher.wait(1)
+
+    assert watcher.affected_steps(changed) == []
+
+
+def test__inotify_file_watcher__reports_all_paths_on_overflow(tmp_path):
+    """
+    If the kernel drops events, every path is reported as changed
+    """
+    steps = [file_step(str(tmp_path / "a")), file_step(str(tmp_path / "b"))]
+    watcher = triggers.InotifyFileWatcher(steps)
+    watcher._read_events = Mock(return_value=[
+        (-1, triggers.IN_Q_OVERFLOW, "")
+    ])
+    # Make the inotify descriptor ready to read
+    (tmp_path / "other").write_text("")
+
+    try:
+        changed = watcher.wait(1)
+    finally:
+        watcher.close()
+
+    assert changed == {str(tmp_path / "a"), str(tmp_path / "b")}
+    assert watcher.affected_steps(changed) == steps
+
+
+def test__is_affected():
+    assert triggers.is_affected("/home/student/repo", "/home/student/repo")
+    assert triggers.is_affected("/home/student/repo", "/home/student")
+    assert triggers.is_affected("/home/student/repo", "/home/student/repo/a")
+    assert not triggers.is_affected("/home/student/repo", "/home/student/r")
+
+
+def test__create_file_watcher(tmp_path, monkeypatch):
+    step = file_step(str(tmp_path))
+    assert triggers.create_file_watcher([file_step()]) is None
+
+    monkeypatch.setenv("WATCH_TRIGGERS", "poll")
+    watcher = triggers.create_file_watcher([step])
+
+    assert isinstance(watcher, triggers.PollingFileWatcher)
+
+
+def test__scheduler__runs_file_steps_when_triggered():
+    step = file_step("/tmp/file")
+    scheduler = WatchScheduler([step])
+    results = WatchRoundResults()
+    results.add_error("file step", watch.LabWatchStepFailure("missing"))
+
+    scheduler.record([step], results, now=0)
+    assert scheduler.due_steps(now=100) == []
+    assert scheduler.seconds_until_due(now=100) is None
+
+    scheduler.trigger([step])
+    assert scheduler.due_steps(now=100) == [step]
+
+
+def test__monitor__reruns_file_steps_when_files_change(tmp_path):
+    path = tmp_path / "answer.txt"
+
+    @watch.watchstep("The answer exists", paths=[str(path)])
+    def check_answer():
+        watch.expect(path.exists())
+
+    reporter = Mock(spec=WatchReporter)
+    monitor = LabProgressMonitor(
+        [check_answer], sleep_seconds=0.01, reporter=reporter
+    )
+    timer = threading.Timer(0.2, path.write_text, ["42"])
+    timer.start()
+
+    monitor.watch()
+
+    timer.join()
+    reporter.success.assert_called()